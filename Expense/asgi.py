@@ -2,6 +2,8 @@
 ASGI config for Expense project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve the app from here (e.g. ``uvicorn Expense.asgi:application``) for the
+live dashboard stream and the concurrent async dashboard.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
@@ -64,6 +64,9 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",  # ✅ for Render/static
+    "Tracker.profiling.ProfilingMiddleware",
+    "Tracker.metrics.MetricsMiddleware",
+    "Tracker.instrumentation.QueryInstrumentationMiddleware",
 
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -109,6 +112,92 @@ DATABASES = {
 }
 
 
+# ==========================
+# CACHE
+# ==========================
+# Analytics results are cached per user (see Tracker/caching.py). Every
+# worker has to see the same data versions, or the ones that did not handle
+# a write keep serving the old results, so the default is a file cache all
+# workers on the host share. Across hosts use TRACKER_CACHE_BACKEND=redis
+# (TRACKER_CACHE_LOCATION=redis://...). locmem is per-process: only for a
+# single worker. The file cache culls a random third of its entries when
+# full, not the least recently used ones; for large working sets prefer
+# redis with maxmemory-policy allkeys-lru.
+TRACKER_CACHE_BACKEND = os.environ.get("TRACKER_CACHE_BACKEND", "file")
+
+if TRACKER_CACHE_BACKEND == "locmem":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "expense-tracker",
+            "OPTIONS": {"MAX_ENTRIES": 5000},
+        }
+    }
+elif TRACKER_CACHE_BACKEND == "redis":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ.get("TRACKER_CACHE_LOCATION", "redis://127.0.0.1:6379/1"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.environ.get("TRACKER_CACHE_LOCATION", str(BASE_DIR / ".cache" / "tracker")),
+            "OPTIONS": {"MAX_ENTRIES": 20000},
+        }
+    }
+
+TRACKER_CACHE_ALIAS = "default"
+TRACKER_CACHE_TIMEOUT = 60 * 60
+
+
+# ==========================
+# QUERY BUDGETS
+# ==========================
+# Views declare `query_budget` (see Tracker/instrumentation.py). Going over
+# it logs a warning in production and fails the request in the test suite
+# (Tracker/test_runner.py turns this on).
+TRACKER_QUERY_BUDGET_STRICT = os.environ.get("TRACKER_QUERY_BUDGET_STRICT", "0") == "1"
+
+TEST_RUNNER = "Tracker.test_runner.TrackerTestRunner"
+
+
+# ==========================
+# PROFILING
+# ==========================
+# Staff can profile a single request with a signed token (see
+# Tracker/profiling.py). Only the newest TRACKER_PROFILE_KEEP are kept.
+TRACKER_PROFILING = os.environ.get("TRACKER_PROFILING", "1") == "1"
+TRACKER_PROFILE_DIR = os.environ.get("TRACKER_PROFILE_DIR", str(BASE_DIR / ".profiles"))
+TRACKER_PROFILE_KEEP = int(os.environ.get("TRACKER_PROFILE_KEEP", "50"))
+
+
+# ==========================
+# METRICS
+# ==========================
+# /metrics (Prometheus text format). Every worker writes its own file under
+# TRACKER_METRICS_DIR and the endpoint sums them, so point all workers at
+# the same directory. Set TRACKER_METRICS_TOKEN to scrape with a bearer token.
+TRACKER_METRICS_DIR = os.environ.get("TRACKER_METRICS_DIR", str(BASE_DIR / ".metrics"))
+TRACKER_METRICS_FLUSH_INTERVAL = float(os.environ.get("TRACKER_METRICS_FLUSH_INTERVAL", "1.0"))
+TRACKER_METRICS_TOKEN = os.environ.get("TRACKER_METRICS_TOKEN", "")
+
+# /api/sync/ holds back rows written in the last few seconds, so a
+# transaction that commits late can't land behind a cursor already handed
+# out (Tracker/sync.py). Longer than the slowest write transaction.
+TRACKER_SYNC_SETTLE_SECONDS = float(os.environ.get("TRACKER_SYNC_SETTLE_SECONDS", "2"))
+
+# Live dashboard push over server-sent events (Tracker/live.py, ASGI only).
+# "local" wakes streams within one process; with several workers use "db",
+# which adds a notification table each worker polls every
+# TRACKER_LIVE_POLL_SECONDS.
+TRACKER_LIVE_BACKEND = os.environ.get("TRACKER_LIVE_BACKEND", "local")
+TRACKER_LIVE_POLL_SECONDS = float(os.environ.get("TRACKER_LIVE_POLL_SECONDS", "1.0"))
+TRACKER_LIVE_HEARTBEAT_SECONDS = float(os.environ.get("TRACKER_LIVE_HEARTBEAT_SECONDS", "15"))
+
+
 # ==========================
 # PASSWORD VALIDATION
 # ==========================
@@ -1,10 +1,10 @@
 from django.contrib import admin
-from .models import Wallet, Category, Transaction, Budget
+from .models import Wallet, Category, Transaction, Budget, MonthlyRollup, RecurringTransaction, SpendForecast
 
 
 @admin.register(Wallet)
 class WalletAdmin(admin.ModelAdmin):
-    list_display = ("name", "currency", "owner")
+    list_display = ("name", "currency", "owner", "balance")
     search_fields = ("name", "owner__username")
 
 
@@ -26,3 +26,24 @@ class TransactionAdmin(admin.ModelAdmin):
     list_display = ("t_type", "amount", "date", "owner", "wallet", "category", "is_deleted")
     list_filter = ("t_type", "date", "category", "wallet", "is_deleted")
     search_fields = ("note", "owner__username")
+
+
+@admin.register(RecurringTransaction)
+class RecurringTransactionAdmin(admin.ModelAdmin):
+    list_display = ("t_type", "amount", "frequency", "interval", "next_date", "owner", "wallet", "category", "is_active")
+    list_filter = ("frequency", "t_type", "is_active")
+    search_fields = ("note", "owner__username")
+
+
+@admin.register(MonthlyRollup)
+class MonthlyRollupAdmin(admin.ModelAdmin):
+    list_display = ("owner", "wallet", "category", "month", "t_type", "total", "txn_count")
+    list_filter = ("month", "t_type")
+    search_fields = ("owner__username",)
+
+
+@admin.register(SpendForecast)
+class SpendForecastAdmin(admin.ModelAdmin):
+    list_display = ("owner", "category", "month", "spent", "projected", "limit_amount", "exceeds_on", "computed_at")
+    list_filter = ("month", "exceeds_on")
+    search_fields = ("owner__username", "category__name")
@@ -1,15 +1,21 @@
 from django.utils import timezone
-from django.db.models import Sum
+from django.db.models import Q, Sum
+from django.utils.decorators import method_decorator
 from rest_framework.views import APIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
+from .caching import cache_stats, conditional_for_user, get_or_compute
+from .dashboard import DashboardSnapshot
+from .forecasting import forecast_for_user
 from .models import Transaction
 
 
 class MonthlySummaryAPIView(APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = 3
 
+    @method_decorator(conditional_for_user)
     def get(self, request):
         month = request.query_params.get("month")
         today = timezone.localdate()
@@ -22,14 +28,61 @@ class MonthlySummaryAPIView(APIView):
 
         month_end = today if (today.year == month_start.year and today.month == month_start.month) else month_start.replace(day=28)
 
-        txns = Transaction.objects.for_user(request.user).filter(date__gte=month_start)
+        def summarize():
+            totals = Transaction.objects.for_user(request.user).filter(date__gte=month_start).aggregate(
+                income=Sum("amount", filter=Q(t_type=Transaction.INCOME)),
+                expense=Sum("amount", filter=Q(t_type=Transaction.EXPENSE)),
+            )
+            income = totals["income"] or 0
+            expense = totals["expense"] or 0
 
-        income = txns.filter(t_type=Transaction.INCOME).aggregate(total=Sum("amount"))["total"] or 0
-        expense = txns.filter(t_type=Transaction.EXPENSE).aggregate(total=Sum("amount"))["total"] or 0
+            return {
+                "month_start": str(month_start),
+                "income": income,
+                "expense": expense,
+                "net": income - expense,
+            }
 
+        return Response(get_or_compute("monthly_summary", request.user, (month_start,), summarize))
+
+
+class DashboardSnapshotAPIView(APIView):
+    """
+    Same data the dashboard page renders, as JSON.
+    """
+    permission_classes = [IsAuthenticated]
+    query_budget = 6
+
+    @method_decorator(conditional_for_user)
+    def get(self, request):
+        snapshot = DashboardSnapshot.for_user(request.user, timezone.localdate())
+        return Response(snapshot.as_dict())
+
+
+class ForecastAPIView(APIView):
+    """
+    This month's projected spend per category and budget overrun dates.
+    """
+    permission_classes = [IsAuthenticated]
+    query_budget = 4
+
+    @method_decorator(conditional_for_user)
+    def get(self, request):
+        today = timezone.localdate()
+        forecasts = forecast_for_user(request.user, today)
         return Response({
-            "month_start": str(month_start),
-            "income": income,
-            "expense": expense,
-            "net": income - expense,
+            "month_start": str(today.replace(day=1)),
+            "as_of": str(today),
+            "categories": [f.as_dict() for f in forecasts],
         })
+
+
+class CacheStatsAPIView(APIView):
+    """
+    Hit/miss counters of the analytics cache in this worker process.
+    """
+    permission_classes = [IsAdminUser]
+    query_budget = 2
+
+    def get(self, request):
+        return Response(cache_stats())
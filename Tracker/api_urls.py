@@ -1,32 +1,108 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from rest_framework import viewsets, permissions
-from django.db.models import Q
+from rest_framework import viewsets, permissions, status
 from .models import Transaction, Category, Wallet, Budget
-from .serializers import TransactionSerializer, CategorySerializer, WalletSerializer, BudgetSerializer
+from .serializers import RowEncoder, TransactionSerializer, CategorySerializer, WalletSerializer, BudgetSerializer
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from django.db.models import Sum
-from .analytics_api import MonthlySummaryAPIView
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import method_decorator
+from . import batch, columnar
+from .pagination import DEFAULT_ORDERING, KeysetPagination
+from .caching import conditional_for_user
+from .importer import FORMATS, TransactionImporter, guess_format, read_rows, text_stream
+from .analytics_api import MonthlySummaryAPIView, DashboardSnapshotAPIView, ForecastAPIView, CacheStatsAPIView
 from .services import wallet_balance_for_user
+from .sync import SyncAPIView
 
 
 
 
 class OwnedModelViewSet(viewsets.ModelViewSet):
+    """
+    Reads accept ?fields=id,amount to return only those fields and
+    ?expand=wallet,category to inline related objects (the serializer's
+    expandable_fields). Both are pushed down to the query: unused columns
+    are deferred with only() and expanded relations are joined with
+    select_related, so neither adds queries.
+    """
     permission_classes = [permissions.IsAuthenticated]
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
 
+    @method_decorator(conditional_for_user)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @method_decorator(conditional_for_user)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    def _param_list(self, name, allowed):
+        raw = self.request.query_params.get(name)
+        if not raw:
+            return ()
+        names = tuple(dict.fromkeys(part.strip() for part in raw.split(",") if part.strip()))
+        unknown = [n for n in names if n not in allowed]
+        if unknown:
+            raise ValidationError({name: [f"Unknown field(s): {', '.join(unknown)}. Choose from: {', '.join(allowed)}."]})
+        return names
+
+    def sparse_fieldset(self):
+        """
+        (fields, expand) requested on a read; ((), ()) for writes.
+        """
+        if self.request is None or self.request.method not in permissions.SAFE_METHODS:
+            return (), ()
+        serializer_class = self.get_serializer_class()
+        fields = self._param_list("fields", serializer_class.Meta.fields)
+        expand = self._param_list("expand", list(getattr(serializer_class, "expandable_fields", {})))
+        if fields:
+            expand = tuple(name for name in expand if name in fields)
+        return fields, expand
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fields"], context["expand"] = self.sparse_fieldset()
+        return context
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fields, expand = self.sparse_fieldset()
+        if expand:
+            queryset = queryset.select_related(*expand)
+        if not fields:
+            return queryset
+
+        model = queryset.model
+        concrete = {f.name for f in model._meta.concrete_fields}
+        load = {model._meta.pk.name} | {name for name in fields if name in concrete}
+        # The keyset paginator reads the sort keys off each object
+        if isinstance(self.paginator, KeysetPagination):
+            ordering = getattr(self, "keyset_ordering", None) or DEFAULT_ORDERING
+            load |= {key.lstrip("-") for key in ordering if key.lstrip("-") in concrete}
+
+        expandable = getattr(self.get_serializer_class(), "expandable_fields", {})
+        for name in expand:
+            load |= {f"{name}__{field}" for field in expandable[name].Meta.fields}
+
+        # Drop joins to relations that are now deferred
+        return queryset.select_related(None).select_related(*expand).only(*load)
+
 
 class WalletViewSet(OwnedModelViewSet):
     serializer_class = WalletSerializer
+    query_budget = {"list": 3, "retrieve": 3, "balance": 3, "create": 3, "update": 4, "partial_update": 4}
 
     def get_queryset(self):
         return Wallet.objects.filter(owner=self.request.user)
 
     @action(detail=True, methods=["get"])
+    @method_decorator(conditional_for_user)
     def balance(self, request, pk=None):
         wallet = self.get_object()
         income, expense, balance = wallet_balance_for_user(request.user, wallet)
@@ -43,6 +119,7 @@ class WalletViewSet(OwnedModelViewSet):
 
 class CategoryViewSet(OwnedModelViewSet):
     serializer_class = CategorySerializer
+    query_budget = {"list": 3, "retrieve": 3, "create": 3, "update": 4, "partial_update": 4}
 
     def get_queryset(self):
         return Category.objects.filter(owner=self.request.user)
@@ -52,45 +129,174 @@ class CategoryViewSet(OwnedModelViewSet):
 
 class TransactionViewSet(OwnedModelViewSet):
     serializer_class = TransactionSerializer
+    pagination_class = KeysetPagination
+    # bulk, bulk_delete and import scale with the batch, so they have no budget
+    query_budget = {"list": 4, "retrieve": 3, "create": 16, "update": 19, "partial_update": 19, "destroy": 12}
+
+    # ?ordering= value -> keyset ordering (always ends in a unique key)
+    ORDERINGS = {
+        "date": ("date", "created_at", "id"),
+        "-date": ("-date", "-created_at", "-id"),
+        "amount": ("amount", "id"),
+        "-amount": ("-amount", "-id"),
+        "created_at": ("created_at", "id"),
+        "-created_at": ("-created_at", "-id"),
+    }
+    keyset_ordering = None
+    row_encoder = RowEncoder(TransactionSerializer)
+    _sparse_encoders = {}  # fields tuple -> RowEncoder
 
     def get_queryset(self):
         qs = Transaction.objects.for_user(self.request.user).select_related("category", "wallet")
 
-        t_type = self.request.query_params.get("t_type")
-        category = self.request.query_params.get("category")
-        wallet = self.request.query_params.get("wallet")
-        date_from = self.request.query_params.get("date_from")
-        date_to = self.request.query_params.get("date_to")
         search = self.request.query_params.get("search")
         ordering = self.request.query_params.get("ordering")
-
-        if t_type:
-            qs = qs.filter(t_type=t_type)
-
-        if category:
-            qs = qs.filter(category__id=category)
-
-        if wallet:
-            qs = qs.filter(wallet__id=wallet)
-
-        if date_from:
-            qs = qs.filter(date__gte=date_from)
-
-        if date_to:
-            qs = qs.filter(date__lte=date_to)
-
-        if search:
-            qs = qs.filter(Q(note__icontains=search))
-
-        if ordering in ["date", "-date", "amount", "-amount", "created_at", "-created_at"]:
-            qs = qs.order_by(ordering)
+        ranked = bool(search) and ordering == "relevance"
+
+        qs = qs.filter_by(
+            t_type=self.request.query_params.get("t_type"),
+            category=self.request.query_params.get("category"),
+            wallet=self.request.query_params.get("wallet"),
+            date_from=self.request.query_params.get("date_from"),
+            date_to=self.request.query_params.get("date_to"),
+            search=None if ranked else search,
+        )
+
+        if ranked:
+            # Best matches first (bm25: lower is better)
+            qs = qs.search(search, ranked=True)
+            self.keyset_ordering = ("search_rank", "id")
+            qs = qs.order_by(*self.keyset_ordering)
+        elif ordering in self.ORDERINGS:
+            self.keyset_ordering = self.ORDERINGS[ordering]
+            qs = qs.order_by(*self.keyset_ordering)
 
         return qs
 
+    def encoder_for(self, fields):
+        if not fields:
+            return self.row_encoder
+        # Canonical order, so at most one encoder per subset
+        fields = tuple(name for name in TransactionSerializer.Meta.fields if name in fields)
+        encoder = self._sparse_encoders.get(fields)
+        if encoder is None:
+            encoder = self._sparse_encoders[fields] = RowEncoder(TransactionSerializer, fields=fields)
+        return encoder
+
+    @method_decorator(conditional_for_user)
+    def list(self, request, *args, **kwargs):
+        """
+        Reads plain tuples and encodes them with row_encoder instead of
+        building instances for TransactionSerializer; the JSON is identical.
+        ?expand= needs nested objects, so it goes through the serializer.
+        """
+        fields, expand = self.sparse_fieldset()
+        if request.accepted_renderer.format == "columnar":
+            return self.columnar_list(fields, expand)
+        if expand:
+            return super().list(request, *args, **kwargs)
+
+        encoder = self.encoder_for(fields)
+        queryset = self.filter_queryset(self.get_queryset())
+        columns = list(encoder.columns)
+        # The paginator reads the sort keys off each row
+        for key in self.keyset_ordering or DEFAULT_ORDERING:
+            if key.lstrip("-") not in columns:
+                columns.append(key.lstrip("-"))
+
+        rows = self.paginate_queryset(queryset.values_list(*columns, named=True))
+        return self.get_paginated_response(encoder.encode_many(rows))
+
+    def get_renderers(self):
+        renderers = super().get_renderers()
+        if self.action == "list":
+            renderers.append(columnar.ColumnarRenderer())
+        return renderers
+
+    def columnar_list(self, fields, expand):
+        """
+        Every matching row (no pagination) in the columnar format, streamed
+        from a chunked iterator. See Tracker/columnar.py.
+        """
+        if expand:
+            raise ValidationError({"expand": ["Not supported by the columnar format; related ids are dictionary encoded."]})
+        names = [name for name in TransactionSerializer.Meta.fields if not fields or name in fields]
+        rows = (
+            self.filter_queryset(self.get_queryset())
+            .order_by(*(self.keyset_ordering or DEFAULT_ORDERING))
+            .values_list(*names)
+            .iterator(chunk_size=columnar.CHUNK_SIZE)
+        )
+        encoder = columnar.ColumnarEncoder(Transaction, names)
+        response = StreamingHttpResponse(encoder.stream(rows), content_type=columnar.MEDIA_TYPE)
+        patch_vary_headers(response, ["Accept"])
+        return response
+
+    @action(detail=False, methods=["post", "patch"], url_path="bulk")
+    def bulk(self, request):
+        """
+        POST a list of transactions to create them, or PATCH a list of
+        {id, ...fields} to update them. One result per item, in order.
+        """
+        if not isinstance(request.data, list):
+            return Response({"non_field_errors": ["Expected a list of items."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        handler = batch.batch_create if request.method == "POST" else batch.batch_update
+        try:
+            results = handler(request.user, request.data)
+        except batch.BatchTooLarge as exc:
+            return Response({"non_field_errors": [str(exc)]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"results": results}, status=status.HTTP_207_MULTI_STATUS)
+
+    @action(detail=False, methods=["post"], url_path="bulk-delete")
+    def bulk_delete(self, request):
+        """
+        Soft-delete {"ids": [...]} with a single UPDATE.
+        """
+        ids = request.data.get("ids") if isinstance(request.data, dict) else None
+        if not isinstance(ids, list):
+            return Response({"ids": ["Expected a list of ids."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            results = batch.batch_soft_delete(request.user, ids)
+        except batch.BatchTooLarge as exc:
+            return Response({"ids": [str(exc)]}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"results": results}, status=status.HTTP_207_MULTI_STATUS)
+
+    @action(detail=False, methods=["post"], url_path="import")
+    def bulk_import(self, request):
+        """
+        Upload a CSV or JSON Lines file as `file` (multipart).
+        Optional: format=csv|jsonl, batch_size, dry_run=1.
+        """
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"file": ["This field is required."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        fmt = request.data.get("format") or guess_format(upload.name)
+        if fmt not in FORMATS:
+            return Response({"format": [f"Use one of: {', '.join(FORMATS)}."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            batch_size = max(1, int(request.data.get("batch_size") or 1000))
+        except ValueError:
+            return Response({"batch_size": ["A valid integer is required."]}, status=status.HTTP_400_BAD_REQUEST)
+
+        importer = TransactionImporter(
+            request.user,
+            batch_size=batch_size,
+            dry_run=str(request.data.get("dry_run", "")).lower() in ("1", "true"),
+        )
+        report = importer.run(read_rows(text_stream(upload.file), fmt))
+
+        code = status.HTTP_201_CREATED if report["created"] else status.HTTP_200_OK
+        return Response(report, status=code)
+
 
 
 class BudgetViewSet(OwnedModelViewSet):
     serializer_class = BudgetSerializer
+    query_budget = {"list": 3, "retrieve": 3, "create": 4, "update": 4, "partial_update": 4, "destroy": 6}
 
     def get_queryset(self):
         return Budget.objects.filter(owner=self.request.user).select_related("category")
@@ -108,4 +314,8 @@ urlpatterns = [
 
 urlpatterns += [
     path("analytics/monthly-summary/", MonthlySummaryAPIView.as_view(), name="monthly_summary"),
+    path("analytics/dashboard/", DashboardSnapshotAPIView.as_view(), name="dashboard_snapshot"),
+    path("analytics/forecast/", ForecastAPIView.as_view(), name="spending_forecast"),
+    path("analytics/cache-stats/", CacheStatsAPIView.as_view(), name="cache_stats"),
+    path("sync/", SyncAPIView.as_view(), name="sync"),
 ]
@@ -0,0 +1,113 @@
+"""
+Stored running wallet balances.
+
+Wallet.income / expense / balance are moved by F-expression deltas in the
+same DB transaction as the transaction write, so reading a balance is a
+single-row lookup. reconcile_wallets() recomputes them from raw rows.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import Transaction, Wallet
+
+
+def deltas_for(changes):
+    """
+    Folds (old_state, new_state) pairs (see rollups.TxnState) into
+    {wallet_id: [income_delta, expense_delta]}.
+    """
+    deltas = defaultdict(lambda: [Decimal("0"), Decimal("0")])
+    for old, new in changes:
+        for state, sign in ((old, -1), (new, 1)):
+            if state is None or state.is_deleted:
+                continue
+            idx = 0 if state.t_type == Transaction.INCOME else 1
+            deltas[state.wallet_id][idx] += sign * state.amount
+    return deltas
+
+
+def apply_deltas(deltas):
+    for wallet_id, (income, expense) in deltas.items():
+        if not income and not expense:
+            continue
+        Wallet.objects.filter(pk=wallet_id).update(
+            income=F("income") + income,
+            expense=F("expense") + expense,
+            balance=F("balance") + income - expense,
+            updated_at=timezone.now(),  # so the change feed picks the new balance up
+        )
+
+
+def record_changes(changes):
+    """
+    Applies a batch of (old_state, new_state) pairs to wallet balances.
+    Use this from bulk write paths that bypass model signals.
+    """
+    with transaction.atomic():
+        apply_deltas(deltas_for(changes))
+
+
+def record_change(old, new):
+    record_changes([(old, new)])
+
+
+def expected_balances(wallet_ids):
+    """
+    Recomputes {wallet_id: (income, expense)} from active transactions.
+    """
+    expected = {wid: [Decimal("0"), Decimal("0")] for wid in wallet_ids}
+    rows = (
+        Transaction.objects.active()
+        .filter(wallet_id__in=wallet_ids)
+        .values("wallet_id", "t_type")
+        .annotate(total=Sum("amount"))
+        .order_by()
+    )
+    for row in rows:
+        idx = 0 if row["t_type"] == Transaction.INCOME else 1
+        expected[row["wallet_id"]][idx] = row["total"]
+    return expected
+
+
+def reconcile_wallets(batch_size=500, dry_run=False, owner=None):
+    """
+    Walks wallets in primary-key batches and repairs any whose stored totals
+    drifted from their transactions. Yields (wallet, stored, expected) for
+    every wallet that was out of sync, where both are (income, expense, balance).
+    """
+    wallets = Wallet.objects.all()
+    if owner is not None:
+        wallets = wallets.filter(owner=owner)
+
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                wallets.filter(pk__gt=last_pk).order_by("pk").select_for_update()[:batch_size]
+            )
+            if not batch:
+                return
+            last_pk = batch[-1].pk
+
+            expected = expected_balances([w.pk for w in batch])
+            drifted = []
+            for w in batch:
+                income, expense = expected[w.pk]
+                stored = (w.income, w.expense, w.balance)
+                if stored != (income, expense, income - expense):
+                    drifted.append((w, stored, (income, expense, income - expense)))
+
+            if drifted and not dry_run:
+                now = timezone.now()
+                for w, _, expected_totals in drifted:
+                    w.income, w.expense, w.balance = expected_totals
+                    w.updated_at = now
+                Wallet.objects.bulk_update(
+                    [w for w, _, _ in drifted], ["income", "expense", "balance", "updated_at"], batch_size=batch_size
+                )
+
+        yield from drifted
@@ -0,0 +1,175 @@
+"""
+Batch create / partial update / soft delete for transactions.
+
+Each batch runs in one DB transaction. Wallet and category ownership is
+checked against id sets loaded once per batch, rows are written with
+bulk_create / bulk_update / a single UPDATE, and rollups, balances and the
+cache are updated once via record_transaction_changes. Every call returns
+one result per input item, in input order.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Category, Transaction, Wallet
+from .rollups import state_of
+from .serializers import TransactionBatchItemSerializer, TransactionSerializer
+from .services import record_transaction_changes
+
+
+MAX_BATCH_SIZE = 500
+WRITABLE_FIELDS = {"wallet": "wallet_id", "category": "category_id", "t_type": "t_type",
+                   "amount": "amount", "date": "date", "note": "note"}
+_STATE_ONLY = ("owner", "wallet", "category", "date", "t_type", "amount", "is_deleted")
+
+
+class BatchTooLarge(ValueError):
+    pass
+
+
+def _check_size(items):
+    if len(items) > MAX_BATCH_SIZE:
+        raise BatchTooLarge(f"A batch can hold at most {MAX_BATCH_SIZE} items.")
+
+
+def _ids(values):
+    ids = set()
+    for value in values:
+        try:
+            ids.add(int(value))
+        except (TypeError, ValueError):
+            pass
+    return ids
+
+
+def _context(user, items):
+    """
+    Loads the user's wallets/categories referenced by the batch (two queries).
+    """
+    items = [i for i in items if isinstance(i, dict)]
+    wallet_ids = _ids(i.get("wallet") for i in items)
+    category_ids = _ids(i.get("category") for i in items)
+    return {
+        "wallet_ids": set(Wallet.objects.filter(owner=user, pk__in=wallet_ids).values_list("pk", flat=True)),
+        "category_ids": set(Category.objects.filter(owner=user, pk__in=category_ids).values_list("pk", flat=True)),
+    }
+
+
+def _validate(items, context, partial=False):
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            yield index, None, {"non_field_errors": ["Expected an object."]}
+            continue
+        serializer = TransactionBatchItemSerializer(data=item, context=context, partial=partial)
+        if serializer.is_valid():
+            yield index, serializer.validated_data, None
+        else:
+            yield index, None, serializer.errors
+
+
+def batch_create(user, items):
+    _check_size(items)
+    context = _context(user, items)
+
+    results = [None] * len(items)
+    objs = []
+    for index, data, errors in _validate(items, context):
+        if errors:
+            results[index] = {"index": index, "status": 400, "errors": errors}
+            continue
+        objs.append((index, Transaction(
+            owner=user,
+            wallet_id=data["wallet"],
+            category_id=data.get("category"),
+            t_type=data["t_type"],
+            amount=data["amount"],
+            date=data["date"],
+            note=data.get("note", ""),
+        )))
+
+    with transaction.atomic():
+        Transaction.objects.bulk_create([obj for _, obj in objs])
+        record_transaction_changes((None, state_of(obj)) for _, obj in objs)
+
+    for index, obj in objs:
+        results[index] = {"index": index, "status": 201, "id": obj.pk, "data": TransactionSerializer(obj).data}
+    return results
+
+
+def batch_update(user, items):
+    """
+    Partial updates; every item needs an `id` plus the fields to change.
+    """
+    _check_size(items)
+    context = _context(user, items)
+
+    results = [None] * len(items)
+    wanted = {}
+    for index, data, errors in _validate(items, context, partial=True):
+        if errors:
+            results[index] = {"index": index, "status": 400, "errors": errors}
+        elif "id" not in data:
+            results[index] = {"index": index, "status": 400, "errors": {"id": ["This field is required."]}}
+        else:
+            wanted[index] = data
+
+    with transaction.atomic():
+        existing = Transaction.objects.for_user(user).select_for_update().in_bulk(
+            {data["id"] for data in wanted.values()}
+        )
+
+        now = timezone.now()
+        changes, touched, fields = [], {}, {"updated_at"}
+        for index, data in wanted.items():
+            obj = touched.get(data["id"]) or existing.get(data["id"])
+            if obj is None:
+                results[index] = {"index": index, "status": 404, "errors": {"id": ["Not found."]}}
+                continue
+
+            old = state_of(obj)
+            for name, attname in WRITABLE_FIELDS.items():
+                if name in data:
+                    setattr(obj, attname, data[name])
+                    fields.add(name)
+            obj.updated_at = now
+            changes.append((old, state_of(obj)))
+            touched[obj.pk] = obj
+            results[index] = {"index": index, "status": 200, "id": obj.pk}
+
+        Transaction.objects.bulk_update(list(touched.values()), sorted(fields), batch_size=MAX_BATCH_SIZE)
+        record_transaction_changes(changes)
+
+    for result in results:
+        if result["status"] == 200:
+            result["data"] = TransactionSerializer(touched[result["id"]]).data
+    return results
+
+
+def batch_soft_delete(user, ids):
+    """
+    Soft-deletes every listed transaction with a single UPDATE.
+    """
+    _check_size(ids)
+
+    results = [None] * len(ids)
+    wanted = {}
+    for index, value in enumerate(ids):
+        pk = next(iter(_ids([value])), None)
+        if pk is None:
+            results[index] = {"index": index, "status": 400, "errors": {"id": ["A valid integer is required."]}}
+        else:
+            wanted[index] = pk
+
+    with transaction.atomic():
+        qs = Transaction.objects.for_user(user).filter(pk__in=set(wanted.values())).select_for_update()
+        found = {obj.pk: obj for obj in qs.only(*_STATE_ONLY)}
+        Transaction.objects.filter(pk__in=found).update(is_deleted=True, updated_at=timezone.now())
+        record_transaction_changes(
+            (state_of(obj), state_of(obj)._replace(is_deleted=True)) for obj in found.values()
+        )
+
+    for index, pk in wanted.items():
+        if pk in found:
+            results[index] = {"index": index, "status": 204, "id": pk}
+        else:
+            results[index] = {"index": index, "status": 404, "id": pk, "errors": {"id": ["Not found."]}}
+    return results
@@ -0,0 +1,283 @@
+"""
+Benchmark harness for the Tracker hot paths.
+
+Each scenario is one request made through the Django test client as a
+seeded user (see seed_bench). For every scenario we report latency
+percentiles, the number of queries and the peak Python memory allocated
+while serving the request, as a JSON-ready dict so runs can be diffed.
+
+Requests run "on" one reference day, the end of the seeded history
+(seeding.SEED_END unless seed_bench was given --end): timezone.localdate()
+is pinned to it, so the dashboard and the monthly summary read a full
+month and its history whatever day the bench runs.
+"""
+import asyncio
+import contextlib
+import gc
+import math
+import platform
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import django
+from django.conf import settings
+from django.db import connection, connections
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .caching import invalidate_user
+from .models import Transaction, Wallet
+from .pagination import DEFAULT_ORDERING, encode_cursor
+from .seeding import SEED_END
+
+
+# Must be in ALLOWED_HOSTS
+HOST = "localhost"
+DEEP_PAGE_OFFSET = 1000
+
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile of a non-empty list.
+    """
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def _deep_cursor(user):
+    qs = Transaction.objects.for_user(user).order_by(*DEFAULT_ORDERING)
+    total = qs.count()
+    if not total:
+        return None
+    row = qs.values_list("date", "created_at", "id")[min(DEEP_PAGE_OFFSET, total - 1)]
+    return encode_cursor(row)
+
+
+@contextlib.contextmanager
+def pinned_today(day):
+    """
+    Makes timezone.localdate() (without arguments) return `day`.
+    """
+    localdate = timezone.localdate
+
+    def pinned(value=None, timezone=None):
+        return day if value is None else localdate(value, timezone)
+
+    with mock.patch.object(timezone, "localdate", pinned):
+        yield
+
+
+def scenarios(user, today=SEED_END):
+    """
+    (name, url) pairs for `user`.
+    """
+    wallet = Wallet.objects.filter(owner=user).order_by("pk").first()
+    deep = _deep_cursor(user)
+    month = today.replace(day=1)
+    transaction_list = reverse("transaction_list")
+
+    pairs = [
+        ("dashboard", reverse("dashboard")),
+        ("transaction_list", transaction_list),
+        ("transaction_list_search", f"{transaction_list}?search=lunch"),
+        ("transaction_export_csv", reverse("transaction_export")),
+        ("api_transactions", reverse("transaction-list")),
+        ("api_wallet_balance", reverse("wallet-balance", args=[wallet.pk])),
+        ("api_monthly_summary", f"{reverse('monthly_summary')}?month={month}"),
+    ]
+    if deep:
+        pairs.insert(2, ("transaction_list_deep", f"{transaction_list}?cursor={deep}"))
+        pairs.insert(4, ("transaction_list_deep_search", f"{transaction_list}?search=lunch&cursor={deep}"))
+    return pairs
+
+
+def _fetch(client, url):
+    response = client.get(url)
+    if getattr(response, "streaming", False):
+        b"".join(response.streaming_content)
+    else:
+        response.content
+    return response.status_code
+
+
+def run_scenario(client, user, url, repeat=20, warmup=2, cold=False):
+    """
+    Times `repeat` requests after `warmup` untimed ones. With cold=True the
+    user's cache is invalidated before every request.
+    """
+    for _ in range(warmup):
+        _fetch(client, url)
+
+    timings, query_counts, statuses = [], [], set()
+    for _ in range(repeat):
+        if cold:
+            invalidate_user(user)
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            statuses.add(_fetch(client, url))
+            timings.append((time.perf_counter() - start) * 1000)
+        query_counts.append(len(ctx.captured_queries))
+
+    # Memory is measured on a separate request: tracemalloc slows everything down
+    if cold:
+        invalidate_user(user)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        _fetch(client, url)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "url": url,
+        "status": sorted(statuses),
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "min_ms": round(min(timings), 3),
+        "max_ms": round(max(timings), 3),
+        "queries": max(query_counts),
+        "peak_memory_kib": round(peak / 1024, 1),
+    }
+
+
+def run_benchmarks(users, repeat=20, warmup=2, cold=False, only=None, today=SEED_END):
+    """
+    Runs every scenario for every user, on `today`, and returns the
+    JSON-ready report.
+    """
+    report = {
+        "meta": {
+            "timestamp": timezone.now().isoformat(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "repeat": repeat,
+            "warmup": warmup,
+            "cold_cache": cold,
+            "today": today.isoformat(),
+            "users": [u.username for u in users],
+        },
+        "results": {},
+    }
+
+    for user in users:
+        client = Client(HTTP_HOST=HOST)
+        client.force_login(user)
+        rows = Transaction.objects.filter(owner=user).count()
+        for name, url in scenarios(user, today):
+            if only and name not in only:
+                continue
+            with pinned_today(today):
+                result = run_scenario(client, user, url, repeat=repeat, warmup=warmup, cold=cold)
+            result["transactions"] = rows
+            report["results"].setdefault(name, []).append(result)
+    return report
+
+
+def compare(baseline, current, metrics=("p50_ms", "p95_ms", "queries", "peak_memory_kib")):
+    """
+    {scenario: {metric: (baseline, current, pct_change)}} for scenarios in
+    both reports, using the first user's numbers.
+    """
+    diff = {}
+    for name, results in current["results"].items():
+        if name not in baseline.get("results", {}):
+            continue
+        old, new = baseline["results"][name][0], results[0]
+        diff[name] = {
+            metric: (
+                old[metric], new[metric],
+                round((new[metric] - old[metric]) / old[metric] * 100, 1) if old[metric] else None,
+            )
+            for metric in metrics
+        }
+    return diff
+
+
+def _cold_batches(user, repeat, concurrency, fetch_batch):
+    timings = []
+    for _ in range(repeat):
+        invalidate_user(user)
+        timings.extend(fetch_batch(concurrency))
+    return {
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+        "min_ms": round(min(timings), 3),
+        "max_ms": round(max(timings), 3),
+        "requests": len(timings),
+    }
+
+
+def _timed(fetch):
+    start = time.perf_counter()
+    status = fetch()
+    elapsed = (time.perf_counter() - start) * 1000
+    if status != 200:
+        raise RuntimeError(f"Dashboard returned {status}")
+    return elapsed
+
+
+def run_handler_comparison(user, repeat=20, concurrency=4, today=SEED_END):
+    """
+    Cold-cache dashboard latency through the WSGI handler (Client,
+    DashboardView) and the ASGI handler (AsyncClient, AsyncDashboardView),
+    `concurrency` requests at a time, on `today`. Needs a database that
+    several connections can read at once (not SQLite in memory).
+    """
+    with pinned_today(today):
+        return _handler_comparison(user, repeat, concurrency)
+
+
+def _handler_comparison(user, repeat, concurrency):
+    sync_url, async_url = reverse("dashboard"), reverse("dashboard_async")
+
+    clients = []
+    for _ in range(concurrency):
+        client = Client(HTTP_HOST=HOST)
+        client.force_login(user)
+        clients.append(client)
+
+    def wsgi_batch(n):
+        def one(client):
+            try:
+                return _timed(lambda: _fetch(client, sync_url))
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=n) as pool:
+            return list(pool.map(one, clients[:n]))
+
+    # AsyncClient always sends Host: testserver
+    async_client = AsyncClient()
+    async_client.force_login(user)
+
+    async def one_async():
+        start = time.perf_counter()
+        response = await async_client.get(async_url)
+        if response.status_code != 200:
+            raise RuntimeError(f"Async dashboard returned {response.status_code}")
+        return (time.perf_counter() - start) * 1000
+
+    def asgi_batch(n):
+        async def gather():
+            return await asyncio.gather(*(one_async() for _ in range(n)))
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            return asyncio.run(gather())
+
+    return {
+        "concurrency": concurrency,
+        "wsgi": {
+            "single": _cold_batches(user, repeat, 1, wsgi_batch),
+            "concurrent": _cold_batches(user, repeat, concurrency, wsgi_batch),
+        },
+        "asgi": {
+            "single": _cold_batches(user, repeat, 1, asgi_batch),
+            "concurrent": _cold_batches(user, repeat, concurrency, asgi_batch),
+        },
+    }
@@ -0,0 +1,129 @@
+"""
+Set-based budget evaluation across users.
+
+evaluate_budgets() computes spend against the limit for every Budget in a
+range of months. Each chunk is a single grouped query: budgets are LEFT
+JOINed to the expense rollups of their own category and month, on
+category_id, and summed per budget. Chunks are read in primary-key order
+(keyset, not OFFSET), so the cost is per budget rather than per user and
+memory stays flat.
+
+Spend is the month's full rollup total, so future-dated entries inside the
+month count. The dashboard panels stop at today.
+
+record_alerts() turns evaluated chunks into OverspendAlert rows (see the
+evaluate_budgets management command).
+"""
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, F, FilteredRelation, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import Budget, OverspendAlert, Transaction
+from .rollups import month_of
+
+
+ZERO = Decimal("0")
+CHUNK_SIZE = 2000
+
+
+@dataclass
+class BudgetStatus:
+    budget_id: int
+    owner_id: int
+    category_id: int
+    category: str
+    month: date
+    limit: Decimal
+    spent: Decimal
+
+    @property
+    def over(self):
+        return max(self.spent - self.limit, ZERO)
+
+    @property
+    def is_exceeded(self):
+        return self.spent > self.limit
+
+    def reached(self, threshold=100):
+        """
+        Whether spend went past `threshold` percent of the limit.
+        """
+        return self.spent * 100 > self.limit * threshold
+
+
+def budget_spend(first_month, last_month=None, owner=None):
+    """
+    Budgets of the months in [first_month, last_month] as
+    (id, owner_id, category_id, category name, month, limit, spent) rows,
+    grouped per budget, in id order. Filter or slice it further as needed.
+    """
+    budgets = Budget.objects.filter(month__gte=month_of(first_month), month__lte=month_of(last_month or first_month))
+    if owner is not None:
+        budgets = budgets.filter(owner=owner)
+
+    return (
+        budgets.annotate(
+            expense_rollup=FilteredRelation(
+                "category__monthly_rollups",
+                condition=Q(
+                    category__monthly_rollups__month=F("month"),
+                    category__monthly_rollups__t_type=Transaction.EXPENSE,
+                ),
+            )
+        )
+        .values("id")
+        .annotate(spent=Coalesce(
+            Sum("expense_rollup__total"), Value(ZERO), output_field=DecimalField(max_digits=14, decimal_places=2),
+        ))
+        .order_by("id")
+        .values_list("id", "owner_id", "category_id", "category__name", "month", "limit_amount", "spent")
+    )
+
+
+def evaluate_budgets(first_month, last_month=None, owner=None, chunk_size=CHUNK_SIZE):
+    """
+    Yields lists of up to `chunk_size` BudgetStatus, one query per chunk.
+    """
+    rows = budget_spend(first_month, last_month, owner)
+    last_id = 0
+    while True:
+        chunk = [BudgetStatus(*row) for row in rows.filter(id__gt=last_id)[:chunk_size]]
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1].budget_id
+
+
+def record_alerts(chunks, threshold=100):
+    """
+    Writes an OverspendAlert for every evaluated budget whose spend reached
+    `threshold` percent of its limit, and drops the alerts of evaluated
+    budgets that no longer do (after a refund, a raised limit, ...).
+    Existing alerts are refreshed in place. Returns (evaluated, alerted).
+    """
+    evaluated = alerted = 0
+    for chunk in chunks:
+        over = [status for status in chunk if status.reached(threshold)]
+        with transaction.atomic():
+            OverspendAlert.objects.bulk_create(
+                [
+                    OverspendAlert(
+                        owner_id=status.owner_id, budget_id=status.budget_id, month=status.month,
+                        limit_amount=status.limit, spent=status.spent,
+                    )
+                    for status in over
+                ],
+                update_conflicts=True,
+                unique_fields=["budget"],
+                update_fields=["limit_amount", "spent", "updated_at"],
+            )
+            OverspendAlert.objects.filter(
+                budget_id__in=[status.budget_id for status in chunk if not status.reached(threshold)]
+            ).delete()
+        evaluated += len(chunk)
+        alerted += len(over)
+    return evaluated, alerted
@@ -0,0 +1,265 @@
+"""
+Per-user versioned cache for analytics results.
+
+Every cache key embeds the user's current data version. Writes to any of the
+user's transactions, budgets, categories or wallets bump that version (see
+signals.py), which makes all of the user's cached results unreachable at once
+without having to know which keys exist. Old entries simply age out through
+the backend's own eviction.
+
+Versions live in the cache too, so the backend must be shared by every
+worker (the file cache by default, redis across hosts; see settings.CACHES):
+with a per-process cache a write only bumps the version of the worker that
+handled it.
+
+A bump writes a fresh random version instead of incrementing the old one.
+The file cache's incr() is a read-modify-write on the file, so two workers
+bumping at once could both write v+1 and one invalidation would be lost;
+with set() the last write wins, and whichever it is, it is a version no
+reader could have cached under before the bump.
+
+The file cache does not evict LRU: past MAX_ENTRIES it culls a random third
+of its files, hot or not (a culled version key just reads as a new version,
+i.e. a miss). Where that hurts the hit rate, use redis with an LRU
+maxmemory-policy.
+
+The same version backs the ETags of conditional_for_user, so a client
+revalidating an unchanged API read gets a 304 without a query. Only on a
+shared backend, though: a per-process one would keep answering 304 in the
+workers that missed a write, so conditional GETs are then switched off.
+"""
+import hashlib
+import threading
+import time
+import uuid
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+from . import metrics
+
+
+VERSION_KEY = "tracker:v:{user_id}"
+RESULT_KEY = "tracker:{namespace}:{user_id}:{version}:{digest}"
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def get_cache():
+    return caches[getattr(settings, "TRACKER_CACHE_ALIAS", "default")]
+
+
+def _timeout():
+    return getattr(settings, "TRACKER_CACHE_TIMEOUT", 60 * 60)
+
+
+def _user_id(user):
+    return getattr(user, "pk", user)
+
+
+def _new_version():
+    return f"{time.time_ns():x}-{uuid.uuid4().hex[:8]}"
+
+
+def data_version(user):
+    """
+    Current data version for a user. Versions are never reused (see
+    _new_version), so an evicted version key cannot come back as a version
+    that was used before.
+    """
+    cache = get_cache()
+    key = VERSION_KEY.format(user_id=_user_id(user))
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(user):
+    get_cache().set(VERSION_KEY.format(user_id=_user_id(user)), _new_version(), timeout=None)
+
+
+def invalidate_user(user):
+    """
+    Bumps the user's version now and again once the surrounding DB transaction
+    commits, so a reader racing the write cannot cache pre-commit data under
+    the new version.
+    """
+    user_id = _user_id(user)
+    bump_version(user_id)
+    transaction.on_commit(lambda: bump_version(user_id))
+
+
+def _key_part(value):
+    if hasattr(value, "_meta") and hasattr(value, "pk"):
+        return f"{value._meta.label_lower}:{value.pk}"
+    return repr(value)
+
+
+def make_key(namespace, user, *parts):
+    raw = "|".join(_key_part(p) for p in parts)
+    digest = hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+    return RESULT_KEY.format(
+        namespace=namespace, user_id=_user_id(user), version=data_version(user), digest=digest
+    )
+
+
+def _record(namespace, hit):
+    with _stats_lock:
+        _stats["hits" if hit else "misses"] += 1
+    metrics.inc("tracker_cache_requests_total", namespace=namespace, result="hit" if hit else "miss")
+
+
+def get_or_compute(namespace, user, parts, compute):
+    """
+    Returns the cached result for (namespace, user, parts) or computes and stores it.
+    """
+    cache = get_cache()
+    key = make_key(namespace, user, *parts)
+
+    sentinel = object()
+    value = cache.get(key, sentinel)
+    if value is not sentinel:
+        _record(namespace, hit=True)
+        return value
+
+    _record(namespace, hit=False)
+    value = compute()
+    cache.set(key, value, timeout=_timeout())
+    return value
+
+
+async def aget_or_compute(namespace, user, parts, acompute):
+    """
+    get_or_compute() for async callers; `acompute()` returns an awaitable.
+    """
+    cache = get_cache()
+    key = await sync_to_async(make_key)(namespace, user, *parts)
+
+    sentinel = object()
+    value = await cache.aget(key, sentinel)
+    if value is not sentinel:
+        _record(namespace, hit=True)
+        return value
+
+    _record(namespace, hit=False)
+    value = await acompute()
+    await cache.aset(key, value, timeout=_timeout())
+    return value
+
+
+def cached_for_user(namespace):
+    """
+    Decorator for service functions shaped like fn(user, *args, **kwargs).
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(user, *args, **kwargs):
+            parts = args + tuple(part for item in sorted(kwargs.items()) for part in item)
+            return get_or_compute(namespace, user, parts, lambda: func(user, *args, **kwargs))
+
+        wrapper.uncached = func
+        return wrapper
+
+    return decorator
+
+
+# ----------------------------
+# Conditional GET
+# ----------------------------
+
+def user_etag(request, *parts):
+    """
+    Strong ETag for what `request` returns given the user's current data
+    version: the same path, Accept header and data give the same tag.
+    Costs one cache read and no queries.
+    """
+    user = request.user
+    raw = "|".join([
+        str(user.pk), str(data_version(user)), str(timezone.localdate()),
+        request.get_full_path(), request.META.get("HTTP_ACCEPT", ""), *map(str, parts),
+    ])
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def is_shared(cache):
+    """
+    Whether every worker sees the same entries in `cache`, so a version bump
+    in one is seen by all. Conditional GETs need this.
+    """
+    return not isinstance(cache, (LocMemCache, DummyCache))
+
+
+def _request_etag(request):
+    # Flash messages are shown once, so such a page must be re-rendered
+    if not request.user.is_authenticated or get_messages(request) or not is_shared(get_cache()):
+        return None
+    return quote_etag(user_etag(request))
+
+
+def _tag_response(request, response, etag):
+    if etag and request.method in ("GET", "HEAD") and response.status_code in (200, 304):
+        response.headers.setdefault("ETag", etag)
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_for_user(view_func):
+    """
+    Decorator for GET handlers, sync or async (use method_decorator on
+    views): answers a matching If-None-Match with 304 before the handler
+    runs, and tags and marks 200s private / revalidate-every-time.
+
+    For API reads only: the tag does not cover the session or the CSRF
+    token, which HTML pages embed in their forms.
+    """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            etag = await sync_to_async(_request_etag)(request)
+            response = get_conditional_response(request, etag=etag) if etag else None
+            if response is None:
+                response = await view_func(request, *args, **kwargs)
+            return _tag_response(request, response, etag)
+
+        return async_wrapper
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        etag = _request_etag(request)
+        response = get_conditional_response(request, etag=etag) if etag else None
+        if response is None:
+            response = view_func(request, *args, **kwargs)
+        return _tag_response(request, response, etag)
+
+    return wrapper
+
+
+def cache_stats():
+    """
+    Hit/miss counters for this process.
+    """
+    with _stats_lock:
+        hits, misses = _stats["hits"], _stats["misses"]
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / total, 4) if total else 0.0,
+    }
+
+
+def reset_cache_stats():
+    with _stats_lock:
+        _stats["hits"] = _stats["misses"] = 0
@@ -0,0 +1,346 @@
+"""
+DashboardSnapshot: every dashboard panel computed from one grouped rollup read.
+
+The same grouped rows feed the monthly totals, the category breakdown, the
+budget alerts and the 6-month history, so a snapshot costs a fixed number of
+queries no matter how many panels or transactions there are. Under ASGI,
+abuild() runs those queries concurrently.
+
+The dashboard page itself only renders a DashboardShell (totals and recent
+transactions) and loads the other panels from the snapshot API. An open page
+then follows a DashboardFeed over server-sent events (Tracker/live.py).
+"""
+import asyncio
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+
+from .caching import aget_or_compute, get_or_compute
+from .models import Budget, Transaction
+from .rollups import month_of, rollup_totals
+from .services import concurrent, get_month_window
+from .sync import changes_since, cursor_at, settle_horizon
+
+
+ZERO = Decimal("0")
+CENTS = Decimal("0.01")
+
+
+@dataclass
+class BreakdownItem:
+    category_id: int | None
+    category: str | None
+    total: Decimal
+
+
+@dataclass
+class BudgetAlert:
+    category_id: int
+    category: str
+    limit: Decimal
+    spent: Decimal
+    over: Decimal
+    is_exceeded: bool
+
+
+@dataclass
+class HistoryPoint:
+    month: date
+    t_type: str
+    total: Decimal
+
+
+@dataclass
+class RecentTransaction:
+    id: int
+    date: date
+    wallet: str
+    t_type: str
+    amount: Decimal
+    category: str | None
+
+
+@dataclass
+class DashboardSnapshot:
+    month_start: date
+    month_end: date
+    income: Decimal = ZERO
+    expense: Decimal = ZERO
+    breakdown: list[BreakdownItem] = field(default_factory=list)
+    budget_alerts: list[BudgetAlert] = field(default_factory=list)
+    history: list[HistoryPoint] = field(default_factory=list)
+    recent_transactions: list[RecentTransaction] = field(default_factory=list)
+
+    HISTORY_DAYS = 180
+    RECENT_LIMIT = 8
+
+    @property
+    def net(self):
+        return self.income - self.expense
+
+    @classmethod
+    def history_start(cls, month_start):
+        return month_of(month_start - timedelta(days=cls.HISTORY_DAYS))
+
+    @classmethod
+    def for_user(cls, user, today):
+        """
+        Cached build(); invalidated whenever the user's data version changes.
+        """
+        return get_or_compute("dashboard", user, (today,), lambda: cls.build(user, today))
+
+    @classmethod
+    async def afor_user(cls, user, today):
+        """
+        Async for_user(), building with abuild() on a miss.
+        """
+        return await aget_or_compute("dashboard", user, (today,), lambda: cls.abuild(user, today))
+
+    @classmethod
+    def build(cls, user, today):
+        month_start, month_end = get_month_window(today)
+        return cls.assemble(
+            month_start,
+            month_end,
+            cls.fetch_rollups(user, month_start, month_end),
+            cls.fetch_budgets(user, month_start),
+            cls.fetch_recent(user, month_start, month_end),
+        )
+
+    @classmethod
+    async def abuild(cls, user, today):
+        """
+        build() with the three panel queries running at the same time, each
+        on its own connection: a cold snapshot takes about as long as the
+        slowest of them instead of their sum.
+        """
+        month_start, month_end = get_month_window(today)
+        rows, budgets, recent = await asyncio.gather(
+            concurrent(cls.fetch_rollups)(user, month_start, month_end),
+            concurrent(cls.fetch_budgets)(user, month_start),
+            concurrent(cls.fetch_recent)(user, month_start, month_end),
+        )
+        return cls.assemble(month_start, month_end, rows, budgets, recent)
+
+    # Panel queries. Each returns evaluated rows so it can run in any thread.
+
+    @classmethod
+    def fetch_rollups(cls, user, month_start, month_end):
+        # One grouped read shared by every analytic panel
+        return rollup_totals(
+            user,
+            cls.history_start(month_start),
+            month_end,
+            group_by=["month", "t_type", "category_id", "category__name"],
+        )
+
+    @classmethod
+    def fetch_budgets(cls, user, month_start):
+        return list(Budget.objects.filter(owner=user, month=month_start).select_related("category"))
+
+    @classmethod
+    def fetch_recent(cls, user, month_start, month_end):
+        return list(
+            Transaction.objects.for_user(user)
+            .filter(date__gte=month_start, date__lte=month_end)
+            .values_list("id", "date", "wallet__name", "t_type", "amount", "category__name")
+            [:cls.RECENT_LIMIT]
+        )
+
+    @classmethod
+    def assemble(cls, month_start, month_end, rows, budgets, recent):
+        snapshot = cls(month_start=month_start, month_end=month_end)
+
+        history = {}
+        spent_by_category = {}
+        for row in rows:
+            key = (row["month"], row["t_type"])
+            history[key] = history.get(key, ZERO) + row["total"]
+
+            if row["month"] != month_start:
+                continue
+
+            if row["t_type"] == Transaction.INCOME:
+                snapshot.income += row["total"]
+            else:
+                snapshot.expense += row["total"]
+                spent_by_category[row["category_id"]] = (row["category__name"], row["total"])
+
+        snapshot.history = [HistoryPoint(m, t, total) for (m, t), total in sorted(history.items())]
+
+        snapshot.breakdown = sorted(
+            (BreakdownItem(cid, name, total) for cid, (name, total) in spent_by_category.items()),
+            key=lambda item: item.total,
+            reverse=True,
+        )
+
+        for b in budgets:
+            spent = spent_by_category.get(b.category_id, (None, ZERO))[1]
+            over = spent - b.limit_amount
+            snapshot.budget_alerts.append(BudgetAlert(
+                category_id=b.category_id,
+                category=b.category.name,
+                limit=b.limit_amount,
+                spent=spent,
+                over=over if over > 0 else ZERO,
+                is_exceeded=spent > b.limit_amount,
+            ))
+
+        snapshot.recent_transactions = [RecentTransaction(*row) for row in recent]
+
+        return snapshot
+
+    def as_dict(self):
+        """
+        JSON-ready representation: money as strings (like the REST serializers),
+        dates as ISO strings.
+        """
+        return _json_ready(asdict(self) | {"net": self.net})
+
+
+@dataclass
+class DashboardShell:
+    """
+    What the dashboard page renders server-side: this month's totals and the
+    latest transactions. The breakdown, budget and history panels are
+    fetched by the page from the snapshot API, so the first byte does not
+    wait for the history aggregation.
+    """
+    month_start: date
+    month_end: date
+    income: Decimal = ZERO
+    expense: Decimal = ZERO
+    recent_transactions: list[RecentTransaction] = field(default_factory=list)
+
+    @property
+    def net(self):
+        return self.income - self.expense
+
+    @classmethod
+    def for_user(cls, user, today):
+        return get_or_compute("dashboard_shell", user, (today,), lambda: cls.build(user, today))
+
+    @classmethod
+    async def afor_user(cls, user, today):
+        return await aget_or_compute("dashboard_shell", user, (today,), lambda: cls.abuild(user, today))
+
+    @classmethod
+    def build(cls, user, today):
+        month_start, month_end = get_month_window(today)
+        return cls.assemble(
+            month_start,
+            month_end,
+            cls.fetch_totals(user, month_start, month_end),
+            DashboardSnapshot.fetch_recent(user, month_start, month_end),
+        )
+
+    @classmethod
+    async def abuild(cls, user, today):
+        month_start, month_end = get_month_window(today)
+        totals, recent = await asyncio.gather(
+            concurrent(cls.fetch_totals)(user, month_start, month_end),
+            concurrent(DashboardSnapshot.fetch_recent)(user, month_start, month_end),
+        )
+        return cls.assemble(month_start, month_end, totals, recent)
+
+    @classmethod
+    def fetch_totals(cls, user, month_start, month_end):
+        return rollup_totals(user, month_start, month_end, group_by=["t_type"])
+
+    @classmethod
+    def assemble(cls, month_start, month_end, totals, recent):
+        shell = cls(month_start=month_start, month_end=month_end)
+        for row in totals:
+            if row["t_type"] == Transaction.INCOME:
+                shell.income += row["total"]
+            else:
+                shell.expense += row["total"]
+        shell.recent_transactions = [RecentTransaction(*row) for row in recent]
+        return shell
+
+
+class DashboardFeed:
+    """
+    What one live dashboard has been sent, and what changed since. poll()
+    returns the events for Tracker.live.stream():
+
+        totals         income, expense, net and recent_transactions, when they change
+        transactions   {"changed": [...], "deleted": [...]} rows from the sync feed
+        wallets        wallets whose running balances changed (sync feed rows)
+        budget         a BudgetAlert whose is_exceeded flipped (or a new one already over)
+
+    Totals and budgets come from the cached DashboardSnapshot, which the
+    page's own panel refresh reads too.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        # Rows before the stream opened are already on the page
+        self.cursor = cursor_at(settle_horizon())
+        self.totals = None
+        self.exceeded = None
+
+    def poll(self, changed_at=None):
+        snapshot = DashboardSnapshot.for_user(self.user, timezone.localdate())
+        events = []
+
+        totals = _json_ready({
+            "month_start": snapshot.month_start,
+            "income": snapshot.income,
+            "expense": snapshot.expense,
+            "net": snapshot.net,
+            "recent_transactions": [asdict(t) for t in snapshot.recent_transactions],
+        })
+        if totals != self.totals:
+            events.append(("totals", totals))
+            self.totals = totals
+
+        exceeded = {alert.category_id: alert for alert in snapshot.budget_alerts}
+        if self.exceeded is not None:
+            events += [
+                ("budget", _json_ready(asdict(alert)))
+                for category_id, alert in exceeded.items()
+                if self.exceeded.get(category_id, False) != alert.is_exceeded
+            ]
+        self.exceeded = {category_id: alert.is_exceeded for category_id, alert in exceeded.items()}
+
+        if changed_at is not None:
+            transactions, wallets = {"changed": [], "deleted": []}, []
+            while True:
+                page = changes_since(self.user, self.cursor)
+                self.cursor = page["cursor"]
+                transactions["changed"] += page["transactions"]["changed"]
+                transactions["deleted"] += page["transactions"]["deleted"]
+                wallets += page["wallets"]["changed"]
+                if not page["has_more"]:
+                    break
+            if transactions["changed"] or transactions["deleted"]:
+                events.append(("transactions", transactions))
+            if wallets:
+                events.append(("wallets", wallets))
+        return events
+
+    async def apoll(self, changed_at=None):
+        """
+        poll() on a worker connection, once the sync feed's settle window
+        has passed the write at `changed_at` (so its rows are included).
+        """
+        if changed_at is not None:
+            delay = (changed_at - settle_horizon()).total_seconds()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        return await concurrent(self.poll)(changed_at)
+
+
+def _json_ready(value):
+    if isinstance(value, dict):
+        return {k: _json_ready(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_json_ready(v) for v in value]
+    if isinstance(value, Decimal):
+        return str(value.quantize(CENTS))
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
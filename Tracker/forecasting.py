@@ -0,0 +1,235 @@
+"""
+Spending forecast: projected end-of-month spend per category, and the day
+each budget is expected to be exceeded.
+
+The input is a dense (category x day) matrix of daily expense totals for
+the current month and the HISTORY_MONTHS before it, filled from one grouped
+(owner, category, date) query. Everything after that works on whole rows;
+nothing is queried per category or per user.
+
+For each category:
+
+- seasonality: the average share of a prior month's spend that had been
+  spent by each day of the month (day positions scaled to the month
+  length). Linear when there is no history.
+- projected: spend to date divided by the usual share by today (the pace),
+  blended with the prior months' average total. The pace's weight grows
+  from 0 to 1 over the month. Never below the spend to date.
+- exceeds_on: the first day the cumulative spend passes the budget limit,
+  actual for past days, projected along the seasonal curve for the rest.
+
+forecast_for_user() backs the dashboard panel and the API; forecast()
+without an owner does every user in one pass, for the hourly
+forecast_spending command.
+
+Rows are stdlib array("d") vectors (numpy is not a dependency); money is
+handled as float inside the projection only. The spend to date comes from
+an exact Decimal sum in the same query, so it matches the dashboard totals
+to the cent; the projection is returned as Decimal cents.
+"""
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from functools import lru_cache
+from itertools import accumulate
+
+from django.db.models import FloatField, Q, Sum
+from django.db.models.functions import Cast
+
+from .caching import cached_for_user
+from .models import Budget, Transaction
+from .rollups import month_end, month_of
+
+
+HISTORY_MONTHS = 3
+DAYS = 31
+CENTS = Decimal("0.01")
+
+
+@dataclass
+class CategoryForecast:
+    owner_id: int
+    category_id: int | None
+    category: str | None
+    spent: Decimal
+    projected: Decimal
+    limit: Decimal | None = None
+    exceeds_on: date | None = None
+
+    def as_dict(self):
+        money = lambda value: None if value is None else str(value)
+        return {
+            "category_id": self.category_id,
+            "category": self.category,
+            "spent": money(self.spent),
+            "projected": money(self.projected),
+            "limit": money(self.limit),
+            "exceeds_on": self.exceeds_on.isoformat() if self.exceeds_on else None,
+        }
+
+
+def _history_start(month_start):
+    first = month_start
+    for _ in range(HISTORY_MONTHS):
+        first = month_of(first - timedelta(days=1))
+    return first
+
+
+def daily_spend(today, owner=None):
+    """
+    One grouped read of daily expense totals from the start of the history
+    to today, as ({(owner_id, category_id): {month: array of DAYS totals}},
+    {(owner_id, category_id): category name},
+    {(owner_id, category_id): exact Decimal spend this month}).
+    """
+    month_start = month_of(today)
+    rows = Transaction.objects.active().expenses().filter(
+        date__gte=_history_start(month_start), date__lte=today,
+    )
+    if owner is not None:
+        rows = rows.filter(owner=owner)
+
+    rows = (
+        rows.values("owner_id", "category_id", "category__name", "date")
+        # A float total skips building a Decimal for every (category, day);
+        # only this month's days also carry the exact one
+        .annotate(
+            total=Cast(Sum("amount"), FloatField()),
+            exact=Sum("amount", filter=Q(date__gte=month_start)),
+        )
+        .order_by()
+        .values_list("owner_id", "category_id", "category__name", "date", "total", "exact")
+    )
+
+    matrix, names, spent, months = defaultdict(dict), {}, defaultdict(Decimal), {}
+    for owner_id, category_id, name, day, total, exact in rows:
+        key = (owner_id, category_id)
+        names[key] = name
+        if exact is not None:
+            spent[key] += exact
+        month_key = (day.year, day.month)
+        month = months.get(month_key)
+        if month is None:
+            month = months[month_key] = month_of(day)
+        row = matrix[key].get(month)
+        if row is None:
+            row = matrix[key][month] = array("d", bytes(8 * DAYS))
+        row[day.day - 1] += total
+    return matrix, names, spent
+
+
+@lru_cache(maxsize=None)
+def _positions(length, days):
+    # Day t of a `days`-long month sits at this index of a `length`-long one
+    return tuple(min(length, round((t + 1) * length / days)) - 1 for t in range(days))
+
+
+def seasonal_share(history, days):
+    """
+    Share of a month's spend usually spent by the end of each day 1..days.
+    `history` is [(daily row, month length)] of months with some spend.
+    """
+    if not history:
+        return array("d", ((t + 1) / days for t in range(days)))
+
+    curves = []
+    for row, length in history:
+        cumulative = list(accumulate(row[:length]))
+        scale = 1 / (cumulative[-1] * len(history))
+        curves.append([cumulative[i] * scale for i in _positions(length, days)])
+    return array("d", map(sum, zip(*curves)))
+
+
+def project(current, prior, today, limit=None):
+    """
+    (spent, projected, exceeds_on) for one category. `current` is this
+    month's daily row, `prior` the [(daily row, month length)] before it.
+    """
+    month_start = month_of(today)
+    days, elapsed = month_end(month_start).day, today.day
+
+    cumulative = list(accumulate(current[:elapsed]))
+    spent = cumulative[-1]
+    totals = [sum(row[:length]) for row, length in prior]
+    share = seasonal_share([month for month, total in zip(prior, totals) if total > 0], days)
+    share_by_today = share[elapsed - 1]
+
+    if not any(totals):
+        projected = spent / share_by_today
+    else:
+        average = sum(totals) / len(totals)
+        pace = spent / share_by_today if share_by_today > 0 else average
+        weight = elapsed / days
+        projected = weight * pace + (1 - weight) * average
+    projected = max(projected, spent)
+
+    exceeds_on = None
+    if limit is not None:
+        limit = float(limit)
+        crossed = next((t for t, total in enumerate(cumulative) if total > limit), None)
+        if crossed is None and projected > limit:
+            remaining, rest = projected - spent, 1 - share_by_today
+            for t in range(elapsed, days):
+                if rest > 0:
+                    fraction = (share[t] - share_by_today) / rest
+                else:
+                    fraction = (t + 1 - elapsed) / (days - elapsed)
+                if spent + remaining * fraction > limit:
+                    crossed = t
+                    break
+        if crossed is not None:
+            exceeds_on = month_start + timedelta(days=crossed)
+
+    return spent, projected, exceeds_on
+
+
+def _money(value):
+    return Decimal(value).quantize(CENTS)
+
+
+def forecast(today, owner=None):
+    """
+    CategoryForecast for every category with spend in the history window or
+    a budget this month, largest projection first. Two queries in all.
+    """
+    month_start = month_of(today)
+    matrix, names, exact = daily_spend(today, owner)
+
+    budgets = Budget.objects.filter(month=month_start)
+    if owner is not None:
+        budgets = budgets.filter(owner=owner)
+    limits = {}
+    for owner_id, category_id, name, limit in budgets.values_list(
+        "owner_id", "category_id", "category__name", "limit_amount",
+    ):
+        limits[owner_id, category_id] = limit
+        names[owner_id, category_id] = name
+
+    prior_months = []
+    month = month_start
+    for _ in range(HISTORY_MONTHS):
+        month = month_of(month - timedelta(days=1))
+        prior_months.append((month, month_end(month).day))
+
+    empty = array("d", bytes(8 * DAYS))
+    results = []
+    for key, name in names.items():
+        rows = matrix.get(key, {})
+        prior = [(rows.get(month, empty), length) for month, length in prior_months]
+        limit = limits.get(key)
+        _, projected, exceeds_on = project(rows.get(month_start, empty), prior, today, limit)
+        spent = _money(exact.get(key, 0))
+        results.append(CategoryForecast(
+            owner_id=key[0], category_id=key[1], category=name,
+            spent=spent, projected=max(_money(projected), spent), limit=limit, exceeds_on=exceeds_on,
+        ))
+
+    results.sort(key=lambda f: (f.owner_id, -f.projected, f.category or ""))
+    return results
+
+
+@cached_for_user("forecast")
+def forecast_for_user(user, today):
+    return forecast(today, owner=user)
@@ -0,0 +1,228 @@
+"""
+Bulk transaction import from CSV or JSON Lines.
+
+Wallets and categories are resolved by name through a per-import lookup
+built with one query each, missing categories are created in one batch,
+and rows are inserted with bulk_create. Rollups, wallet balances and the
+analytics cache are then updated once for the whole import.
+"""
+import csv
+import io
+import json
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from .models import Category, Transaction, Wallet
+from .rollups import TxnState
+from .services import record_transaction_changes
+
+
+CSV = "csv"
+JSONL = "jsonl"
+FORMATS = (CSV, JSONL)
+
+# Accept our own export header as well as API field names
+FIELD_ALIASES = {
+    "type": "t_type",
+    "t_type": "t_type",
+    "date": "date",
+    "wallet": "wallet",
+    "amount": "amount",
+    "category": "category",
+    "note": "note",
+}
+
+TYPES = {Transaction.EXPENSE, Transaction.INCOME}
+MAX_AMOUNT_DIGITS = 12
+NOTE_MAX_LENGTH = Transaction._meta.get_field("note").max_length
+
+
+def guess_format(filename):
+    name = (filename or "").lower()
+    if name.endswith((".jsonl", ".ndjson", ".json")):
+        return JSONL
+    return CSV
+
+
+def read_rows(stream, fmt):
+    """
+    Yields dicts keyed by Transaction field names from a text stream.
+    JSON Lines rows that cannot be decoded are yielded as {"__error__": ...}.
+    """
+    if fmt == CSV:
+        for row in csv.DictReader(stream):
+            yield {
+                FIELD_ALIASES[k.strip().lower()]: (v or "").strip()
+                for k, v in row.items()
+                if k and k.strip().lower() in FIELD_ALIASES
+            }
+    elif fmt == JSONL:
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError as exc:
+                yield {"__error__": f"Invalid JSON: {exc}"}
+                continue
+            if not isinstance(data, dict):
+                yield {"__error__": "Each line must be a JSON object."}
+                continue
+            yield {
+                FIELD_ALIASES[k.lower()]: v
+                for k, v in data.items()
+                if k.lower() in FIELD_ALIASES
+            }
+    else:
+        raise ValueError(f"Unsupported format '{fmt}'. Use one of: {', '.join(FORMATS)}.")
+
+
+def text_stream(uploaded):
+    """
+    Wraps a binary upload/file in a text stream (UTF-8, BOM tolerant).
+    """
+    return io.TextIOWrapper(uploaded, encoding="utf-8-sig", newline="")
+
+
+class TransactionImporter:
+    """
+    Imports rows for one user. Valid rows are inserted; invalid rows are
+    reported as {"row": n, "errors": {field: message}} (1-based row numbers).
+    """
+
+    def __init__(self, user, batch_size=1000, create_categories=True, dry_run=False):
+        self.user = user
+        self.batch_size = batch_size
+        self.create_categories = create_categories
+        self.dry_run = dry_run
+
+        self.wallets = {
+            name.lower(): pk for pk, name in Wallet.objects.filter(owner=user).values_list("pk", "name")
+        }
+        self.categories = {
+            name.lower(): pk for pk, name in Category.objects.filter(owner=user).values_list("pk", "name")
+        }
+
+    # ----------------------------
+    # Validation
+    # ----------------------------
+
+    def clean_row(self, row):
+        """
+        Returns (values, errors). `values["category"]` is still a name; it
+        is resolved after missing categories have been created.
+        """
+        if "__error__" in row:
+            return None, {"row": row["__error__"]}
+
+        errors = {}
+        values = {}
+
+        raw_date = str(row.get("date") or "").strip()
+        try:
+            values["date"] = date.fromisoformat(raw_date)
+        except ValueError:
+            errors["date"] = "Enter a valid date (YYYY-MM-DD)."
+
+        raw_amount = str(row.get("amount") or "").strip()
+        try:
+            amount = Decimal(raw_amount)
+        except InvalidOperation:
+            amount = None
+        if amount is None or not amount.is_finite():
+            errors["amount"] = "Enter a valid number."
+        elif amount <= 0:
+            errors["amount"] = "Amount must be greater than 0."
+        elif amount.as_tuple().exponent < -2 or len(amount.quantize(Decimal("0.01")).as_tuple().digits) > MAX_AMOUNT_DIGITS:
+            errors["amount"] = "Use at most 12 digits with 2 decimal places."
+        else:
+            values["amount"] = amount.quantize(Decimal("0.01"))
+
+        t_type = str(row.get("t_type") or Transaction.EXPENSE).strip().upper()
+        if t_type not in TYPES:
+            errors["t_type"] = f"'{t_type}' is not a valid type."
+        values["t_type"] = t_type
+
+        wallet = str(row.get("wallet") or "").strip()
+        wallet_id = self.wallets.get(wallet.lower())
+        if wallet_id is None:
+            errors["wallet"] = f"Unknown wallet '{wallet}'." if wallet else "This field is required."
+        values["wallet_id"] = wallet_id
+
+        category = str(row.get("category") or "").strip()
+        if category and not self.create_categories and category.lower() not in self.categories:
+            errors["category"] = f"Unknown category '{category}'."
+        values["category"] = category
+
+        note = str(row.get("note") or "")
+        if len(note) > NOTE_MAX_LENGTH:
+            errors["note"] = f"Ensure this value has at most {NOTE_MAX_LENGTH} characters."
+        values["note"] = note
+
+        return values, errors
+
+    def ensure_categories(self, names):
+        """
+        Creates every missing category in one batch and refreshes the lookup.
+        """
+        missing = {}
+        for name in names:
+            if name and name.lower() not in self.categories:
+                missing.setdefault(name.lower(), name)
+        if not missing or self.dry_run:
+            return sorted(missing.values())
+
+        Category.objects.bulk_create(
+            [Category(owner=self.user, name=name) for name in missing.values()],
+            ignore_conflicts=True,
+        )
+        self.categories.update(
+            (name.lower(), pk)
+            for pk, name in Category.objects.filter(owner=self.user).values_list("pk", "name")
+        )
+        return sorted(missing.values())
+
+    # ----------------------------
+    # Import
+    # ----------------------------
+
+    def run(self, rows):
+        report = {"created": 0, "errors": [], "categories_created": []}
+
+        valid = []
+        for n, row in enumerate(rows, start=1):
+            values, errors = self.clean_row(row)
+            if errors:
+                report["errors"].append({"row": n, "errors": errors})
+            else:
+                valid.append(values)
+
+        with transaction.atomic():
+            report["categories_created"] = self.ensure_categories({v["category"] for v in valid})
+
+            objs = [
+                Transaction(
+                    owner=self.user,
+                    wallet_id=v["wallet_id"],
+                    category_id=self.categories.get(v["category"].lower()) if v["category"] else None,
+                    t_type=v["t_type"],
+                    amount=v["amount"],
+                    date=v["date"],
+                    note=v["note"],
+                )
+                for v in valid
+            ]
+
+            if not self.dry_run:
+                Transaction.objects.bulk_create(objs, batch_size=self.batch_size)
+                record_transaction_changes(
+                    (None, TxnState(self.user.pk, o.wallet_id, o.category_id, o.date, o.t_type, o.amount, False))
+                    for o in objs
+                )
+
+        report["created"] = 0 if self.dry_run else len(objs)
+        report["valid"] = len(objs)
+        return report
@@ -0,0 +1,153 @@
+"""
+Per-request query and latency instrumentation.
+
+QueryInstrumentationMiddleware wraps every request in a database execute
+wrapper, so it works with DEBUG off. It records latency, query count, SQL
+time and repeated statements (the same SQL text run more than once with
+different parameters is the usual N+1 signature), adds a Server-Timing
+header and checks the view's query budget.
+
+Views declare budgets as a class attribute:
+
+    class TransactionListView(...):
+        query_budget = 5
+
+A dict is keyed by viewset action, or by lower-case HTTP method for plain
+views; methods/actions missing from it have no budget unless there is a
+"default" entry:
+
+    query_budget = {"list": 3, "retrieve": 3}
+    query_budget = {"get": 4, "post": 20}
+
+Write paths whose query count grows with the data they touch (cascading
+deletes, bulk endpoints) are left out on purpose.
+
+Over budget, the middleware logs a warning, or raises QueryBudgetExceeded
+when settings.TRACKER_QUERY_BUDGET_STRICT is on (Tracker.test_runner).
+"""
+import logging
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = []  # (sql, duration in seconds)
+        self.started = time.perf_counter()
+        self.elapsed = None
+        self.view_name = None
+        self.budget = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+
+    @property
+    def query_count(self):
+        return len(self.queries)
+
+    @property
+    def sql_time(self):
+        return sum(duration for _, duration in self.queries)
+
+    def duplicates(self):
+        """
+        {sql: times run} for statements executed more than once.
+        """
+        counts = Counter(sql for sql, _ in self.queries)
+        return {sql: n for sql, n in counts.items() if n > 1}
+
+    @property
+    def over_budget(self):
+        return self.budget is not None and self.query_count > self.budget
+
+    def server_timing(self):
+        return (
+            f'app;dur={self.elapsed * 1000:.1f}, '
+            f'db;dur={self.sql_time * 1000:.1f};desc="{self.query_count} queries"'
+        )
+
+    def as_dict(self):
+        return {
+            "view": self.view_name,
+            "elapsed_ms": round(self.elapsed * 1000, 3),
+            "queries": self.query_count,
+            "sql_ms": round(self.sql_time * 1000, 3),
+            "duplicates": len(self.duplicates()),
+            "budget": self.budget,
+        }
+
+
+def view_budget(view_func, method):
+    """
+    (view name, budget) for a resolved view function.
+    """
+    view_class = getattr(view_func, "cls", None) or getattr(view_func, "view_class", None)
+    if view_class is None:
+        return getattr(view_func, "__qualname__", repr(view_func)), None
+
+    budget = getattr(view_class, "query_budget", None)
+    action = (getattr(view_func, "actions", None) or {}).get(method.lower())
+    if isinstance(budget, dict):
+        budget = budget.get(action or method.lower(), budget.get("default"))
+
+    name = view_class.__name__
+    return (f"{name}.{action}" if action else name), budget
+
+
+class QueryInstrumentationMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = request.query_stats = RequestStats()
+        with connections["default"].execute_wrapper(stats):
+            response = self.get_response(request)
+        stats.finish()
+
+        # Streaming bodies run their queries after this point; the header
+        # only covers what happened before the first byte.
+        response["Server-Timing"] = stats.server_timing()
+        self.report(request, stats)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        stats = getattr(request, "query_stats", None)
+        if stats is not None:
+            stats.view_name, stats.budget = view_budget(view_func, request.method)
+
+    def report(self, request, stats):
+        duplicates = stats.duplicates()
+        if duplicates:
+            worst_sql, worst = max(duplicates.items(), key=lambda item: item[1])
+            logger.info(
+                "%s %s: %d repeated statement(s); worst ran %d times: %s",
+                request.method, request.path, len(duplicates), worst, worst_sql[:200],
+            )
+
+        logger.debug("%s %s %s", request.method, request.path, stats.as_dict())
+
+        if stats.over_budget:
+            message = (
+                f"{stats.view_name} ran {stats.query_count} queries on {request.method} {request.path} "
+                f"(budget {stats.budget})."
+            )
+            if getattr(settings, "TRACKER_QUERY_BUDGET_STRICT", False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
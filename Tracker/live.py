@@ -0,0 +1,247 @@
+"""
+Live dashboard push: GET /dashboard/events/ (text/event-stream).
+
+A dashboard open on several devices keeps one server-sent events connection
+instead of polling the dashboard and the balances. Writes don't push any
+data themselves: once a write commits, publish(user_id) wakes that user's
+open streams and each stream asks its feed (dashboard.DashboardFeed) what
+changed, from the same cached reads the dashboard uses.
+
+Fan-out is in-process (Hub). With several workers set
+TRACKER_LIVE_BACKEND=db: publish() then also inserts a LiveNotification row,
+and one relay thread per worker polls that table for the other workers'
+rows every TRACKER_LIVE_POLL_SECONDS. The database sees one small query per
+worker per interval, however many dashboards are open.
+
+Streams are async generators, so they only work under ASGI
+(Expense/asgi.py); the view answers 204 under WSGI, which tells an
+EventSource to stop reconnecting.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+import weakref
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import metrics
+from .models import LiveNotification
+
+
+logger = logging.getLogger(__name__)
+
+# Identifies this process's rows in the notification table
+ORIGIN = uuid.uuid4().hex
+RETENTION = timedelta(minutes=1)
+PRUNE_EVERY = 60  # relay polls
+
+
+def _backend():
+    return getattr(settings, "TRACKER_LIVE_BACKEND", "local")
+
+
+class Subscription:
+    """
+    One open stream. wake() may be called from any thread.
+    """
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.event = asyncio.Event()
+        self.changed_at = None
+
+    def wake(self, moment):
+        def notify():
+            self.changed_at = max(self.changed_at or moment, moment)
+            self.event.set()
+        try:
+            self.loop.call_soon_threadsafe(notify)
+        except RuntimeError:
+            pass  # the loop is gone; the stream is closing anyway
+
+    async def wait(self, timeout):
+        """
+        Time of the latest write since the last call, or None on timeout.
+        Writes that land while the caller is busy are coalesced.
+        """
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self.event.clear()
+        moment, self.changed_at = self.changed_at, None
+        return moment
+
+
+class Hub:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+        self._relay = None
+        self._last_id = None
+
+    def subscribe(self, user_id):
+        subscription = Subscription(user_id)
+        with self._lock:
+            self._subscribers[user_id].add(subscription)
+            poll = getattr(settings, "TRACKER_LIVE_POLL_SECONDS", 1.0)
+            if _backend() == "db" and poll > 0 and self._relay is None:
+                self._relay = threading.Thread(target=self._run_relay, args=(poll,), name="tracker-live-relay", daemon=True)
+                self._relay.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscribers.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscribers[subscription.user_id]
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+    def deliver(self, user_id, moment):
+        with self._lock:
+            subscriptions = list(self._subscribers.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.wake(moment)
+
+    def poll_once(self):
+        """
+        Delivers the notifications other workers wrote since the last poll.
+        The first poll only finds the starting point.
+        """
+        if self._last_id is None:
+            self._last_id = LiveNotification.objects.aggregate(last=Max("id"))["last"] or 0
+            return
+        rows = list(
+            LiveNotification.objects.filter(id__gt=self._last_id)
+            .order_by("id")
+            .values_list("id", "owner_id", "origin", "created_at")
+        )
+        for _, owner_id, origin, created_at in rows:
+            if origin != ORIGIN:
+                self.deliver(owner_id, created_at)
+        if rows:
+            self._last_id = rows[-1][0]
+
+    def prune(self):
+        LiveNotification.objects.filter(created_at__lt=timezone.now() - RETENTION).delete()
+
+    def _run_relay(self, interval):
+        polls = 0
+        try:
+            while True:
+                with self._lock:
+                    if not self._subscribers:
+                        self._relay, self._last_id = None, None
+                        return
+                connection.close_if_health_check_failed()
+                try:
+                    self.poll_once()
+                    polls += 1
+                    if polls % PRUNE_EVERY == 0:
+                        self.prune()
+                except DatabaseError:
+                    logger.exception("Live notification relay failed to poll")
+                    connection.close()
+                time.sleep(interval)
+        finally:
+            connection.close()
+
+
+hub = Hub()
+
+
+def publish(user_id):
+    """
+    Wakes the user's open dashboards, here and (db backend) in other workers.
+    """
+    moment = timezone.now()
+    hub.deliver(user_id, moment)
+    if _backend() == "db":
+        LiveNotification.objects.create(owner_id=user_id, origin=ORIGIN, created_at=moment)
+
+
+class _Publish:
+    """
+    on_commit callback that publishes for every user added to it.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.user_ids = set()
+
+    def __call__(self):
+        if _pending_for(self.connection) is self:
+            del _pending[self.connection]
+        for user_id in self.user_ids:
+            publish(user_id)
+
+
+# Weak references to the open transaction's _Publish, per connection. Only
+# on_commit holds the callback itself, so once a rollback drops it the
+# reference is dead and the next write registers a new one.
+_pending = weakref.WeakKeyDictionary()
+
+
+def _pending_for(connection):
+    ref = _pending.get(connection)
+    return ref() if ref is not None else None
+
+
+def publish_on_commit(user_id):
+    """
+    publish() once the current DB transaction commits; a transaction that
+    writes many rows of one user publishes once.
+    """
+    connection = transaction.get_connection()
+    callback = _pending_for(connection) if connection.in_atomic_block else None
+    if callback is None:
+        callback = _Publish(connection)
+        callback.user_ids.add(user_id)
+        _pending[connection] = weakref.ref(callback)
+        transaction.on_commit(callback)
+    else:
+        callback.user_ids.add(user_id)
+
+
+def format_event(name, data):
+    payload = json.dumps(data, cls=DjangoJSONEncoder, separators=(",", ":"))
+    return f"event: {name}\ndata: {payload}\n\n"
+
+
+async def stream(user_id, poll):
+    """
+    Server-sent events for one connection. `poll(changed_at)` is an async
+    callable returning [(event, data), ...]: called once with None when the
+    stream opens, then after each write with the time of the latest one.
+    """
+    heartbeat = getattr(settings, "TRACKER_LIVE_HEARTBEAT_SECONDS", 15)
+    subscription = hub.subscribe(user_id)
+    try:
+        yield "retry: 5000\n\n"
+        changed_at = None
+        while True:
+            for name, data in await poll(changed_at):
+                metrics.inc("tracker_live_events_total", event=name)
+                yield format_event(name, data)
+            changed_at = await subscription.wait(heartbeat)
+            while changed_at is None:
+                # Comment line: keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                changed_at = await subscription.wait(heartbeat)
+    finally:
+        hub.unsubscribe(subscription)
@@ -0,0 +1,76 @@
+import json
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from Tracker.benchmarks import compare, run_benchmarks, run_handler_comparison
+from Tracker.seeding import SEED_END
+
+
+def parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Invalid date '{value}', expected YYYY-MM-DD.")
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the Tracker hot paths through the test client for seeded users (see seed_bench) "
+        "and print p50/p95 latency, query counts and peak memory as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("usernames", nargs="*", help="Defaults to every user named <prefix>N")
+        parser.add_argument("--prefix", default="bench")
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--cold", action="store_true", help="Invalidate the user's cache before each request")
+        parser.add_argument("--date", default=SEED_END.isoformat(),
+                            help=f"Day the requests run on, YYYY-MM-DD: seed_bench's --end (default {SEED_END})")
+        parser.add_argument("--only", action="append", help="Scenario name; can be repeated")
+        parser.add_argument("--output", help="Write the report to this file instead of stdout")
+        parser.add_argument("--compare", help="Baseline report to diff against")
+        parser.add_argument(
+            "--handlers", action="store_true",
+            help="Also compare the cold dashboard under the WSGI and ASGI handlers",
+        )
+        parser.add_argument("--concurrency", type=int, default=4, help="Requests in flight for --handlers")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        if options["usernames"]:
+            users = list(User.objects.filter(username__in=options["usernames"]).order_by("username"))
+        else:
+            users = list(User.objects.filter(username__regex=rf"^{options['prefix']}\d+$").order_by("username"))
+        if not users:
+            raise CommandError("No benchmark users found. Run seed_bench first.")
+        if options["repeat"] < 1:
+            raise CommandError("--repeat must be at least 1.")
+        today = parse_date(options["date"])
+
+        report = run_benchmarks(
+            users, repeat=options["repeat"], warmup=options["warmup"], cold=options["cold"], only=options["only"],
+            today=today,
+        )
+
+        if options["handlers"]:
+            report["handlers"] = {
+                user.username: run_handler_comparison(
+                    user, repeat=options["repeat"], concurrency=options["concurrency"], today=today,
+                )
+                for user in users
+            }
+
+        if options["compare"]:
+            with open(options["compare"]) as fh:
+                report["comparison"] = compare(json.load(fh), report)
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                fh.write(output + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+        else:
+            self.stdout.write(output)
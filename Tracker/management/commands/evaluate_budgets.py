@@ -0,0 +1,63 @@
+import time
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from Tracker.budgets import CHUNK_SIZE, evaluate_budgets, record_alerts
+
+
+def parse_month(value):
+    try:
+        return date.fromisoformat(f"{value}-01")
+    except ValueError:
+        raise CommandError(f"Invalid month '{value}', expected YYYY-MM.")
+
+
+class Command(BaseCommand):
+    help = "Evaluate every budget of a month (or range of months) and write overspend alerts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--month", help="YYYY-MM (default: the current month)")
+        parser.add_argument("--through", help="Last month of a range, YYYY-MM")
+        parser.add_argument("--user", help="Only process this username")
+        parser.add_argument("--threshold", type=int, default=100,
+                            help="Alert once spend passes this percentage of the limit (default 100)")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+        parser.add_argument("--dry-run", action="store_true", help="Count the alerts without writing them")
+
+    def handle(self, *args, **options):
+        first = parse_month(options["month"]) if options["month"] else timezone.localdate().replace(day=1)
+        last = parse_month(options["through"]) if options["through"] else first
+        if last < first:
+            raise CommandError("--through must not be before --month.")
+
+        owner = None
+        if options["user"]:
+            try:
+                owner = get_user_model().objects.get(username=options["user"])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist.")
+
+        started = time.perf_counter()
+        chunks = evaluate_budgets(first, last, owner=owner, chunk_size=options["chunk_size"])
+        threshold = options["threshold"]
+        if options["dry_run"]:
+            evaluated = alerted = 0
+            for chunk in chunks:
+                evaluated += len(chunk)
+                alerted += sum(status.reached(threshold) for status in chunk)
+        else:
+            evaluated, alerted = record_alerts(chunks, threshold=threshold)
+        elapsed = time.perf_counter() - started
+
+        months = f"{first:%Y-%m}" if last == first else f"{first:%Y-%m}..{last:%Y-%m}"
+        summary = (
+            f"Evaluated {evaluated} budget(s) for {months} in {elapsed:.2f}s; "
+            f"{alerted} over {threshold}% of their limit."
+        )
+        if options["dry_run"]:
+            self.stdout.write(summary)
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,46 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from Tracker.importer import FORMATS, TransactionImporter, guess_format, read_rows
+
+
+class Command(BaseCommand):
+    help = "Bulk import transactions for a user from a CSV or JSON Lines file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--user", required=True, help="Username to import for")
+        parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--no-create-categories", action="store_true")
+        parser.add_argument("--dry-run", action="store_true", help="Validate only")
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options["user"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User '{options['user']}' does not exist.")
+
+        fmt = options["format"] or guess_format(options["path"])
+        importer = TransactionImporter(
+            user,
+            batch_size=options["batch_size"],
+            create_categories=not options["no_create_categories"],
+            dry_run=options["dry_run"],
+        )
+
+        try:
+            with open(options["path"], encoding="utf-8-sig", newline="") as fh:
+                report = importer.run(read_rows(fh, fmt))
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        for error in report["errors"]:
+            self.stdout.write(f"row {error['row']}: {json.dumps(error['errors'])}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['created']} created, {report['valid']} valid, {len(report['errors'])} rejected, "
+            f"{len(report['categories_created'])} new categories."
+        ))
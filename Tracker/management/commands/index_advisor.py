@@ -0,0 +1,58 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from Tracker.query_plans import advise
+from Tracker.seeding import seed_user
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway user, run every Tracker query shape and report EXPLAIN QUERY PLAN "
+        "output, flagging full scans and temp B-tree sorts. Nothing is kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--years", type=int, default=2)
+        parser.add_argument("--per-day", type=int, default=4, help="Average transactions per day")
+        parser.add_argument("--analyze", action="store_true", help="Run ANALYZE after seeding")
+        parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+        parser.add_argument("--verbose-plans", action="store_true", help="Print plans for clean queries too")
+        parser.add_argument("--fail-on-issues", action="store_true")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("index_advisor currently understands SQLite query plans only.")
+
+        with transaction.atomic():
+            user, count = seed_user(
+                "__index_advisor__", years=options["years"], txns_per_day=options["per_day"]
+            )
+            if options["analyze"]:
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE")
+            report = advise(user)
+            transaction.set_rollback(True)
+
+        flagged = sum(1 for shape in report for q in shape["queries"] if q["issues"])
+
+        if options["json"]:
+            self.stdout.write(json.dumps({"seeded_transactions": count, "shapes": report}, indent=2))
+        else:
+            self.stdout.write(f"Seeded {count} transactions.\n")
+            for shape in report:
+                bad = [q for q in shape["queries"] if q["issues"]]
+                status = self.style.WARNING("FLAGGED") if bad else self.style.SUCCESS("ok")
+                self.stdout.write(f"{status} {shape['shape']} ({len(shape['queries'])} queries)")
+                for q in shape["queries"]:
+                    if q["issues"] or options["verbose_plans"]:
+                        self.stdout.write(f"    {q['sql'][:160]}")
+                        for line in q["plan"]:
+                            self.stdout.write(f"      | {line}")
+                        for issue in q["issues"]:
+                            self.stdout.write(self.style.WARNING(f"      ! {issue}"))
+            self.stdout.write(f"\n{flagged} flagged quer{'y' if flagged == 1 else 'ies'}.")
+
+        if flagged and options["fail_on_issues"]:
+            raise CommandError(f"{flagged} queries need attention.")
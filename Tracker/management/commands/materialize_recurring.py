@@ -0,0 +1,46 @@
+import time
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from Tracker.recurring import BATCH_SIZE, materialize_due
+
+
+class Command(BaseCommand):
+    help = "Write every due occurrence of the recurring transactions, catching up any backlog. Safe to re-run."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="Materialize up to this day, YYYY-MM-DD (default: today)")
+        parser.add_argument("--user", help="Only process this username")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Rules per DB transaction")
+        parser.add_argument("--dry-run", action="store_true", help="Count the occurrences without writing them")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        if options["date"]:
+            try:
+                today = date.fromisoformat(options["date"])
+            except ValueError:
+                raise CommandError(f"Invalid date '{options['date']}', expected YYYY-MM-DD.")
+
+        owner = None
+        if options["user"]:
+            try:
+                owner = get_user_model().objects.get(username=options["user"])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist.")
+
+        started = time.perf_counter()
+        report = materialize_due(today, owner=owner, batch_size=options["batch_size"], dry_run=options["dry_run"])
+        elapsed = time.perf_counter() - started
+
+        summary = (
+            f"Materialized {report.created} occurrence(s) of {report.rules} rule(s) up to {today} in {elapsed:.2f}s; "
+            f"{report.skipped} already written, {report.finished} rule(s) ended."
+        )
+        if options["dry_run"]:
+            self.stdout.write(summary)
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,38 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from Tracker.rollups import rebuild_rollups, verify_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild monthly rollups from raw transactions, or verify them with --verify."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Only process this username")
+        parser.add_argument("--verify", action="store_true", help="Report drift without writing anything")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        user = None
+        if options["user"]:
+            try:
+                user = get_user_model().objects.get(username=options["user"])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist.")
+
+        if options["verify"]:
+            drift = verify_rollups(user)
+            for key, expected, stored in drift:
+                owner_id, wallet_id, category_id, month, t_type = key
+                self.stdout.write(
+                    f"owner={owner_id} wallet={wallet_id} category={category_id} "
+                    f"month={month:%Y-%m} type={t_type}: expected {expected[0]} ({expected[1]}), "
+                    f"stored {stored[0]} ({stored[1]})"
+                )
+            if drift:
+                raise CommandError(f"{len(drift)} rollup bucket(s) out of sync. Run without --verify to rebuild.")
+            self.stdout.write(self.style.SUCCESS("Rollups are in sync."))
+            return
+
+        written = rebuild_rollups(user, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} rollup row(s)."))
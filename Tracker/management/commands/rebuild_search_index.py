@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from Tracker.search import ensure_sync_triggers, get_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the transaction note search index (and its sync triggers on SQLite)."
+
+    def handle(self, *args, **options):
+        ensure_sync_triggers()
+        backend = get_backend()
+        indexed = backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"{type(backend).__name__}: indexed {indexed} transaction(s)."))
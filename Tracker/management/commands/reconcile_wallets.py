@@ -0,0 +1,36 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from Tracker.balances import reconcile_wallets
+
+
+class Command(BaseCommand):
+    help = "Find and repair wallets whose stored income/expense/balance drifted from their transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Only process this username")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--dry-run", action="store_true", help="Report drift without repairing it")
+
+    def handle(self, *args, **options):
+        owner = None
+        if options["user"]:
+            try:
+                owner = get_user_model().objects.get(username=options["user"])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist.")
+
+        drifted = 0
+        for wallet, stored, expected in reconcile_wallets(
+            batch_size=options["batch_size"], dry_run=options["dry_run"], owner=owner
+        ):
+            drifted += 1
+            self.stdout.write(
+                f"wallet={wallet.pk} owner={wallet.owner_id}: stored {stored[0]}/{stored[1]}/{stored[2]}, "
+                f"expected {expected[0]}/{expected[1]}/{expected[2]} (income/expense/balance)"
+            )
+
+        if options["dry_run"]:
+            self.stdout.write(f"{drifted} wallet(s) out of sync.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Repaired {drifted} wallet(s)."))
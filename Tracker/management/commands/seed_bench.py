@@ -0,0 +1,62 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from Tracker.seeding import SEED_END, seed_user
+
+
+def parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Invalid date '{value}', expected YYYY-MM-DD.")
+
+
+class Command(BaseCommand):
+    help = "Generate deterministic benchmark users with bulk-inserted wallets, categories, budgets and transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1)
+        parser.add_argument("--prefix", default="bench", help="Usernames are <prefix>1, <prefix>2, ...")
+        parser.add_argument("--wallets", type=int, default=3)
+        parser.add_argument("--categories", type=int, default=10)
+        parser.add_argument("--budgets", type=int, default=5, help="Budgets per month")
+        parser.add_argument("--years", type=int, default=2)
+        parser.add_argument("--per-day", type=int, default=3, help="Average transactions per day")
+        parser.add_argument("--end", default=SEED_END.isoformat(),
+                            help=f"Last day of the history, YYYY-MM-DD (default {SEED_END}, so runs are reproducible)")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument("--reset", action="store_true", help="Delete existing <prefix>N users first")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        end = parse_date(options["end"])
+        usernames = [f"{options['prefix']}{i}" for i in range(1, options["users"] + 1)]
+
+        existing = User.objects.filter(username__in=usernames)
+        if existing.exists():
+            if not options["reset"]:
+                raise CommandError(
+                    f"{existing.count()} of these users already exist. Use --reset or another --prefix."
+                )
+            existing.delete()
+
+        total = 0
+        for username in usernames:
+            user, count = seed_user(
+                username,
+                wallets=options["wallets"],
+                categories=options["categories"],
+                years=options["years"],
+                txns_per_day=options["per_day"],
+                budgets_per_month=options["budgets"],
+                end=end,
+                seed=options["seed"],
+                batch_size=options["batch_size"],
+            )
+            total += count
+            self.stdout.write(f"{username}: {count} transactions")
+
+        self.stdout.write(self.style.SUCCESS(f"Seeded {len(usernames)} user(s), {total} transactions."))
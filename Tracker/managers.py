@@ -7,8 +7,19 @@ class ActiveQuerySet(models.QuerySet):
 
 
 class TransactionQuerySet(ActiveQuerySet):
+    # Set by for_user() and kept across chained calls, so the search backend
+    # can scope its index lookup to one owner
+    owner_id = None
+
+    def _clone(self):
+        clone = super()._clone()
+        clone.owner_id = self.owner_id
+        return clone
+
     def for_user(self, user):
-        return self.active().filter(owner=user)
+        qs = self.active().filter(owner=user)
+        qs.owner_id = user.pk
+        return qs
 
     def expenses(self):
         return self.filter(t_type="EXPENSE")
@@ -16,6 +27,43 @@ class TransactionQuerySet(ActiveQuerySet):
     def income(self):
         return self.filter(t_type="INCOME")
 
+    def filter_by(self, t_type=None, category=None, wallet=None, date_from=None, date_to=None, search=None):
+        """
+        The transaction list filters shared by the web list, CSV export and API.
+        Empty values are ignored.
+        """
+        qs = self
+
+        if t_type:
+            qs = qs.filter(t_type=t_type)
+
+        if category:
+            qs = qs.filter(category__id=category)
+
+        if wallet:
+            qs = qs.filter(wallet__id=wallet)
+
+        if date_from:
+            qs = qs.filter(date__gte=date_from)
+
+        if date_to:
+            qs = qs.filter(date__lte=date_to)
+
+        if search:
+            qs = qs.search(search)
+
+        return qs
+
+    def search(self, query, ranked=False):
+        """
+        Full-text note search through the configured backend (Tracker.search).
+        With ranked=True rows are annotated with `search_rank` (lower is better).
+        """
+        from .search import get_backend
+
+        backend = get_backend()
+        return backend.rank(self, query) if ranked else backend.filter(self, query)
+
 
 class TransactionManager(models.Manager):
     def get_queryset(self):
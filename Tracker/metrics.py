@@ -0,0 +1,331 @@
+"""
+Prometheus metrics without an external service.
+
+Each worker process accumulates counters and histograms in memory and
+writes them to its own JSON file in settings.TRACKER_METRICS_DIR (at most
+every TRACKER_METRICS_FLUSH_INTERVAL seconds, and at exit). The /metrics
+view sums every file in the directory, so totals are correct across
+gunicorn workers and survive worker restarts. A worker killed with SIGKILL
+loses at most one flush interval of data.
+
+Each scrape folds the files of processes that are gone into one
+archive.json and deletes them, so the directory holds one file per live
+worker plus the archive however often workers restart.
+"""
+import atexit
+import contextlib
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: dead workers' files are kept
+    fcntl = None
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+ARCHIVE = "archive.json"
+DB_TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+HELP = {
+    "tracker_http_requests_total": ("counter", "Requests served, by URL name, method and status."),
+    "tracker_http_request_duration_seconds": ("histogram", "Request latency by URL name."),
+    "tracker_db_queries_per_request": ("histogram", "SQL queries per request by URL name."),
+    "tracker_db_time_seconds": ("histogram", "SQL time per request by URL name."),
+    "tracker_export_rows_total": ("counter", "Transaction rows streamed by the CSV export and the columnar API format."),
+    "tracker_cache_requests_total": ("counter", "Analytics cache lookups by namespace and result."),
+    "tracker_cache_hit_ratio": ("gauge", "Hits / lookups of the analytics cache, by namespace."),
+}
+
+
+def metrics_dir():
+    return Path(getattr(settings, "TRACKER_METRICS_DIR", Path(settings.BASE_DIR) / ".metrics"))
+
+
+def _labels_key(labels):
+    return json.dumps(sorted(labels.items()), separators=(",", ":"))
+
+
+class ProcessMetrics:
+    """
+    In-memory metrics of this process, flushed to <pid>-<start>.json.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.file_name = f"{os.getpid()}-{time.time_ns()}.json"
+        self.last_flush = 0.0
+        self.dirty = False
+        self.reset()
+
+    def reset(self):
+        # counters[name][labels] = value
+        # histograms[name][labels] = {"buckets": [...], "counts": [...], "sum": x, "count": n}
+        self.counters = defaultdict(lambda: defaultdict(float))
+        self.histograms = defaultdict(dict)
+
+    def inc(self, name, amount=1, **labels):
+        with self.lock:
+            self.counters[name][_labels_key(labels)] += amount
+            self.dirty = True
+        self.maybe_flush()
+
+    def observe(self, name, value, buckets, **labels):
+        key = _labels_key(labels)
+        with self.lock:
+            hist = self.histograms[name].get(key)
+            if hist is None:
+                hist = self.histograms[name][key] = {
+                    "buckets": list(buckets), "counts": [0] * (len(buckets) + 1), "sum": 0.0, "count": 0,
+                }
+            hist["counts"][bisect_left(hist["buckets"], value)] += 1
+            hist["sum"] += value
+            hist["count"] += 1
+            self.dirty = True
+        self.maybe_flush()
+
+    def maybe_flush(self):
+        interval = getattr(settings, "TRACKER_METRICS_FLUSH_INTERVAL", 1.0)
+        if time.monotonic() - self.last_flush >= interval:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            payload = json.dumps({"counters": self.counters, "histograms": self.histograms})
+            self.last_flush = time.monotonic()
+            self.dirty = False
+
+        directory = metrics_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        tmp = directory / f".{self.file_name}.tmp"
+        tmp.write_text(payload)
+        os.replace(tmp, directory / self.file_name)
+
+
+_process = None
+_process_lock = threading.Lock()
+
+
+def process_metrics():
+    global _process
+    if _process is None or _process.file_name.split("-")[0] != str(os.getpid()):
+        # First use, or a fork that inherited the parent's registry
+        with _process_lock:
+            if _process is None or _process.file_name.split("-")[0] != str(os.getpid()):
+                _process = ProcessMetrics()
+    return _process
+
+
+def inc(name, amount=1, **labels):
+    process_metrics().inc(name, amount, **labels)
+
+
+def observe(name, value, buckets, **labels):
+    process_metrics().observe(name, value, buckets, **labels)
+
+
+@atexit.register
+def _flush_at_exit():
+    if _process is not None and _process.dirty:
+        try:
+            _process.flush()
+        except Exception:
+            pass
+
+
+# ----------------------------
+# Aggregation / exposition
+# ----------------------------
+
+def _merge(counters, histograms, data):
+    for name, series in data["counters"].items():
+        for key, value in series.items():
+            counters[name][key] += value
+    for name, series in data["histograms"].items():
+        for key, hist in series.items():
+            total = histograms[name].get(key)
+            if total is None or total["buckets"] != hist["buckets"]:
+                histograms[name][key] = {**hist, "counts": list(hist["counts"])}
+                continue
+            total["counts"] = [a + b for a, b in zip(total["counts"], hist["counts"])]
+            total["sum"] += hist["sum"]
+            total["count"] += hist["count"]
+
+
+def _read(path):
+    try:
+        return json.loads(path.read_text())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # someone else's process
+    return True
+
+
+def _dead_files(directory):
+    for path in directory.glob("*.json"):
+        pid = path.name.split("-")[0]
+        if pid.isdigit() and int(pid) != os.getpid() and not _pid_alive(int(pid)):
+            yield path
+
+
+@contextlib.contextmanager
+def _directory_lock(directory):
+    with open(directory / ".lock", "a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def prune(directory=None):
+    """
+    Folds the metric files of exited processes into ARCHIVE and deletes
+    them. Returns how many files were folded.
+    """
+    directory = directory or metrics_dir()
+    if fcntl is None or not directory.is_dir():
+        return 0
+    with _directory_lock(directory):
+        dead = list(_dead_files(directory))
+        if not dead:
+            return 0
+        counters = defaultdict(lambda: defaultdict(float))
+        histograms = defaultdict(dict)
+        for path in [directory / ARCHIVE] + dead:
+            data = _read(path)
+            if data is not None:
+                _merge(counters, histograms, data)
+
+        tmp = directory / f".{ARCHIVE}.tmp"
+        tmp.write_text(json.dumps({"counters": counters, "histograms": histograms}))
+        os.replace(tmp, directory / ARCHIVE)
+        for path in dead:
+            path.unlink(missing_ok=True)
+    return len(dead)
+
+
+def collect():
+    """
+    Sums the metric files of every process (this one flushed first).
+    Returns (counters, histograms) shaped like ProcessMetrics.
+    """
+    process_metrics().flush()
+    prune()
+
+    counters = defaultdict(lambda: defaultdict(float))
+    histograms = defaultdict(dict)
+    for path in metrics_dir().glob("*.json"):
+        data = _read(path)
+        if data is not None:
+            _merge(counters, histograms, data)
+    return counters, histograms
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def _cache_ratios(counters):
+    lookups = defaultdict(lambda: [0.0, 0.0])
+    for key, value in counters.get("tracker_cache_requests_total", {}).items():
+        labels = dict(json.loads(key))
+        entry = lookups[labels.get("namespace", "")]
+        entry[1] += value
+        if labels.get("result") == "hit":
+            entry[0] += value
+    return {
+        _labels_key({"namespace": ns}): (hits / total if total else 0.0)
+        for ns, (hits, total) in lookups.items()
+    }
+
+
+def render():
+    """
+    Prometheus text exposition format (version 0.0.4).
+    """
+    counters, histograms = collect()
+    gauges = {"tracker_cache_hit_ratio": _cache_ratios(counters)}
+    lines = []
+
+    for name, (kind, help_text) in HELP.items():
+        series = {"counter": counters, "histogram": histograms, "gauge": gauges}[kind].get(name)
+        if not series:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+        for key in sorted(series):
+            labels = [tuple(pair) for pair in json.loads(key)]
+            if kind != "histogram":
+                lines.append(f"{name}{_format_labels(labels)} {_number(series[key])}")
+                continue
+
+            hist = series[key]
+            cumulative = 0
+            for bound, count in zip(list(hist["buckets"]) + [float("inf")], hist["counts"]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels + [('le', _number(bound))])} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_number(hist['sum'])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {hist['count']}")
+
+    return "\n".join(lines) + "\n"
+
+
+# ----------------------------
+# Middleware
+# ----------------------------
+
+class MetricsMiddleware:
+    """
+    Records latency and, via QueryInstrumentationMiddleware's request.query_stats,
+    DB query count and time per URL name. Must sit above that middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        view = (match.url_name or match.view_name) if match else "unresolved"
+
+        inc("tracker_http_requests_total", view=view, method=request.method, status=str(response.status_code))
+        observe("tracker_http_request_duration_seconds", elapsed, LATENCY_BUCKETS, view=view)
+
+        stats = getattr(request, "query_stats", None)
+        if stats is not None:
+            observe("tracker_db_queries_per_request", stats.query_count, QUERY_COUNT_BUCKETS, view=view)
+            observe("tracker_db_time_seconds", stats.sql_time, DB_TIME_BUCKETS, view=view)
+        return response
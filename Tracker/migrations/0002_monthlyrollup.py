@@ -0,0 +1,50 @@
+# Generated by Django 6.0.2 on 2026-10-18 03:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def backfill_rollups(apps, schema_editor):
+    Transaction = apps.get_model("Tracker", "Transaction")
+    MonthlyRollup = apps.get_model("Tracker", "MonthlyRollup")
+
+    rows = (
+        Transaction.objects.filter(is_deleted=False)
+        .annotate(month=TruncMonth("date"))
+        .values("owner_id", "wallet_id", "category_id", "month", "t_type")
+        .annotate(total=Sum("amount"), txn_count=Count("pk"))
+        .order_by()
+    )
+    MonthlyRollup.objects.bulk_create([MonthlyRollup(**row) for row in rows], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tracker', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('t_type', models.CharField(choices=[('EXPENSE', 'Expense'), ('INCOME', 'Income')], max_length=10)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('txn_count', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to='Tracker.category')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to=settings.AUTH_USER_MODEL)),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to='Tracker.wallet')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner', 'month'], name='Tracker_mon_owner_i_aecf0d_idx')],
+                'unique_together': {('owner', 'wallet', 'category', 'month', 't_type')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
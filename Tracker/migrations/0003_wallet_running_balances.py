@@ -0,0 +1,56 @@
+# Generated by Django 6.0.2 on 2026-10-18 03:38
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_balances(apps, schema_editor):
+    Transaction = apps.get_model("Tracker", "Transaction")
+    Wallet = apps.get_model("Tracker", "Wallet")
+
+    totals = {}
+    rows = (
+        Transaction.objects.filter(is_deleted=False)
+        .values("wallet_id", "t_type")
+        .annotate(total=Sum("amount"))
+        .order_by()
+    )
+    for row in rows:
+        income, expense = totals.get(row["wallet_id"], (0, 0))
+        if row["t_type"] == "INCOME":
+            income = row["total"]
+        else:
+            expense = row["total"]
+        totals[row["wallet_id"]] = (income, expense)
+
+    wallets = list(Wallet.objects.filter(pk__in=totals))
+    for w in wallets:
+        w.income, w.expense = totals[w.pk]
+        w.balance = w.income - w.expense
+    Wallet.objects.bulk_update(wallets, ["income", "expense", "balance"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tracker', '0002_monthlyrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallet',
+            name='balance',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='wallet',
+            name='expense',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='wallet',
+            name='income',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=14),
+        ),
+        migrations.RunPython(backfill_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-18 03:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tracker', '0003_wallet_running_balances'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='transaction',
+            options={'ordering': ['-date', '-created_at', '-id']},
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['owner', 'is_deleted', '-date', '-created_at', '-id'], name='txn_owner_keyset_idx'),
+        ),
+    ]
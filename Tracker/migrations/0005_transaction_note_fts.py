@@ -0,0 +1,78 @@
+# Generated by Django 6.0.2 on 2026-10-18 03:50
+
+from django.db import migrations
+
+
+FTS_TABLE = "tracker_transaction_fts"
+
+CREATE_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE}
+    USING fts5(note, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON "Tracker_transaction" BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, note) VALUES (new.id, new.note);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF note ON "Tracker_transaction" BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE}(rowid, note) VALUES (new.id, new.note);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON "Tracker_transaction" BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f'INSERT INTO {FTS_TABLE}(rowid, note) SELECT id, note FROM "Tracker_transaction"',
+]
+
+DROP_SQL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def _fts5_supported(connection):
+    if connection.vendor != "sqlite":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        if cursor.fetchone()[0]:
+            return True
+        # Some builds ship FTS5 without reporting the compile option
+        try:
+            cursor.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+            cursor.execute("DROP TABLE temp.fts5_probe")
+            return True
+        except Exception:
+            return False
+
+
+def create_fts(apps, schema_editor):
+    if not _fts5_supported(schema_editor.connection):
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tracker', '0004_transaction_keyset_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 6.0.2 on 2026-10-18 03:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tracker', '0005_transaction_note_fts'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='txn_owner_keyset_idx',
+        ),
+        migrations.AddIndex(
+            model_name='budget',
+            index=models.Index(fields=['owner', 'month'], name='Tracker_bud_owner_i_66881a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['owner', '-date', '-created_at', '-id'], name='txn_active_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['owner', 't_type', '-date', '-created_at', '-id'], name='txn_active_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['owner', 'category', '-date', '-created_at', '-id'], name='txn_active_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['owner', 'wallet', '-date', '-created_at', '-id'], name='txn_active_wallet_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['owner', '-amount', '-id'], name='txn_active_amount_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 6.0.2 on 2026-10-18 04:38
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tracker', '0008_live_notifications'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OverspendAlert',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('limit_amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('spent', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='budget',
+            index=models.Index(fields=['month', 'id'], name='budget_month_idx'),
+        ),
+        migrations.AddField(
+            model_name='overspendalert',
+            name='budget',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='overspend_alert', to='Tracker.budget'),
+        ),
+        migrations.AddField(
+            model_name='overspendalert',
+            name='owner',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='overspend_alerts', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='overspendalert',
+            index=models.Index(fields=['owner', 'month'], name='Tracker_ove_owner_i_c6c13a_idx'),
+        ),
+    ]
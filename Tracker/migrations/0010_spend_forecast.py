@@ -0,0 +1,34 @@
+# Generated by Django 6.0.2 on 2026-10-18 04:41
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tracker', '0009_budget_evaluation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpendForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('spent', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('projected', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('limit_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('exceeds_on', models.DateField(blank=True, null=True)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='spend_forecasts', to='Tracker.category')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='spend_forecasts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner', 'month'], name='Tracker_spe_owner_i_df45ec_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-18 05:13
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tracker', '0011_recurring_transactions'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='Tracker_tra_owner_i_4c2d32_idx',
+        ),
+    ]
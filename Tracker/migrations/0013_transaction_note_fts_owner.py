@@ -0,0 +1,104 @@
+# Generated by Django 6.0.2 on 2026-10-18 06:02
+
+from django.db import migrations
+
+
+FTS_TABLE = "tracker_transaction_fts"
+
+DROP_SQL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_ad",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+# The owner is stored (not indexed) next to the note so searches can filter
+# on it inside the MATCH subquery, and soft-deleted rows leave the index.
+CREATE_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE}
+    USING fts5(note, owner_id UNINDEXED, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON "Tracker_transaction" BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, note, owner_id)
+        SELECT new.id, new.note, new.owner_id WHERE NOT new.is_deleted;
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF note, owner_id, is_deleted ON "Tracker_transaction" BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE}(rowid, note, owner_id)
+        SELECT new.id, new.note, new.owner_id WHERE NOT new.is_deleted;
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON "Tracker_transaction" BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    INSERT INTO {FTS_TABLE}(rowid, note, owner_id)
+    SELECT id, note, owner_id FROM "Tracker_transaction" WHERE NOT is_deleted
+    """,
+]
+
+# Layout of migration 0005
+REVERSE_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE}
+    USING fts5(note, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON "Tracker_transaction" BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, note) VALUES (new.id, new.note);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF note ON "Tracker_transaction" BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE}(rowid, note) VALUES (new.id, new.note);
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON "Tracker_transaction" BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f'INSERT INTO {FTS_TABLE}(rowid, note) SELECT id, note FROM "Tracker_transaction"',
+]
+
+
+def _fts_exists(connection):
+    # Migration 0005 skips the table when SQLite has no FTS5
+    if connection.vendor != "sqlite":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+def _rebuild(schema_editor, statements):
+    if not _fts_exists(schema_editor.connection):
+        return
+    for sql in DROP_SQL + statements:
+        schema_editor.execute(sql)
+
+
+def add_owner(apps, schema_editor):
+    _rebuild(schema_editor, CREATE_SQL)
+
+
+def remove_owner(apps, schema_editor):
+    _rebuild(schema_editor, REVERSE_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tracker', '0012_drop_owner_is_deleted_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_owner, remove_owner),
+    ]
@@ -1,6 +1,8 @@
 from django.conf import settings
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Q
+from django.utils import timezone
 from .managers import TransactionManager
 
 
@@ -13,22 +15,48 @@ class Wallet(models.Model):
     name = models.CharField(max_length=50, default="Main Wallet")
     currency = models.CharField(max_length=10, default="KES")
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Running totals of active transactions, maintained by Tracker.balances
+    income = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False)
+    expense = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False)
+    balance = models.DecimalField(max_digits=14, decimal_places=2, default=0, editable=False)
 
     class Meta:
         unique_together = ("owner", "name")
         ordering = ["name"]
+        indexes = [
+            # Change feed (Tracker.sync)
+            models.Index(fields=["owner", "updated_at", "id"], name="wallet_sync_idx"),
+        ]
+
+    RUNNING_TOTALS = ("income", "expense", "balance")
 
     def __str__(self):
         return f"{self.name} ({self.currency})"
 
+    def save(self, *args, **kwargs):
+        # Never write running totals back from a (possibly stale) instance;
+        # they only move through F-expression updates.
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.RUNNING_TOTALS
+            ]
+        super().save(*args, **kwargs)
+
 
 class Category(models.Model):
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="categories")
     name = models.CharField(max_length=50)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ("owner", "name")
         ordering = ["name"]
+        indexes = [
+            models.Index(fields=["owner", "updated_at", "id"], name="category_sync_idx"),
+        ]
 
     def __str__(self):
         return self.name
@@ -42,10 +70,17 @@ class Budget(models.Model):
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="budgets")
     month = models.DateField(help_text="Use the 1st day of the month, e.g. 2026-02-01")
     limit_amount = models.DecimalField(max_digits=12, decimal_places=2, validators=[MinValueValidator(0.01)])
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ("owner", "category", "month")
         ordering = ["-month", "category__name"]
+        indexes = [
+            models.Index(fields=["owner", "month"]),
+            models.Index(fields=["owner", "updated_at", "id"], name="budget_sync_idx"),
+            # evaluate_budgets() walks a month's budgets of every user in id order
+            models.Index(fields=["month", "id"], name="budget_month_idx"),
+        ]
 
     def __str__(self):
         return f"{self.category} - {self.month} - {self.limit_amount}"
@@ -73,6 +108,13 @@ class Transaction(models.Model):
     # Phase 3: Soft delete
     is_deleted = models.BooleanField(default=False)
 
+    # Written by the recurring scheduler (Tracker.recurring): the rule and the
+    # scheduled date are the occurrence's idempotency key
+    recurring = models.ForeignKey(
+        "RecurringTransaction", on_delete=models.SET_NULL, null=True, blank=True, related_name="occurrences"
+    )
+    occurrence = models.DateField(null=True, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -80,12 +122,211 @@ class Transaction(models.Model):
     objects = TransactionManager()
 
     class Meta:
-        ordering = ["-date", "-created_at"]
+        # id breaks ties so keyset pagination has a total order
+        ordering = ["-date", "-created_at", "-id"]
         indexes = [
             models.Index(fields=["owner", "date"]),
             models.Index(fields=["owner", "t_type", "date"]),
-            models.Index(fields=["owner", "is_deleted"]),
+            # Partial indexes over active rows. for_user() compiles to
+            # "NOT is_deleted", which cannot seek on an is_deleted column,
+            # so the hot-path shapes get their own is_deleted=False indexes
+            # (they replace the plain (owner, is_deleted) index).
+            models.Index(
+                fields=["owner", "-date", "-created_at", "-id"],
+                name="txn_active_keyset_idx", condition=Q(is_deleted=False),
+            ),
+            models.Index(
+                fields=["owner", "t_type", "-date", "-created_at", "-id"],
+                name="txn_active_type_idx", condition=Q(is_deleted=False),
+            ),
+            models.Index(
+                fields=["owner", "category", "-date", "-created_at", "-id"],
+                name="txn_active_category_idx", condition=Q(is_deleted=False),
+            ),
+            models.Index(
+                fields=["owner", "wallet", "-date", "-created_at", "-id"],
+                name="txn_active_wallet_idx", condition=Q(is_deleted=False),
+            ),
+            models.Index(
+                fields=["owner", "-amount", "-id"],
+                name="txn_active_amount_idx", condition=Q(is_deleted=False),
+            ),
+            # Change feed (Tracker.sync): every row, soft-deleted ones included
+            models.Index(fields=["owner", "updated_at", "id"], name="txn_sync_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=["recurring", "occurrence"], name="txn_recurring_occurrence_uniq"),
         ]
 
     def __str__(self):
         return f"{self.t_type} - {self.amount} on {self.date}"
+
+    def save(self, *args, **kwargs):
+        # Rollups and wallet balances are updated from the save signals; keep them in the same DB transaction
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+
+
+class RecurringTransaction(models.Model):
+    """
+    A transaction that repeats: rent, salary, subscriptions. The
+    materialize_recurring command (Tracker.recurring) writes every due
+    occurrence as a Transaction; next_date is the first one not written yet.
+    Monthly and yearly rules keep start_date's day, clamped to short months.
+    """
+    DAILY = "DAILY"
+    WEEKLY = "WEEKLY"
+    MONTHLY = "MONTHLY"
+    YEARLY = "YEARLY"
+
+    FREQUENCY_CHOICES = [
+        (DAILY, "Daily"),
+        (WEEKLY, "Weekly"),
+        (MONTHLY, "Monthly"),
+        (YEARLY, "Yearly"),
+    ]
+
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="recurring_transactions")
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name="recurring_transactions")
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name="recurring_transactions")
+
+    t_type = models.CharField(max_length=10, choices=Transaction.TYPE_CHOICES, default=Transaction.EXPENSE)
+    amount = models.DecimalField(max_digits=12, decimal_places=2, validators=[MinValueValidator(0.01)])
+    note = models.CharField(max_length=255, blank=True)
+
+    frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES, default=MONTHLY)
+    interval = models.PositiveSmallIntegerField(default=1, validators=[MinValueValidator(1)], help_text="Every N periods")
+    start_date = models.DateField()
+    end_date = models.DateField(null=True, blank=True)
+    next_date = models.DateField(blank=True)
+    is_active = models.BooleanField(default=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["next_date", "id"]
+        indexes = [
+            # The scheduler's scan: active rules that are due, in id order
+            models.Index(fields=["next_date", "id"], name="recurring_due_idx", condition=Q(is_active=True)),
+            models.Index(fields=["owner", "next_date"]),
+        ]
+
+    def __str__(self):
+        return f"{self.t_type} - {self.amount} {self.get_frequency_display().lower()} from {self.start_date}"
+
+    def save(self, *args, **kwargs):
+        if self.next_date is None:
+            self.next_date = self.start_date
+        super().save(*args, **kwargs)
+
+
+class MonthlyRollup(models.Model):
+    """
+    Pre-aggregated monthly totals per (owner, wallet, category, month, t_type).
+    Kept in sync by Tracker.rollups on every transaction write so analytics
+    never have to scan raw transaction rows for whole months.
+    """
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="monthly_rollups")
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name="monthly_rollups")
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True, related_name="monthly_rollups")
+    month = models.DateField(help_text="First day of the month")
+    t_type = models.CharField(max_length=10, choices=Transaction.TYPE_CHOICES)
+
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    txn_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("owner", "wallet", "category", "month", "t_type")
+        indexes = [
+            models.Index(fields=["owner", "month"]),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} {self.t_type} - {self.total} ({self.txn_count})"
+
+
+class OverspendAlert(models.Model):
+    """
+    A budget whose spending went past the alert threshold, written by the
+    evaluate_budgets command (Tracker.budgets) for overspend notifications.
+    One row per budget, refreshed on every run; created_at is when the
+    budget first crossed.
+    """
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="overspend_alerts")
+    budget = models.OneToOneField(Budget, on_delete=models.CASCADE, related_name="overspend_alert")
+    month = models.DateField()
+    limit_amount = models.DecimalField(max_digits=12, decimal_places=2)
+    spent = models.DecimalField(max_digits=14, decimal_places=2)
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["owner", "month"]),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} budget {self.budget_id}: {self.spent} / {self.limit_amount}"
+
+
+class SpendForecast(models.Model):
+    """
+    A category's projected month-end spend, stored by the hourly
+    forecast_spending command (Tracker.forecasting) for every user. The
+    dashboard and API compute the current user's forecast live instead;
+    these rows are the cross-user view, read in the admin (filter on
+    exceeds_on for the budgets about to be overrun) and by reporting
+    queries against the table.
+    """
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="spend_forecasts")
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True, related_name="spend_forecasts")
+    month = models.DateField(help_text="First day of the month")
+    spent = models.DecimalField(max_digits=14, decimal_places=2)
+    projected = models.DecimalField(max_digits=14, decimal_places=2)
+    limit_amount = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    exceeds_on = models.DateField(null=True, blank=True)
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["owner", "month"]),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} category {self.category_id}: {self.spent} -> {self.projected}"
+
+
+class DeletionLog(models.Model):
+    """
+    Tombstones for hard-deleted rows, so the change feed (Tracker.sync) can
+    tell clients about them. Soft-deleted transactions need no entry: they
+    stay in the table with a fresh updated_at.
+    """
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="deletions")
+    model = models.CharField(max_length=20)  # model_name, e.g. "category"
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["owner", "deleted_at", "id"], name="deletion_sync_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} deleted {self.deleted_at:%Y-%m-%d %H:%M}"
+
+
+class LiveNotification(models.Model):
+    """
+    Cross-worker fan-out for the live dashboard (Tracker.live) when
+    TRACKER_LIVE_BACKEND is "db": one row per committed write, read by the
+    other workers and pruned after a minute. Carries no data, only whose
+    dashboard to refresh.
+    """
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    origin = models.CharField(max_length=32)  # publishing process, which skips its own rows
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"user {self.owner_id} changed {self.created_at:%Y-%m-%d %H:%M:%S}"
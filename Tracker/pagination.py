@@ -0,0 +1,217 @@
+"""
+Keyset (cursor) pagination.
+
+Pages are addressed by the sort key of the row at the page boundary rather
+than by an offset, so fetching a deep page costs the same index range scan
+as the first one and no COUNT(*) is needed. Used by the web transaction list
+and by TransactionViewSet.
+"""
+import base64
+import binascii
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+DEFAULT_ORDERING = ("-date", "-created_at", "-id")
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _keys(ordering):
+    return [(f.lstrip("-"), f.startswith("-")) for f in ordering]
+
+
+def encode_cursor(values, backwards=False):
+    payload = json.dumps({"v": [str(v) for v in values], "b": int(backwards)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _to_python(model, name, value):
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        # Numeric annotations such as search_rank
+        return float(value)
+    return field.to_python(value)
+
+
+def decode_cursor(cursor, model, ordering):
+    """
+    Returns (values, backwards), with values converted back to Python types.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        raw, backwards = payload["v"], bool(payload["b"])
+        if len(raw) != len(ordering):
+            raise ValueError
+        values = [_to_python(model, name, value) for (name, _), value in zip(_keys(ordering), raw)]
+    except (ValueError, TypeError, KeyError, binascii.Error, ValidationError) as exc:
+        raise InvalidCursor("Invalid cursor.") from exc
+    return values, backwards
+
+
+def _beyond(keys, values):
+    """
+    Q for rows strictly after `values` in `keys` order (lexicographic).
+    The leading range bound lets the database seek on the first index column.
+    """
+    first, first_desc = keys[0]
+    q = Q(**{f"{first}__{'lte' if first_desc else 'gte'}": values[0]})
+
+    after = Q()
+    for i, (name, desc) in enumerate(keys):
+        cond = Q(**{f"{name}__{'lt' if desc else 'gt'}": values[i]})
+        for (prev, _), prev_value in zip(keys[:i], values[:i]):
+            cond &= Q(**{prev: prev_value})
+        after |= cond
+    return q & after
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor, previous_cursor, count=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = count
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    `ordering` must end in a unique field (the primary key) so that every
+    row has a distinct position.
+    """
+
+    def __init__(self, queryset, per_page, ordering=DEFAULT_ORDERING):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+        self.keys = _keys(self.ordering)
+
+    def _position(self, obj):
+        return [getattr(obj, name) for name, _ in self.keys]
+
+    def page(self, cursor=None, with_count=False):
+        qs = self.queryset.order_by(*self.ordering)
+        backwards = False
+
+        if cursor:
+            values, backwards = decode_cursor(cursor, self.queryset.model, self.ordering)
+            if backwards:
+                reversed_keys = [(name, not desc) for name, desc in self.keys]
+                qs = self.queryset.filter(_beyond(reversed_keys, values)).order_by(
+                    *[f"-{name}" if desc else name for name, desc in reversed_keys]
+                )
+            else:
+                qs = qs.filter(_beyond(self.keys, values))
+
+        rows = list(qs[: self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+
+        if backwards:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, bool(cursor)
+
+        next_cursor = encode_cursor(self._position(rows[-1])) if rows and has_next else None
+        previous_cursor = (
+            encode_cursor(self._position(rows[0]), backwards=True) if rows and has_previous else None
+        )
+
+        count = self.queryset.count() if with_count else None
+        return KeysetPage(rows, next_cursor, previous_cursor, count)
+
+
+class KeysetPagination(BasePagination):
+    """
+    DRF pagination on top of KeysetPaginator.
+
+    Query params: cursor, page_size (max 500), count=1 to include the total.
+    Views can expose `keyset_ordering` to paginate a non-default ordering.
+    """
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = "cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+
+        try:
+            page_size = min(int(request.query_params.get("page_size", self.page_size)), self.max_page_size)
+        except ValueError:
+            page_size = self.page_size
+
+        ordering = getattr(view, "keyset_ordering", None) or DEFAULT_ORDERING
+        paginator = KeysetPaginator(queryset, max(page_size, 1), ordering)
+        try:
+            self.page = paginator.page(
+                request.query_params.get(self.cursor_query_param),
+                with_count=request.query_params.get("count") in ("1", "true"),
+            )
+        except InvalidCursor as exc:
+            raise NotFound(str(exc))
+        return self.page.object_list
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        body = {
+            "next": self._link(self.page.next_cursor),
+            "previous": self._link(self.page.previous_cursor),
+        }
+        if self.page.count is not None:
+            body["count"] = self.page.count
+        body["results"] = data
+        return Response(body)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "count": {"type": "integer"},
+                "results": schema,
+            },
+        }
+
+
+def page_url(request, cursor):
+    """
+    Current URL with `cursor` swapped in (filters kept), for templates.
+    """
+    if cursor is None:
+        return None
+    return replace_query_param(remove_query_param(request.get_full_path(), "page"), "cursor", cursor)
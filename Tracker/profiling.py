@@ -0,0 +1,177 @@
+"""
+On-demand request profiling for staff.
+
+A staff member gets a signed token from the profiles page and sends it as
+the X-Tracker-Profile header or the ?_profile= query parameter. The
+request is then run under cProfile, and the profile, its SQL log and the
+view name are written to a bounded directory: the oldest profiles are
+removed once there are more than settings.TRACKER_PROFILE_KEEP.
+
+Requests without the header/parameter skip straight to the view, and the
+middleware removes itself entirely when TRACKER_PROFILING is False.
+"""
+import cProfile
+import json
+import os
+import pstats
+import re
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+from rest_framework.utils.urls import remove_query_param
+
+from .instrumentation import RequestStats
+
+
+PROFILE_HEADER = "HTTP_X_TRACKER_PROFILE"
+PROFILE_PARAM = "_profile"
+TOKEN_SALT = "Tracker.profiling"
+TOKEN_MAX_AGE = 60 * 60 * 8
+
+_PROFILE_ID_RE = re.compile(r"^\d+-[0-9a-f]{8}$")
+
+
+def profile_dir():
+    return Path(getattr(settings, "TRACKER_PROFILE_DIR", Path(settings.BASE_DIR) / ".profiles"))
+
+
+def make_token(user):
+    return signing.dumps(user.pk, salt=TOKEN_SALT, compress=True)
+
+
+def token_user(token):
+    """
+    The staff user a token was issued to, or None if it is invalid/expired
+    or the user is no longer staff.
+    """
+    try:
+        pk = signing.loads(token, salt=TOKEN_SALT, max_age=TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    return get_user_model().objects.filter(pk=pk, is_active=True, is_staff=True).first()
+
+
+# ----------------------------
+# Storage
+# ----------------------------
+
+def _paths(profile_id):
+    if not _PROFILE_ID_RE.match(profile_id):
+        raise FileNotFoundError(profile_id)
+    base = profile_dir()
+    return base / f"{profile_id}.prof", base / f"{profile_id}.json"
+
+
+def save_profile(profiler, meta):
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+
+    profile_id = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+    prof_path, meta_path = _paths(profile_id)
+    profiler.dump_stats(prof_path)
+    meta["id"] = profile_id
+    meta_path.write_text(json.dumps(meta, default=str))
+
+    prune(getattr(settings, "TRACKER_PROFILE_KEEP", 50))
+    return profile_id
+
+
+def prune(keep):
+    ids = sorted(p.stem for p in profile_dir().glob("*.json"))
+    for profile_id in ids[: max(len(ids) - keep, 0)]:
+        for path in _paths(profile_id):
+            # Another worker may be pruning the same files
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles():
+    """
+    Metadata of stored profiles, newest first.
+    """
+    profiles = []
+    for path in sorted(profile_dir().glob("*.json"), reverse=True):
+        try:
+            profiles.append(json.loads(path.read_text()))
+        except (FileNotFoundError, ValueError):
+            continue
+    return profiles
+
+
+def load_profile(profile_id):
+    prof_path, meta_path = _paths(profile_id)
+    return json.loads(meta_path.read_text()), prof_path
+
+
+def top_functions(prof_path, limit=30):
+    """
+    [{function, calls, total_s, cumulative_s}] sorted by cumulative time.
+    """
+    stats = pstats.Stats(str(prof_path))
+    rows = []
+    for (filename, line, name), (cc, nc, tt, ct, _) in stats.stats.items():
+        rows.append({
+            "function": f"{filename}:{line}({name})",
+            "calls": nc if nc == cc else f"{nc}/{cc}",
+            "total_s": round(tt, 6),
+            "cumulative_s": round(ct, 6),
+        })
+    rows.sort(key=lambda row: row["cumulative_s"], reverse=True)
+    return rows[:limit]
+
+
+# ----------------------------
+# Middleware
+# ----------------------------
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, "TRACKER_PROFILING", True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = request.META.get(PROFILE_HEADER) or request.GET.get(PROFILE_PARAM)
+        if not token:
+            return self.get_response(request)
+
+        user = token_user(token)
+        if user is None:
+            return self.get_response(request)
+
+        sql = RequestStats()
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        with connections["default"].execute_wrapper(sql):
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        elapsed = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        query_stats = getattr(request, "query_stats", None)
+        profile_id = save_profile(profiler, {
+            "created": timezone.now().isoformat(timespec="seconds"),
+            "method": request.method,
+            "path": remove_query_param(request.get_full_path(), PROFILE_PARAM),
+            "view": getattr(query_stats, "view_name", None) or (match.view_name if match else None),
+            "status": response.status_code,
+            "profiled_by": user.get_username(),
+            "elapsed_ms": round(elapsed * 1000, 3),
+            "sql_ms": round(sql.sql_time * 1000, 3),
+            "sql": [{"sql": statement, "ms": round(duration * 1000, 3)} for statement, duration in sql.queries],
+            "streaming": getattr(response, "streaming", False),
+        })
+        response["X-Tracker-Profile-Id"] = profile_id
+        return response
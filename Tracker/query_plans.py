@@ -0,0 +1,154 @@
+"""
+Query-shape index advisor.
+
+Runs the queries behind services.py, dashboard.py, views.py, api_urls.py and
+analytics_api.py for one user, captures the SQL they issue and collects
+EXPLAIN QUERY PLAN output for each statement. Plans that scan a Tracker
+table without an index, or sort through a temporary B-tree, are flagged.
+"""
+import re
+from datetime import timedelta
+
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from .dashboard import DashboardSnapshot
+from .models import Category, Transaction, Wallet
+from .pagination import KeysetPaginator
+from .rollups import rollup_totals
+from . import services
+
+
+TRACKER_TABLE_RE = re.compile(r'"?(Tracker_\w+)"?')
+FULL_SCAN_RE = re.compile(r"^SCAN (\w+)(?! USING)")
+TEMP_BTREE = "USE TEMP B-TREE"
+# Must be in ALLOWED_HOSTS: pagination builds absolute next/previous links.
+HOST = "localhost"
+
+
+def _view(view_cls, user, params=None, **kwargs):
+    request = RequestFactory().get("/", params or {}, HTTP_HOST=HOST)
+    request.user = user
+    response = view_cls.as_view()(request, **kwargs)
+    if hasattr(response, "render"):
+        response.render()
+    if getattr(response, "streaming", False):
+        for _ in response.streaming_content:
+            pass
+    return response
+
+
+def _api(viewset_or_view, actions, user, params=None, **kwargs):
+    request = APIRequestFactory().get("/", params or {}, HTTP_HOST=HOST)
+    force_authenticate(request, user=user)
+    view = viewset_or_view.as_view(actions) if actions else viewset_or_view.as_view()
+    response = view(request, **kwargs)
+    response.render()
+    return response
+
+
+def query_shapes(user):
+    """
+    (name, callable) pairs; each callable issues the queries of one code path.
+    """
+    from .analytics_api import MonthlySummaryAPIView
+    from .api_urls import TransactionViewSet, WalletViewSet
+    from . import views
+
+    today = timezone.localdate()
+    month_start, month_end = services.get_month_window(today)
+    history_start = DashboardSnapshot.history_start(month_start)
+    wallet = Wallet.objects.filter(owner=user).first()
+    category = Category.objects.filter(owner=user).first()
+    active = Transaction.objects.for_user(user)
+
+    deep = KeysetPaginator(active, 10)
+    cursor = None
+    for _ in range(20):
+        cursor = deep.page(cursor).next_cursor or cursor
+
+    return [
+        ("services.monthly_totals_for_user",
+         lambda: services.monthly_totals_for_user.uncached(user, month_start, month_end)),
+        ("services.category_breakdown_for_user",
+         lambda: services.category_breakdown_for_user.uncached(user, month_start, month_end)),
+        ("services.budget_alerts_for_user",
+         lambda: services.budget_alerts_for_user.uncached(user, month_start, month_end)),
+        ("services.monthly_history_for_user",
+         lambda: services.monthly_history_for_user.uncached(user, history_start, month_end)),
+        ("rollups.rollup_totals (mid-month window)",
+         lambda: rollup_totals(user, month_start + timedelta(days=3), month_end, group_by=["t_type"])),
+        ("dashboard.DashboardSnapshot.build",
+         lambda: DashboardSnapshot.build(user, today)),
+        ("views.TransactionListView",
+         lambda: _view(views.TransactionListView, user)),
+        ("views.TransactionListView (deep cursor)",
+         lambda: _view(views.TransactionListView, user, {"cursor": cursor})),
+        ("views.TransactionListView (type + date range)",
+         lambda: _view(views.TransactionListView, user, {
+             "type": Transaction.EXPENSE, "date_from": str(month_start - timedelta(days=90)), "date_to": str(today),
+         })),
+        ("views.TransactionListView (category)",
+         lambda: _view(views.TransactionListView, user, {"category": category.pk})),
+        ("views.TransactionListView (wallet)",
+         lambda: _view(views.TransactionListView, user, {"wallet": wallet.pk})),
+        ("views.TransactionListView (search)",
+         lambda: _view(views.TransactionListView, user, {"search": "lunch"})),
+        ("views.TransactionExportCSVView",
+         lambda: _view(views.TransactionExportCSVView, user, {"type": Transaction.EXPENSE})),
+        ("api.TransactionViewSet.list",
+         lambda: _api(TransactionViewSet, {"get": "list"}, user)),
+        ("api.TransactionViewSet.list (ordering=-amount)",
+         lambda: _api(TransactionViewSet, {"get": "list"}, user, {"ordering": "-amount"})),
+        ("api.TransactionViewSet.list (t_type + wallet)",
+         lambda: _api(TransactionViewSet, {"get": "list"}, user, {"t_type": Transaction.INCOME, "wallet": wallet.pk})),
+        ("api.WalletViewSet.balance",
+         lambda: _api(WalletViewSet, {"get": "balance"}, user, pk=wallet.pk)),
+        ("analytics_api.MonthlySummaryAPIView",
+         lambda: _api(MonthlySummaryAPIView, None, user, {"month": str(month_start)})),
+    ]
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def issues_in(plan):
+    issues = []
+    for line in plan:
+        match = FULL_SCAN_RE.match(line.strip())
+        if match and match.group(1).startswith("Tracker_"):
+            issues.append(f"full scan of {match.group(1)}")
+        if TEMP_BTREE in line:
+            issues.append(line.strip().lower())
+    return issues
+
+
+def advise(user):
+    """
+    Returns [{"shape", "queries": [{"sql", "plan", "issues"}]}] for every shape.
+    Only SELECTs touching Tracker tables are explained. Raises ValueError on
+    databases other than SQLite.
+    """
+    if connection.vendor != "sqlite":
+        raise ValueError("EXPLAIN QUERY PLAN parsing is only implemented for SQLite.")
+
+    report = []
+    for name, run in query_shapes(user):
+        with CaptureQueriesContext(connection) as ctx:
+            run()
+
+        queries = []
+        for captured in ctx.captured_queries:
+            sql = captured["sql"]
+            if not sql.lstrip().upper().startswith("SELECT") or not TRACKER_TABLE_RE.search(sql):
+                continue
+            plan = explain(sql)
+            queries.append({"sql": sql, "plan": plan, "issues": issues_in(plan)})
+        report.append({"shape": name, "queries": queries})
+    return report
@@ -0,0 +1,180 @@
+"""
+Recurring transactions: materializes the due occurrences of every
+RecurringTransaction as ordinary Transaction rows.
+
+materialize_due() walks the active rules with next_date <= today in
+(next_date, id) keyset chunks from the partial due index. Each chunk is one
+DB transaction: the rules are locked, every occurrence from next_date up to
+today (or the rule's end_date) is generated in memory, the ones already
+written are looked up in one query and the rest go in with one bulk_create.
+Rollups, wallet balances and the cache are then updated once for the chunk
+via record_transaction_changes, and next_date moves past today with one
+bulk_update. A rule that missed months (the command did not run, a backdated
+start_date) catches up in the same pass, at the same number of queries.
+
+(recurring, occurrence) is unique on Transaction, so an occurrence is
+written at most once: a re-run or a next_date moved back finds the rows
+already there and skips them. Occurrences the user deleted (soft delete)
+stay deleted.
+
+Overlapping runs are serialized per chunk. Elsewhere select_for_update()
+makes the second run wait on the rules and then skip the ones the first
+advanced. On SQLite, where it is a no-op and a transaction only takes the
+write lock at its first write, each chunk starts with a write that matches
+nothing (see _lock_for_write); the second run waits for the lock, up to the
+connection timeout, instead of reading the same rules and failing on the
+unique constraint or with "database is locked".
+"""
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import RecurringTransaction, Transaction
+from .rollups import month_end, state_of
+from .services import record_transaction_changes
+
+
+BATCH_SIZE = 500
+
+
+def add_months(day, months, anchor):
+    """
+    `day` moved by `months`, on day `anchor` of the month or its last day
+    when the month is shorter (Jan 31 -> Feb 28 -> Mar 31).
+    """
+    index = day.year * 12 + day.month - 1 + months
+    first = day.replace(year=index // 12, month=index % 12 + 1, day=1)
+    return first.replace(day=min(anchor, month_end(first).day))
+
+
+def nth_occurrence(rule, n):
+    start, step = rule.start_date, rule.interval
+    if rule.frequency == RecurringTransaction.DAILY:
+        return start + timedelta(days=n * step)
+    if rule.frequency == RecurringTransaction.WEEKLY:
+        return start + timedelta(weeks=n * step)
+    if rule.frequency == RecurringTransaction.YEARLY:
+        return add_months(start, 12 * n * step, start.day)
+    return add_months(start, n * step, start.day)
+
+
+def _first_index(rule, day):
+    """
+    Index of the first occurrence on or after `day`.
+    """
+    start, step = rule.start_date, rule.interval
+    if day <= start:
+        return 0
+    if rule.frequency in (RecurringTransaction.DAILY, RecurringTransaction.WEEKLY):
+        days = step * (7 if rule.frequency == RecurringTransaction.WEEKLY else 1)
+        return -(-(day - start).days // days)
+    months = (day.year - start.year) * 12 + day.month - start.month
+    n = max(months // (step * (12 if rule.frequency == RecurringTransaction.YEARLY else 1)) - 1, 0)
+    while nth_occurrence(rule, n) < day:
+        n += 1
+    return n
+
+
+def due_dates(rule, today):
+    """
+    (occurrence dates from next_date up to today and end_date, the next one
+    after them).
+    """
+    last = min(today, rule.end_date) if rule.end_date else today
+    n = _first_index(rule, rule.next_date)
+    dates, day = [], nth_occurrence(rule, n)
+    while day <= last:
+        dates.append(day)
+        n += 1
+        day = nth_occurrence(rule, n)
+    return dates, day
+
+
+@dataclass
+class MaterializeReport:
+    rules: int = 0
+    created: int = 0
+    skipped: int = 0
+    finished: int = 0
+
+
+def _after(position):
+    if position is None:
+        return Q()
+    next_date, pk = position
+    return Q(next_date__gt=next_date) | Q(next_date=next_date, id__gt=pk)
+
+
+def _lock_for_write():
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'UPDATE "{RecurringTransaction._meta.db_table}" SET id = id WHERE 0')
+
+
+def materialize_due(today=None, owner=None, batch_size=BATCH_SIZE, dry_run=False):
+    """
+    Writes every due occurrence of the active rules (of `owner`, or of every
+    user) up to `today` and returns a MaterializeReport. With dry_run the
+    occurrences are counted and nothing is written.
+    """
+    today = today or timezone.localdate()
+    due = RecurringTransaction.objects.filter(is_active=True, next_date__lte=today)
+    if owner is not None:
+        due = due.filter(owner=owner)
+
+    report, position = MaterializeReport(), None
+    while True:
+        with transaction.atomic():
+            if not dry_run:
+                _lock_for_write()
+            rules = list(due.filter(_after(position)).order_by("next_date", "id").select_for_update()[:batch_size])
+            if not rules:
+                return report
+            position = (rules[-1].next_date, rules[-1].pk)
+            _materialize_chunk(rules, today, report, dry_run)
+
+
+def _materialize_chunk(rules, today, report, dry_run):
+    plans = [(rule, *due_dates(rule, today)) for rule in rules]
+    written = set(
+        Transaction.objects.filter(
+            recurring_id__in=[rule.pk for rule in rules], occurrence__gte=min(rule.next_date for rule in rules),
+        ).values_list("recurring_id", "occurrence")
+    )
+
+    objs = []
+    for rule, dates, _ in plans:
+        for day in dates:
+            if (rule.pk, day) in written:
+                report.skipped += 1
+                continue
+            objs.append(Transaction(
+                owner_id=rule.owner_id,
+                wallet_id=rule.wallet_id,
+                category_id=rule.category_id,
+                t_type=rule.t_type,
+                amount=rule.amount,
+                date=day,
+                note=rule.note,
+                recurring_id=rule.pk,
+                occurrence=day,
+            ))
+    report.rules += len(rules)
+    report.created += len(objs)
+    report.finished += sum(bool(rule.end_date and following > rule.end_date) for rule, _, following in plans)
+    if dry_run:
+        return
+
+    Transaction.objects.bulk_create(objs, batch_size=BATCH_SIZE)
+    record_transaction_changes((None, state_of(obj)) for obj in objs)
+
+    now = timezone.now()
+    for rule, _, following in plans:
+        rule.next_date = following
+        rule.is_active = not (rule.end_date and following > rule.end_date)
+        rule.updated_at = now
+    RecurringTransaction.objects.bulk_update(rules, ["next_date", "is_active", "updated_at"], batch_size=BATCH_SIZE)
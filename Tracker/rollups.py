@@ -0,0 +1,287 @@
+"""
+Incrementally maintained monthly rollups.
+
+Every transaction write is turned into a (key -> amount, count) delta and
+applied to MonthlyRollup, so analytics read a handful of pre-aggregated rows
+instead of scanning raw transactions.
+"""
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import MonthlyRollup, Transaction
+
+
+# Snapshot of the fields that decide where (and whether) a transaction counts.
+TxnState = namedtuple(
+    "TxnState",
+    ["owner_id", "wallet_id", "category_id", "date", "t_type", "amount", "is_deleted"],
+)
+
+STATE_FIELDS = TxnState._fields
+
+
+def month_of(d):
+    return d.replace(day=1)
+
+
+def month_end(month_start):
+    return (month_start.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+
+
+def state_of(txn, base=None, update_fields=None):
+    """
+    Builds a TxnState from a Transaction instance.
+
+    With `update_fields` only those fields are taken from the instance and the
+    rest from `base`, mirroring what save(update_fields=...) actually wrote.
+    """
+    if base is not None and update_fields is not None:
+        attnames = {Transaction._meta.get_field(name).attname for name in update_fields}
+        values = {f: getattr(txn, f) if f in attnames else getattr(base, f) for f in STATE_FIELDS}
+    else:
+        values = {f: getattr(txn, f) for f in STATE_FIELDS}
+
+    # Instances built by hand may still carry raw strings for these
+    values["date"] = Transaction._meta.get_field("date").to_python(values["date"])
+    values["amount"] = Transaction._meta.get_field("amount").to_python(values["amount"])
+    return TxnState(**values)
+
+
+def stored_state(pk):
+    """
+    Reads the current DB state of a transaction (None if it does not exist).
+    """
+    row = Transaction.objects.filter(pk=pk).values_list(*STATE_FIELDS).first()
+    return TxnState(*row) if row else None
+
+
+def _key(state):
+    return (state.owner_id, state.wallet_id, state.category_id, month_of(state.date), state.t_type)
+
+
+def deltas_for(changes):
+    """
+    Folds (old_state, new_state) pairs into {key: [amount, count]} deltas.
+    Deleted or missing states contribute nothing.
+    """
+    deltas = defaultdict(lambda: [Decimal("0"), 0])
+    for old, new in changes:
+        if old is not None and not old.is_deleted:
+            d = deltas[_key(old)]
+            d[0] -= old.amount
+            d[1] -= 1
+        if new is not None and not new.is_deleted:
+            d = deltas[_key(new)]
+            d[0] += new.amount
+            d[1] += 1
+    return deltas
+
+
+def _bucket(key):
+    owner_id, wallet_id, category_id, month, t_type = key
+    return {
+        "owner_id": owner_id,
+        "wallet_id": wallet_id,
+        "category_id": category_id,
+        "month": month,
+        "t_type": t_type,
+    }
+
+
+def apply_deltas(deltas):
+    """
+    Applies deltas with F-expressions.
+
+    Negative-only deltas never create rows: the bucket they subtract from was
+    created when the transaction was added (or is being cascaded away).
+    """
+    for key, (amount, count) in deltas.items():
+        if not amount and not count:
+            continue
+
+        bucket = _bucket(key)
+        pk = MonthlyRollup.objects.filter(**bucket).values_list("pk", flat=True).first()
+
+        if pk is None:
+            if count <= 0:
+                continue
+            try:
+                with transaction.atomic():
+                    MonthlyRollup.objects.create(total=amount, txn_count=count, **bucket)
+                continue
+            except IntegrityError:
+                pk = MonthlyRollup.objects.filter(**bucket).values_list("pk", flat=True).first()
+
+        MonthlyRollup.objects.filter(pk=pk).update(
+            total=F("total") + amount,
+            txn_count=F("txn_count") + count,
+        )
+
+
+def record_changes(changes):
+    """
+    Applies a batch of (old_state, new_state) pairs to the rollups.
+    Use this from bulk write paths that bypass model signals.
+    """
+    with transaction.atomic():
+        apply_deltas(deltas_for(changes))
+
+
+def record_change(old, new):
+    record_changes([(old, new)])
+
+
+def move_category_to_uncategorized(category):
+    """
+    Category deletion sets Transaction.category to NULL without signals, so
+    move its rollup totals into the uncategorized bucket before it cascades.
+    """
+    deltas = defaultdict(lambda: [Decimal("0"), 0])
+    rows = MonthlyRollup.objects.filter(category=category).values_list(
+        "owner_id", "wallet_id", "month", "t_type", "total", "txn_count"
+    )
+    for owner_id, wallet_id, month, t_type, total, count in rows:
+        d = deltas[(owner_id, wallet_id, None, month, t_type)]
+        d[0] += total
+        d[1] += count
+    apply_deltas(deltas)
+
+
+# ----------------------------
+# Reads
+# ----------------------------
+
+def _grouped(qs, group_by, **aggregates):
+    if not group_by:
+        row = qs.aggregate(**aggregates)
+        return [row] if row["count"] else []
+    return qs.values(*group_by).annotate(**aggregates).order_by()
+
+
+def rollup_totals(user, start, end, group_by=(), **filters):
+    """
+    Sums transactions in [start, end] grouped by `group_by`.
+
+    Whole months come from MonthlyRollup. For partially covered edge months the
+    days outside the window are subtracted using raw rows, which for the usual
+    "this month so far" window is only the handful of future-dated entries.
+
+    Returns a list of dicts with the group_by fields plus `total` and `count`.
+    """
+    group_by = tuple(group_by)
+    first_month, last_month = month_of(start), month_of(end)
+
+    rollups = MonthlyRollup.objects.filter(
+        owner=user, month__gte=first_month, month__lte=last_month, **filters
+    )
+
+    results = {}
+    for row in _grouped(rollups, group_by, total=Sum("total"), count=Sum("txn_count")):
+        key = tuple(row[g] for g in group_by)
+        results[key] = [row["total"], row["count"]]
+
+    outside = Q()
+    if start > first_month:
+        outside |= Q(date__gte=first_month, date__lt=start)
+    if end < month_end(last_month):
+        outside |= Q(date__gt=end, date__lte=month_end(last_month))
+
+    if outside:
+        raw = Transaction.objects.for_user(user).filter(outside, **filters)
+        if "month" in group_by:
+            raw = raw.annotate(month=TruncMonth("date"))
+        for row in _grouped(raw, group_by, total=Sum("amount"), count=Count("pk")):
+            key = tuple(row[g] for g in group_by)
+            if key in results:
+                results[key][0] -= row["total"]
+                results[key][1] -= row["count"]
+
+    return [
+        dict(zip(group_by, key), total=total, count=count)
+        for key, (total, count) in results.items()
+        if count
+    ]
+
+
+# ----------------------------
+# Rebuild / verify
+# ----------------------------
+
+def expected_rollups(user=None):
+    """
+    Aggregates raw active transactions into {key: (total, count)}.
+    """
+    qs = Transaction.objects.active()
+    if user is not None:
+        qs = qs.filter(owner=user)
+
+    rows = (
+        qs.annotate(month=TruncMonth("date"))
+        .values("owner_id", "wallet_id", "category_id", "month", "t_type")
+        .annotate(total=Sum("amount"), count=Count("pk"))
+        .order_by()
+    )
+    return {
+        (r["owner_id"], r["wallet_id"], r["category_id"], r["month"], r["t_type"]): (r["total"], r["count"])
+        for r in rows
+    }
+
+
+def stored_rollups(user=None):
+    qs = MonthlyRollup.objects.all()
+    if user is not None:
+        qs = qs.filter(owner=user)
+
+    stored = defaultdict(lambda: [Decimal("0"), 0])
+    for owner_id, wallet_id, category_id, month, t_type, total, count in qs.values_list(
+        "owner_id", "wallet_id", "category_id", "month", "t_type", "total", "txn_count"
+    ):
+        s = stored[(owner_id, wallet_id, category_id, month, t_type)]
+        s[0] += total
+        s[1] += count
+    return {k: tuple(v) for k, v in stored.items() if v[1]}
+
+
+def verify_rollups(user=None):
+    """
+    Returns a list of (key, expected, stored) tuples for every bucket that drifted.
+    """
+    expected = expected_rollups(user)
+    stored = stored_rollups(user)
+
+    drift = []
+    for key in expected.keys() | stored.keys():
+        exp = expected.get(key, (Decimal("0"), 0))
+        got = stored.get(key, (Decimal("0"), 0))
+        if exp[0] != got[0] or exp[1] != got[1]:
+            drift.append((key, exp, got))
+    return drift
+
+
+def rebuild_rollups(user=None, batch_size=1000):
+    """
+    Throws away stored rollups and recomputes them from raw transactions.
+    Returns the number of rollup rows written.
+    """
+    expected = expected_rollups(user)
+
+    with transaction.atomic():
+        qs = MonthlyRollup.objects.all()
+        if user is not None:
+            qs = qs.filter(owner=user)
+        qs.delete()
+
+        MonthlyRollup.objects.bulk_create(
+            [
+                MonthlyRollup(total=total, txn_count=count, **_bucket(key))
+                for key, (total, count) in expected.items()
+            ],
+            batch_size=batch_size,
+        )
+
+    return len(expected)
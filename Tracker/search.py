@@ -0,0 +1,146 @@
+"""
+Full-text search over Transaction.note.
+
+The backend is chosen by settings.TRACKER_SEARCH_BACKEND (a dotted path) or,
+by default, from the database vendor: SQLite gets an FTS5 shadow table kept
+in sync by triggers (see migrations 0005 and 0013), anything else falls back
+to icontains until it plugs in its own backend.
+
+The FTS5 table holds active rows only, with their owner_id stored unindexed,
+so a search scoped by for_user() only returns that user's rowids from the
+MATCH subquery instead of every user's matches.
+"""
+import re
+
+from django.conf import settings
+from django.db import connection, connections
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Transaction
+
+
+FTS_TABLE = "tracker_transaction_fts"
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class BaseSearchBackend:
+    """
+    Fallback backend: substring match, no ranking.
+    """
+    supports_ranking = False
+
+    def filter(self, queryset, query):
+        return queryset.filter(note__icontains=query)
+
+    def rank(self, queryset, query):
+        """
+        Filters and annotates `search_rank` (lower is better).
+        """
+        return self.filter(queryset, query).annotate(search_rank=RawSQL("0", []))
+
+    def rebuild(self):
+        return 0
+
+
+class SQLiteFTS5Backend(BaseSearchBackend):
+    """
+    FTS5 index with prefix indexes, so "lun" matches "Lunch". Every search
+    term must match (AND); ranking uses bm25().
+    """
+    supports_ranking = True
+
+    @staticmethod
+    def match_expression(query):
+        tokens = _TOKEN_RE.findall(query)
+        return " ".join(f'"{token}"*' for token in tokens)
+
+    def filter(self, queryset, query):
+        match = self.match_expression(query)
+        if not match:
+            return queryset
+        sql, params = f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match]
+        if queryset.owner_id is not None:
+            sql, params = f"{sql} AND owner_id = %s", [*params, queryset.owner_id]
+        return queryset.filter(id__in=RawSQL(sql, params))
+
+    def rank(self, queryset, query):
+        match = self.match_expression(query)
+        if not match:
+            return queryset.annotate(search_rank=RawSQL("0", []))
+
+        table = queryset.model._meta.db_table
+        rank_sql = (
+            f'(SELECT bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = "{table}"."id")'
+        )
+        return self.filter(queryset, query).annotate(search_rank=RawSQL(rank_sql, [match]))
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE}(rowid, note, owner_id) '
+                f'SELECT id, note, owner_id FROM "{Transaction._meta.db_table}" WHERE NOT is_deleted'
+            )
+            return cursor.rowcount
+
+
+TRIGGER_SQL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON "Tracker_transaction" BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, note, owner_id)
+        SELECT new.id, new.note, new.owner_id WHERE NOT new.is_deleted;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF note, owner_id, is_deleted ON "Tracker_transaction" BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE}(rowid, note, owner_id)
+        SELECT new.id, new.note, new.owner_id WHERE NOT new.is_deleted;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON "Tracker_transaction" BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+]
+
+
+def ensure_sync_triggers(using="default"):
+    """
+    SQLite drops triggers when a migration rebuilds the transaction table,
+    so this re-creates them after every migrate (see signals.py).
+    """
+    conn = connections[using]
+    if not fts5_available(conn):
+        return
+    with conn.cursor() as cursor:
+        for sql in TRIGGER_SQL:
+            cursor.execute(sql)
+
+
+def fts5_available(conn=connection):
+    if conn.vendor != "sqlite":
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        path = getattr(settings, "TRACKER_SEARCH_BACKEND", None)
+        if path:
+            _backend = import_string(path)()
+        elif fts5_available():
+            _backend = SQLiteFTS5Backend()
+        else:
+            _backend = BaseSearchBackend()
+    return _backend
@@ -0,0 +1,100 @@
+"""
+Deterministic synthetic data for query-plan checks and benchmarks.
+
+Everything is inserted with bulk_create; rollups and wallet balances are
+then brought up to date in one pass through record_transaction_changes.
+
+History ends on SEED_END unless asked otherwise, so a seed run gives the
+same rows whatever day it runs and benchmark numbers compare across days.
+"""
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from .models import Budget, Category, Transaction, Wallet
+from .rollups import month_of, state_of
+from .services import record_transaction_changes
+
+
+WALLET_NAMES = ["Main Wallet", "M-Pesa", "Bank", "Cash", "Savings", "Card"]
+CATEGORY_NAMES = [
+    "Food", "Rent", "Transport", "Utilities", "Airtime", "Health", "Shopping",
+    "Entertainment", "Education", "Gifts", "Travel", "Fees", "Salary", "Side Hustle",
+]
+SEED_END = date(2026, 6, 30)
+
+NOTE_WORDS = [
+    "lunch", "dinner", "taxi", "matatu", "groceries", "rent", "electricity", "water",
+    "bundles", "salary", "bonus", "coffee", "books", "school", "fuel", "pharmacy",
+]
+
+
+def seed_user(
+    username,
+    *,
+    wallets=3,
+    categories=10,
+    years=2,
+    txns_per_day=3,
+    budgets_per_month=5,
+    end=None,
+    seed=0,
+    batch_size=2000,
+):
+    """
+    Creates one user with `years` of history ending at `end` (default SEED_END).
+    Returns (user, transaction_count). Same arguments -> same data.
+    """
+    rng = random.Random(f"{seed}:{username}")
+    end = end or SEED_END
+    start = end - timedelta(days=365 * years)
+
+    with transaction.atomic():
+        user = get_user_model().objects.create_user(username=username, password="bench-pass-123")
+
+        # The signal already created "Main Wallet"
+        for name in WALLET_NAMES[1:wallets]:
+            Wallet.objects.create(owner=user, name=name)
+        wallet_ids = list(Wallet.objects.filter(owner=user).values_list("pk", flat=True))
+
+        Category.objects.bulk_create(
+            [Category(owner=user, name=name) for name in CATEGORY_NAMES[:categories]]
+        )
+        category_ids = list(Category.objects.filter(owner=user).values_list("pk", flat=True))
+
+        objs = []
+        day = start
+        while day <= end:
+            for _ in range(rng.randint(0, txns_per_day * 2)):
+                income = rng.random() < 0.1
+                objs.append(Transaction(
+                    owner=user,
+                    wallet_id=rng.choice(wallet_ids),
+                    category_id=rng.choice(category_ids) if rng.random() < 0.9 else None,
+                    t_type=Transaction.INCOME if income else Transaction.EXPENSE,
+                    amount=Decimal(rng.randint(5000 if income else 50, 90000 if income else 5000)) / 100,
+                    date=day,
+                    note=" ".join(rng.sample(NOTE_WORDS, rng.randint(0, 3))),
+                    is_deleted=rng.random() < 0.02,
+                ))
+            day += timedelta(days=1)
+
+        Transaction.objects.bulk_create(objs, batch_size=batch_size)
+        record_transaction_changes((None, state_of(obj)) for obj in objs)
+
+        if budgets_per_month:
+            month = month_of(start)
+            budget_objs = []
+            while month <= end:
+                for category_id in rng.sample(category_ids, min(budgets_per_month, len(category_ids))):
+                    budget_objs.append(Budget(
+                        owner=user, category_id=category_id, month=month,
+                        limit_amount=Decimal(rng.randint(1000, 20000)),
+                    ))
+                month = month_of(month + timedelta(days=32))
+            Budget.objects.bulk_create(budget_objs, batch_size=batch_size)
+
+    return user, len(objs)
@@ -1,26 +1,192 @@
-from rest_framework import serializers
+import decimal
+from decimal import Decimal
+
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
 from .models import Wallet, Category, Transaction, Budget
 
 
-class WalletSerializer(serializers.ModelSerializer):
+class DynamicFieldsMixin:
+    """
+    Output shaping driven by the serializer context (set by the API views
+    from ?fields= and ?expand=):
+
+    - "fields": names to keep; everything else is dropped.
+    - "expand": relations in `expandable_fields` to inline as nested,
+      read-only objects instead of bare ids.
+    """
+    expandable_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in self.context.get("expand") or ():
+            if name in self.expandable_fields and name in self.fields:
+                self.fields[name] = self.expandable_fields[name](read_only=True)
+
+        wanted = self.context.get("fields")
+        if wanted:
+            for name in set(self.fields) - set(wanted):
+                self.fields.pop(name)
+
+
+class WalletSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Wallet
-        fields = ["id", "name", "currency"]
+        fields = ["id", "name", "currency", "income", "expense", "balance"]
+        # Running totals kept by Tracker.balances
+        read_only_fields = ["income", "expense", "balance"]
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = ["id", "name"]
 
 
-class TransactionSerializer(serializers.ModelSerializer):
+class TransactionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {"wallet": WalletSerializer, "category": CategorySerializer}
+
     class Meta:
         model = Transaction
         fields = ["id", "wallet", "t_type", "amount", "category", "date", "note", "created_at", "updated_at"]
 
 
-class BudgetSerializer(serializers.ModelSerializer):
+class RowEncoder:
+    """
+    Read-only fast path for list responses: encodes .values_list() rows into
+    the same dicts `serializer_class(instances, many=True).data` produces,
+    without building model instances or walking the field tree per row.
+
+    The conversion for each column is chosen once, from the serializer's own
+    field, and mirrors that field's to_representation(). Anything the
+    encoder doesn't special-case falls back to the field itself, so the
+    output stays identical (see the equivalence test).
+    """
+
+    def __init__(self, serializer_class, fields=None):
+        """
+        `fields` narrows the output like the serializer's "fields" context.
+        """
+        fields = serializer_class(context={"fields": fields}).fields
+        self.names = [name for name, field in fields.items() if not field.write_only]
+        self.columns = [fields[name].source for name in self.names]
+        self.converters = [self._converter(fields[name]) for name in self.names]
+
+    @staticmethod
+    def _converter(field):
+        """
+        fn(value) for a non-None value, or None when the value passes through.
+        """
+        if isinstance(field, (serializers.PrimaryKeyRelatedField, serializers.IntegerField)):
+            return None
+        if type(field) is serializers.CharField:
+            return str
+        if type(field) is serializers.ChoiceField:
+            choices = field.choice_strings_to_values
+            return lambda value: value if value == "" else choices.get(str(value), value)
+
+        if isinstance(field, serializers.DecimalField):
+            coerce = getattr(field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING)
+            if not coerce or field.localize or field.normalize_output or field.decimal_places is None:
+                return field.to_representation
+            exponent = Decimal(".1") ** field.decimal_places
+            context = decimal.getcontext().copy()
+            if field.max_digits is not None:
+                context.prec = field.max_digits
+            rounding = field.rounding
+
+            def to_decimal_string(value):
+                if not isinstance(value, Decimal):
+                    value = Decimal(str(value).strip())
+                return f"{value.quantize(exponent, rounding=rounding, context=context):f}"
+            return to_decimal_string
+
+        if isinstance(field, serializers.DateTimeField):
+            output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+            if output_format is None or output_format.lower() != ISO_8601:
+                return field.to_representation
+            return _DateTimeColumn(field)
+
+        if isinstance(field, serializers.DateField):
+            output_format = getattr(field, "format", api_settings.DATE_FORMAT)
+            if output_format is None or output_format.lower() != ISO_8601:
+                return field.to_representation
+            return lambda value: value if isinstance(value, str) else value.isoformat()
+
+        return field.to_representation
+
+    def _bound_converters(self):
+        return [c.bind() if isinstance(c, _DateTimeColumn) else c for c in self.converters]
+
+    def encode(self, row, converters=None):
+        """
+        `row` is a sequence whose first len(self.columns) items are self.columns.
+        """
+        converters = converters or self._bound_converters()
+        return {
+            name: value if value is None or convert is None else convert(value)
+            for name, convert, value in zip(self.names, converters, row)
+        }
+
+    def encode_many(self, rows):
+        converters = self._bound_converters()
+        return [self.encode(row, converters) for row in rows]
+
+
+class _DateTimeColumn:
+    """
+    DateTimeField output. The field's timezone can depend on the active
+    timezone, so it is resolved per encode_many() call rather than per value.
+    """
+
+    def __init__(self, field):
+        self.field = field
+
+    def bind(self):
+        field = self.field
+        tz = field.timezone if hasattr(field, "timezone") else field.default_timezone()
+
+        def to_iso_datetime(value):
+            if isinstance(value, str):
+                return value
+            if tz is not None and value.tzinfo is not None:
+                value = value.astimezone(tz)
+            else:
+                value = field.enforce_timezone(value)
+            value = value.isoformat()
+            return value[:-6] + "Z" if value.endswith("+00:00") else value
+        return to_iso_datetime
+
+
+class BudgetSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {"category": CategorySerializer}
+
     class Meta:
         model = Budget
         fields = ["id", "category", "month", "limit_amount"]
+
+
+class TransactionBatchItemSerializer(serializers.Serializer):
+    """
+    Field validation for one item of a batch write. Wallet and category are
+    plain ids checked against sets loaded once per batch (context
+    "wallet_ids" / "category_ids"), so validating an item never queries.
+    """
+    id = serializers.IntegerField(required=False)
+    wallet = serializers.IntegerField()
+    t_type = serializers.ChoiceField(choices=Transaction.TYPE_CHOICES, default=Transaction.EXPENSE)
+    amount = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=Decimal("0.01"))
+    category = serializers.IntegerField(required=False, allow_null=True)
+    date = serializers.DateField()
+    note = serializers.CharField(max_length=255, required=False, allow_blank=True)
+
+    def validate_wallet(self, value):
+        if value not in self.context["wallet_ids"]:
+            raise serializers.ValidationError("Invalid wallet selection.")
+        return value
+
+    def validate_category(self, value):
+        if value is not None and value not in self.context["category_ids"]:
+            raise serializers.ValidationError("Invalid category selection.")
+        return value
@@ -1,7 +1,12 @@
-from django.db.models import Sum
-from django.db.models.functions import TruncMonth
+from functools import wraps
 
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections, connection
+
+from . import balances, live, rollups
+from .caching import cached_for_user, invalidate_user
 from .models import Transaction, Budget
+from .rollups import rollup_totals
 
 
 def get_month_window(today):
@@ -13,73 +18,66 @@ def get_month_window(today):
     return month_start, today
 
 
+@cached_for_user("monthly_totals")
 def monthly_totals_for_user(user, month_start, month_end):
     """
     Returns (income_total, expense_total) for a given month window.
     """
-    month_txns = Transaction.objects.for_user(user).filter(date__gte=month_start, date__lte=month_end)
-
-    income = (
-        month_txns.filter(t_type=Transaction.INCOME)
-        .aggregate(total=Sum("amount"))["total"]
-        or 0
-    )
+    totals = {
+        row["t_type"]: row["total"]
+        for row in rollup_totals(user, month_start, month_end, group_by=["t_type"])
+    }
 
-    expense = (
-        month_txns.filter(t_type=Transaction.EXPENSE)
-        .aggregate(total=Sum("amount"))["total"]
-        or 0
-    )
+    income = totals.get(Transaction.INCOME, 0)
+    expense = totals.get(Transaction.EXPENSE, 0)
 
     return income, expense
 
 
+@cached_for_user("category_breakdown")
 def category_breakdown_for_user(user, month_start, month_end):
     """
     Expense breakdown grouped by category for a month window.
+    Rows look like {category__name, total}, largest first.
     """
-    month_txns = Transaction.objects.for_user(user).filter(date__gte=month_start, date__lte=month_end)
-
-    return (
-        month_txns.filter(t_type=Transaction.EXPENSE)
-        .values("category__name")
-        .annotate(total=Sum("amount"))
-        .order_by("-total")
+    rows = rollup_totals(
+        user, month_start, month_end, group_by=["category__name"], t_type=Transaction.EXPENSE
     )
 
+    return [
+        {"category__name": row["category__name"], "total": row["total"]}
+        for row in sorted(rows, key=lambda r: r["total"], reverse=True)
+    ]
+
 
 def wallet_balance_for_user(user, wallet):
     """
     Returns (income, expense, balance) for a specific wallet.
+    Reads the running totals stored on the wallet, so this is O(1).
     """
-    txns = Transaction.objects.for_user(user).filter(wallet=wallet)
-
-    income = txns.filter(t_type=Transaction.INCOME).aggregate(total=Sum("amount"))["total"] or 0
-    expense = txns.filter(t_type=Transaction.EXPENSE).aggregate(total=Sum("amount"))["total"] or 0
-
-    return income, expense, income - expense
+    return wallet.income, wallet.expense, wallet.balance
 
 
+@cached_for_user("budget_alerts")
 def budget_alerts_for_user(user, month_start, month_end):
     """
     Returns a list of budget alerts for a given month_start (first day of month).
     Each item: {category, limit, spent, over, is_exceeded}
+    For every user at once, see Tracker.budgets.
     """
     budgets = Budget.objects.filter(owner=user, month=month_start).select_related("category")
 
-    # Calculate spend per category for that month (expenses only)
-    spent_rows = (
-        Transaction.objects.for_user(user)
-        .filter(date__gte=month_start, date__lte=month_end, t_type=Transaction.EXPENSE)
-        .values("category__name")
-        .annotate(total=Sum("amount"))
+    # Calculate spend per category for that month (expenses only), matched
+    # by category id like the dashboard snapshot
+    spent_rows = rollup_totals(
+        user, month_start, month_end, group_by=["category_id"], t_type=Transaction.EXPENSE
     )
 
-    spent_map = {row["category__name"]: row["total"] for row in spent_rows}
+    spent_map = {row["category_id"]: row["total"] for row in spent_rows}
 
     alerts = []
     for b in budgets:
-        spent = spent_map.get(b.category.name, 0)
+        spent = spent_map.get(b.category_id, 0)
         over = spent - b.limit_amount
         alerts.append({
             "category": b.category.name,
@@ -92,16 +90,74 @@ def budget_alerts_for_user(user, month_start, month_end):
     return alerts
 
 
+@cached_for_user("monthly_history")
 def monthly_history_for_user(user, start_date, end_date):
     """
     Groups totals by month + type, returning rows like:
     {month, t_type, total}
     """
-    return (
-        Transaction.objects.for_user(user)
-        .filter(date__gte=start_date, date__lte=end_date)
-        .annotate(month=TruncMonth("date"))
-        .values("month", "t_type")
-        .annotate(total=Sum("amount"))
-        .order_by("month", "t_type")
-    )
+    rows = rollup_totals(user, start_date, end_date, group_by=["month", "t_type"])
+
+    return [
+        {"month": row["month"], "t_type": row["t_type"], "total": row["total"]}
+        for row in sorted(rows, key=lambda r: (r["month"], r["t_type"]))
+    ]
+
+
+def record_transaction_changes(changes):
+    """
+    Keeps rollups, wallet balances and the analytics cache in step with
+    writes that bypass model signals (bulk_create, bulk_update, update()).
+    `changes` is an iterable of (old_state, new_state) rollups.TxnState pairs.
+    """
+    changes = list(changes)
+    if not changes:
+        return
+
+    rollups.record_changes(changes)
+    balances.record_changes(changes)
+
+    owners = {state.owner_id for pair in changes for state in pair if state is not None}
+    for owner_id in owners:
+        invalidate_user(owner_id)
+        live.publish_on_commit(owner_id)
+
+
+# ----------------------------
+# Async variants
+# ----------------------------
+
+def _in_transaction():
+    return connection.in_atomic_block
+
+
+def _with_own_connection(func):
+    @wraps(func)
+    def run(*args, **kwargs):
+        # Worker threads outlive the call: close the thread's connection
+        # around it the way the request cycle does, so CONN_MAX_AGE (and
+        # CONN_HEALTH_CHECKS) apply and idle threads hold no connection
+        close_old_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return run
+
+
+def concurrent(func):
+    """
+    Async variant of a sync read for async views. Each call runs in a worker
+    thread with its own database connection, so awaiting several of them
+    with asyncio.gather() runs their queries at the same time (the async ORM
+    would run them one after another on a single thread).
+
+    Inside a transaction the call stays on the caller's connection instead:
+    other connections cannot see its uncommitted rows.
+    """
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        if await sync_to_async(_in_transaction)():
+            return await sync_to_async(func)(*args, **kwargs)
+        return await sync_to_async(_with_own_connection(func), thread_sensitive=False)(*args, **kwargs)
+    return wrapper
@@ -1,11 +1,119 @@
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_delete, pre_save
 from django.dispatch import receiver
+from django.utils import timezone
 
-from .models import Wallet
+from . import balances, live, rollups, search
+from .caching import invalidate_user
+from .models import Budget, Category, DeletionLog, Transaction, Wallet
 
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_default_wallet(sender, instance, created, **kwargs):
     if created:
         Wallet.objects.create(owner=instance, name="Main Wallet", currency="KES")
+
+
+# ----------------------------
+# Monthly rollups + wallet balances
+# ----------------------------
+
+@receiver(pre_save, sender=Transaction)
+def remember_transaction_state(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    instance._stored_state = rollups.stored_state(instance.pk) if instance.pk else None
+
+
+@receiver(post_save, sender=Transaction)
+def update_rollups_on_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    old = getattr(instance, "_stored_state", None)
+    new = rollups.state_of(instance, base=old, update_fields=update_fields)
+    rollups.record_change(old, new)
+    balances.record_change(old, new)
+
+
+@receiver(post_delete, sender=Transaction)
+def update_rollups_on_delete(sender, instance, **kwargs):
+    old = rollups.state_of(instance)
+    rollups.record_change(old, None)
+    balances.record_change(old, None)
+
+
+@receiver(pre_delete, sender=Category)
+def move_rollups_off_category(sender, instance, **kwargs):
+    rollups.move_category_to_uncategorized(instance)
+
+
+def _deleting_user(origin):
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return origin_model is get_user_model()
+
+
+# ----------------------------
+# Change feed (Tracker.sync)
+# ----------------------------
+
+@receiver(pre_delete, sender=Category)
+def touch_transactions_of_category(sender, instance, **kwargs):
+    # SET_NULL rewrites their category without touching updated_at
+    Transaction.objects.filter(category=instance).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Transaction)
+@receiver(post_delete, sender=Budget)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Wallet)
+def log_deletion(sender, instance, origin=None, **kwargs):
+    # Deleting the user removes all of their rows, tombstones included
+    if _deleting_user(origin):
+        return
+    DeletionLog.objects.create(owner_id=instance.owner_id, model=sender._meta.model_name, object_id=instance.pk)
+
+
+# ----------------------------
+# Analytics cache invalidation
+# ----------------------------
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_save, sender=Budget)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Wallet)
+@receiver(post_delete, sender=Transaction)
+@receiver(post_delete, sender=Budget)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Wallet)
+def invalidate_user_cache(sender, instance, **kwargs):
+    # Soft deletes are saves, so they are covered by post_save
+    invalidate_user(instance.owner_id)
+
+
+# ----------------------------
+# Live dashboard push (Tracker.live)
+# ----------------------------
+
+@receiver(post_save, sender=Transaction)
+@receiver(post_save, sender=Budget)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Wallet)
+@receiver(post_delete, sender=Transaction)
+@receiver(post_delete, sender=Budget)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Wallet)
+def publish_live_update(sender, instance, origin=None, **kwargs):
+    if not _deleting_user(origin):
+        live.publish_on_commit(instance.owner_id)
+
+
+# ----------------------------
+# Note search index
+# ----------------------------
+
+@receiver(post_migrate)
+def restore_search_triggers(sender, using="default", **kwargs):
+    if sender.name == "Tracker":
+        search.ensure_sync_triggers(using)
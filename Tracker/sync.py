@@ -0,0 +1,170 @@
+"""
+Delta-sync change feed: GET /api/sync/?cursor=...
+
+Clients keep the opaque cursor from the previous response and get back only
+the wallets, categories, budgets and transactions written since then, plus
+the ids of rows deleted since then:
+
+    {"wallets": {"changed": [...], "deleted": [...]},
+     "categories": {...}, "budgets": {...}, "transactions": {...},
+     "cursor": "...", "has_more": false}
+
+Each stream is read in (updated_at, id) order from the owner's
+(owner, updated_at, id) index, starting after the position stored in the
+cursor, so a sync costs what changed rather than the size of the history.
+Soft-deleted transactions come back as tombstones from their own stream;
+hard deletes (and the transactions a wallet takes with it) are read from
+DeletionLog. Without a cursor the feed starts from the beginning (a full
+download) and skips the deletion log, which cannot mention anything the
+client holds. Keep calling with the new cursor while has_more is true.
+
+Rows written in the last TRACKER_SYNC_SETTLE_SECONDS are held back until
+the next call: updated_at comes from the clock before commit, so a slower
+concurrent transaction can still commit a row just behind a position that
+was already handed out.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import permissions
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .models import Budget, Category, DeletionLog, Transaction, Wallet
+from .serializers import BudgetSerializer, CategorySerializer, RowEncoder, TransactionSerializer, WalletSerializer
+
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 2000
+
+# (response key, model, encoder); wallets and categories first so a client
+# applying a page in order sees them before rows that reference them
+STREAMS = [
+    ("wallets", Wallet, RowEncoder(WalletSerializer)),
+    ("categories", Category, RowEncoder(CategorySerializer)),
+    ("budgets", Budget, RowEncoder(BudgetSerializer)),
+    ("transactions", Transaction, RowEncoder(TransactionSerializer)),
+]
+DELETIONS = "deletions"
+
+
+class InvalidSyncCursor(ValueError):
+    pass
+
+
+def encode_cursor(positions):
+    """
+    positions: {stream: (datetime, id) or None}
+    """
+    payload = {k: [v[0].isoformat(), v[1]] if v else None for k, v in positions.items()}
+    raw = json.dumps(payload, separators=(",", ":"), sort_keys=True)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        positions = {}
+        for key in [name for name, _, _ in STREAMS] + [DELETIONS]:
+            value = payload[key]
+            positions[key] = (datetime.fromisoformat(value[0]), int(value[1])) if value else None
+    except (ValueError, TypeError, KeyError, IndexError, binascii.Error) as exc:
+        raise InvalidSyncCursor("Invalid cursor.") from exc
+    return positions
+
+
+def cursor_at(moment):
+    """
+    A cursor that skips everything written up to `moment`.
+    """
+    return encode_cursor({key: (moment, 0) for key in [name for name, _, _ in STREAMS] + [DELETIONS]})
+
+
+def _after(field, position):
+    if position is None:
+        return Q()
+    moment, pk = position
+    return Q(**{f"{field}__gt": moment}) | Q(**{field: moment, "id__gt": pk})
+
+
+def settle_horizon():
+    return timezone.now() - timedelta(seconds=getattr(settings, "TRACKER_SYNC_SETTLE_SECONDS", 2))
+
+
+def changes_since(user, cursor=None, limit=DEFAULT_LIMIT):
+    """
+    One page of the feed as a JSON-ready dict (see the module docstring).
+    """
+    horizon = settle_horizon()
+    if cursor:
+        positions = decode_cursor(cursor)
+    else:
+        positions = {name: None for name, _, _ in STREAMS}
+        # Nothing deleted before now can be on the client yet
+        positions[DELETIONS] = (horizon, 0)
+
+    body, has_more = {}, False
+
+    for name, model, encoder in STREAMS:
+        columns = list(encoder.columns) + ["updated_at", "id"]
+        if model is Transaction:
+            columns.append("is_deleted")
+
+        rows = list(
+            model.objects.filter(_after("updated_at", positions[name]), owner=user, updated_at__lte=horizon)
+            .order_by("updated_at", "id")
+            .values_list(*columns)[: limit + 1]
+        )
+        has_more |= len(rows) > limit
+        rows = rows[:limit]
+
+        if model is Transaction:
+            live = [row for row in rows if not row[-1]]
+            deleted = [row[-2] for row in rows if row[-1]]
+        else:
+            live, deleted = rows, []
+        body[name] = {"changed": encoder.encode_many(live), "deleted": deleted}
+        if rows:
+            positions[name] = (rows[-1][-3], rows[-1][-2]) if model is Transaction else (rows[-1][-2], rows[-1][-1])
+
+    tombstones = list(
+        DeletionLog.objects.filter(_after("deleted_at", positions[DELETIONS]), owner=user, deleted_at__lte=horizon)
+        .order_by("deleted_at", "id")
+        .values_list("model", "object_id", "deleted_at", "id")[: limit + 1]
+    )
+    has_more |= len(tombstones) > limit
+    tombstones = tombstones[:limit]
+    keys = {model._meta.model_name: name for name, model, _ in STREAMS}
+    for model_name, object_id, _, _ in tombstones:
+        if model_name in keys:
+            body[keys[model_name]]["deleted"].append(object_id)
+    if tombstones:
+        positions[DELETIONS] = tombstones[-1][2:]
+
+    body["cursor"] = encode_cursor(positions)
+    body["has_more"] = has_more
+    return body
+
+
+class SyncAPIView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    # one query per stream plus the deletion log
+    query_budget = 7
+
+    def get(self, request):
+        try:
+            limit = min(max(int(request.query_params.get("limit", DEFAULT_LIMIT)), 1), MAX_LIMIT)
+        except ValueError:
+            limit = DEFAULT_LIMIT
+
+        try:
+            return Response(changes_since(request.user, request.query_params.get("cursor"), limit))
+        except InvalidSyncCursor as exc:
+            raise ValidationError({"cursor": [str(exc)]})
@@ -1,9 +1,26 @@
+import json
+import os
+import tempfile
 from datetime import date
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
 from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
 from django.urls import reverse
 
-from Tracker.models import Wallet, Category, Transaction
+from Tracker import columnar
+from Tracker.models import Budget, Wallet, Category, Transaction
+from Tracker.rollups import verify_rollups
+from Tracker.api_urls import TransactionViewSet
+from Tracker.serializers import RowEncoder, TransactionSerializer
 
 User = get_user_model()
 
@@ -29,3 +46,377 @@ class APICoreTests(APITestCase):
         }
         resp = self.client.post("/api/transactions/", payload, format="json")
         self.assertEqual(resp.status_code, 201)
+
+    def test_dashboard_snapshot_endpoint(self):
+        Transaction.objects.create(
+            owner=self.user, wallet=self.wallet, t_type="EXPENSE", amount="40.00",
+            category=self.category, date=date.today(),
+        )
+        resp = self.client.get("/api/analytics/dashboard/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["expense"], "40.00")
+        self.assertEqual(resp.json()["breakdown"][0]["category"], "Food")
+
+    def test_wallet_balance_uses_running_totals(self):
+        for t_type, amount in [("INCOME", "1000.00"), ("EXPENSE", "250.00"), ("EXPENSE", "50.00")]:
+            self.client.post("/api/transactions/", {
+                "wallet": self.wallet.id, "t_type": t_type, "amount": amount,
+                "category": self.category.id, "date": str(date.today()),
+            }, format="json")
+
+        last = Transaction.objects.filter(owner=self.user, amount="50.00").get()
+        self.client.patch(f"/api/transactions/{last.id}/", {"amount": "75.00"}, format="json")
+        self.client.patch(f"/api/wallets/{self.wallet.id}/", {"name": "Cash"}, format="json")
+
+        resp = self.client.get(f"/api/wallets/{self.wallet.id}/balance/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["balance"], Decimal("675.00"))
+        self.assertEqual(resp.data["wallet"], "Cash")
+
+    def test_bulk_import_csv(self):
+        csv_body = (
+            "Date,Wallet,Type,Amount,Category,Note\n"
+            "2026-02-03,Main Wallet,EXPENSE,12.50,Food,Lunch\n"
+            "2026-02-04,Main Wallet,INCOME,900,Salary,Pay\n"
+            "2026-02-05,Nope,EXPENSE,-3,Food,\n"
+        )
+        upload = SimpleUploadedFile("bank.csv", csv_body.encode(), content_type="text/csv")
+
+        resp = self.client.post("/api/transactions/import/", {"file": upload}, format="multipart")
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.data["created"], 2)
+        self.assertEqual(resp.data["categories_created"], ["Salary"])
+        self.assertEqual(resp.data["errors"][0]["row"], 3)
+        self.assertEqual(set(resp.data["errors"][0]["errors"]), {"wallet", "amount"})
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("887.50"))
+        self.assertEqual(verify_rollups(self.user), [])
+
+    def test_bulk_import_jsonl_command(self):
+        lines = [
+            {"date": "2026-01-0%d" % day, "wallet": "main wallet", "t_type": "expense",
+             "amount": "1.00", "category": "Food"}
+            for day in range(1, 10)
+        ]
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as fh:
+            fh.write("\n".join(json.dumps(line) for line in lines) + "\nnot json\n")
+
+        out = StringIO()
+        call_command("import_transactions", fh.name, "--user", "devloom2", "--batch-size", "4", stdout=out)
+        os.unlink(fh.name)
+
+        self.assertIn("9 created", out.getvalue())
+        self.assertIn("row 10", out.getvalue())
+        self.assertEqual(Transaction.objects.for_user(self.user).filter(category=self.category).count(), 9)
+
+    def test_batch_create_update_and_delete(self):
+        other = User.objects.create_user(username="intruder", password="pass12345")
+        foreign_wallet = Wallet.objects.get(owner=other)
+
+        resp = self.client.post("/api/transactions/bulk/", [
+            {"wallet": self.wallet.id, "t_type": "EXPENSE", "amount": "10.00", "category": self.category.id, "date": "2026-02-01"},
+            {"wallet": foreign_wallet.id, "amount": "5.00", "date": "2026-02-01"},
+            {"wallet": self.wallet.id, "t_type": "INCOME", "amount": "100.00", "date": "2026-02-02"},
+        ], format="json")
+        self.assertEqual(resp.status_code, 207)
+        statuses = [r["status"] for r in resp.data["results"]]
+        self.assertEqual(statuses, [201, 400, 201])
+        self.assertIn("wallet", resp.data["results"][1]["errors"])
+        first_id, income_id = resp.data["results"][0]["id"], resp.data["results"][2]["id"]
+
+        resp = self.client.patch("/api/transactions/bulk/", [
+            {"id": first_id, "amount": "25.00"},
+            {"id": 999999, "amount": "1.00"},
+        ], format="json")
+        self.assertEqual([r["status"] for r in resp.data["results"]], [200, 404])
+        self.assertEqual(resp.data["results"][0]["data"]["amount"], "25.00")
+
+        resp = self.client.post("/api/transactions/bulk-delete/", {"ids": [income_id, 999999]}, format="json")
+        self.assertEqual([r["status"] for r in resp.data["results"]], [204, 404])
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("-25.00"))
+        self.assertEqual(verify_rollups(self.user), [])
+
+    def test_transactions_list_is_cursor_paginated(self):
+        Transaction.objects.bulk_create([
+            Transaction(owner=self.user, wallet=self.wallet, amount=f"{i + 1}.00", date=date(2026, 2, 1))
+            for i in range(5)
+        ])
+
+        resp = self.client.get("/api/transactions/", {"page_size": 2, "ordering": "amount"})
+        self.assertEqual([r["amount"] for r in resp.data["results"]], ["1.00", "2.00"])
+        self.assertNotIn("count", resp.data)
+
+        resp = self.client.get(resp.data["next"])
+        self.assertEqual([r["amount"] for r in resp.data["results"]], ["3.00", "4.00"])
+
+        resp = self.client.get("/api/transactions/", {"count": "1"})
+        self.assertEqual(resp.data["count"], 5)
+
+    def test_search_ordered_by_relevance(self):
+        for note in ["taxi", "taxi taxi taxi", "groceries"]:
+            Transaction.objects.create(owner=self.user, wallet=self.wallet, amount="3.00",
+                                       date=date(2026, 2, 1), note=note)
+
+        resp = self.client.get("/api/transactions/", {"search": "tax", "ordering": "relevance", "page_size": 1})
+        self.assertEqual([r["note"] for r in resp.data["results"]], ["taxi taxi taxi"])
+
+        resp = self.client.get(resp.data["next"])
+        self.assertEqual([r["note"] for r in resp.data["results"]], ["taxi"])
+        self.assertIsNone(resp.data["next"])
+
+    def test_fast_list_path_matches_transaction_serializer(self):
+        notes = ["", "Lunch", 'Quote " and \\ backslash', "Ünïcødé ☕", "x" * 255]
+        amounts = ["0.01", "5", "5.1", "1234.56", "9999999999.99"]
+        for i, (note, amount) in enumerate(zip(notes, amounts)):
+            Transaction.objects.create(
+                owner=self.user, wallet=self.wallet, category=self.category if i % 2 else None,
+                t_type="INCOME" if i % 3 == 0 else "EXPENSE", amount=amount, date=date(2026, 1, i + 1), note=note,
+            )
+
+        qs = Transaction.objects.for_user(self.user).order_by("-date", "-created_at", "-id")
+        encoder = RowEncoder(TransactionSerializer)
+        renderer = JSONRenderer()
+        self.assertEqual(
+            renderer.render(encoder.encode_many(qs.values_list(*encoder.columns))),
+            renderer.render(TransactionSerializer(qs, many=True).data),
+        )
+
+        # End to end, across a page boundary and with a non-default ordering
+        for params in ({"page_size": 3}, {"page_size": 2, "ordering": "-amount"}):
+            resp = self.client.get("/api/transactions/", params)
+            order = TransactionViewSet.ORDERINGS.get(params.get("ordering"), ("-date", "-created_at", "-id"))
+            expected = TransactionSerializer(qs.order_by(*order)[: params["page_size"]], many=True).data
+            self.assertIn(b'"results":' + renderer.render(expected) + b"}", resp.content)
+
+    def test_sparse_fields_and_expand(self):
+        for i in range(3):
+            Transaction.objects.create(
+                owner=self.user, wallet=self.wallet, category=self.category, t_type="EXPENSE",
+                amount="5.00", date=date(2026, 1, i + 1), note=f"n{i}",
+            )
+        txn = Transaction.objects.filter(owner=self.user).first()
+
+        resp = self.client.get("/api/transactions/", {"fields": "amount,id", "page_size": 2})
+        self.assertEqual(resp.data["results"], [{"id": r.id, "amount": "5.00"} for r in
+                                                Transaction.objects.order_by("-date")[:2]])
+        self.assertIsNotNone(resp.data["next"])
+
+        resp = self.client.get("/api/transactions/", {"fields": "id,wallet,category", "expand": "wallet,category"})
+        self.wallet.refresh_from_db()
+        self.assertEqual(resp.data["results"][0]["wallet"], {
+            "id": self.wallet.id, "name": self.wallet.name, "currency": self.wallet.currency,
+            "income": str(self.wallet.income), "expense": str(self.wallet.expense), "balance": str(self.wallet.balance),
+        })
+        self.assertEqual(resp.data["results"][0]["category"], {"id": self.category.id, "name": "Food"})
+        # Expanding does not add queries (the list budget is enforced under test)
+        full = self.client.get("/api/transactions/", {"expand": "wallet,category"})
+        self.assertEqual(full.data["results"][0]["note"], "n2")
+        self.assertEqual(full.data["results"][0]["wallet"]["id"], self.wallet.id)
+
+        resp = self.client.get(f"/api/transactions/{txn.id}/", {"fields": "note"})
+        self.assertEqual(resp.data, {"note": txn.note})
+        resp = self.client.get("/api/budgets/", {"expand": "category"})
+        self.assertEqual(resp.status_code, 200)
+        resp = self.client.get("/api/wallets/", {"fields": "name"})
+        self.assertEqual(resp.data[0], {"name": self.wallet.name})
+
+        resp = self.client.get("/api/transactions/", {"fields": "amount,owner"})
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("owner", resp.data["fields"][0])
+        self.assertEqual(self.client.get("/api/wallets/", {"expand": "owner"}).status_code, 400)
+
+        # Writes ignore both parameters
+        resp = self.client.patch(f"/api/transactions/{txn.id}/?fields=id&expand=wallet", {"note": "x"}, format="json")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["wallet"], self.wallet.id)
+
+    def test_columnar_format_round_trips(self):
+        other = Category.objects.create(owner=self.user, name="Rent")
+        for i in range(7):
+            Transaction.objects.create(
+                owner=self.user, wallet=self.wallet, category=[self.category, other, None][i % 3],
+                t_type="INCOME" if i % 2 else "EXPENSE", amount=f"{i}.0{i}", date=date(2026, 1 + i, 3), note=f"n{i}",
+            )
+
+        with mock.patch.object(columnar, "CHUNK_SIZE", 3):
+            resp = self.client.get("/api/transactions/", {"format": "columnar", "page_size": 2})
+            payload = json.loads(b"".join(resp.streaming_content))
+        self.assertEqual(resp["Content-Type"], columnar.MEDIA_TYPE)
+        self.assertEqual(payload["rows"], 7)
+        self.assertEqual([chunk["rows"] for chunk in payload["chunks"]], [3, 3, 1])
+        self.assertEqual(payload["columns"]["amount"], {"type": "decimal", "scale": 2})
+        self.assertEqual(sorted(payload["dictionaries"]["category"]), sorted([self.category.id, other.id]))
+
+        expected = list(Transaction.objects.for_user(self.user).values(*TransactionSerializer.Meta.fields))
+        self.assertEqual(columnar.decode(payload), expected)
+
+        # Accept header, filters and sparse fields
+        resp = self.client.get("/api/transactions/", {"t_type": "INCOME", "fields": "id,amount"},
+                               HTTP_ACCEPT=columnar.MEDIA_TYPE)
+        rows = columnar.decode(json.loads(b"".join(resp.streaming_content)))
+        self.assertEqual(rows, list(Transaction.objects.for_user(self.user).filter(t_type="INCOME").values("id", "amount")))
+
+        self.assertEqual(self.client.get("/api/transactions/", {"format": "columnar", "expand": "wallet"}).status_code, 400)
+        self.assertEqual(self.client.get(f"/api/transactions/{expected[0]['id']}/", {"format": "columnar"}).status_code, 404)
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="etag", password="pass12345")
+        self.client.login(username="etag", password="pass12345")
+        self.wallet = Wallet.objects.get(owner=self.user)
+        self.txn = Transaction.objects.create(
+            owner=self.user, wallet=self.wallet, t_type="EXPENSE", amount="5.00", date=date.today(),
+        )
+
+    def assertRevalidates(self, url):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn("private", first["Cache-Control"])
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(resp.status_code, 304, url)
+        # Only the session/user lookups of authentication ran
+        self.assertFalse([q for q in ctx.captured_queries if "tracker_" in q["sql"].lower()], url)
+        return first["ETag"]
+
+    def test_unchanged_reads_return_304(self):
+        urls = [
+            "/api/transactions/",
+            f"/api/transactions/{self.txn.pk}/",
+            "/api/wallets/",
+            f"/api/wallets/{self.wallet.pk}/balance/",
+            "/api/categories/",
+            "/api/budgets/",
+            "/api/analytics/monthly-summary/",
+            "/api/analytics/dashboard/",
+        ]
+        tags = {url: self.assertRevalidates(url) for url in urls}
+        self.assertEqual(len(set(tags.values())), len(urls))
+
+        # Query string and Accept are part of the tag
+        self.assertNotEqual(self.client.get("/api/transactions/?page_size=1")["ETag"], tags["/api/transactions/"])
+        self.assertNotEqual(self.client.get("/api/transactions/", HTTP_ACCEPT=columnar.MEDIA_TYPE)["ETag"],
+                            tags["/api/transactions/"])
+
+        # Any write (soft delete included) changes every tag of the user
+        self.txn.is_deleted = True
+        self.txn.save()
+        for url in urls:
+            resp = self.client.get(url, HTTP_IF_NONE_MATCH=tags[url])
+            self.assertNotEqual(resp.status_code, 304, url)
+
+        tag = self.client.get("/api/wallets/")["ETag"]
+        Category.objects.create(owner=self.user, name="New")
+        self.assertEqual(self.client.get("/api/wallets/", HTTP_IF_NONE_MATCH=tag).status_code, 200)
+
+    def test_other_users_and_errors_are_not_tagged(self):
+        tag = self.client.get("/api/wallets/")["ETag"]
+        other = User.objects.create_user(username="etag2", password="pass12345")
+        self.client.force_login(other)
+        self.assertEqual(self.client.get("/api/wallets/", HTTP_IF_NONE_MATCH=tag).status_code, 200)
+
+        resp = self.client.get(f"/api/transactions/{self.txn.pk}/")
+        self.assertEqual(resp.status_code, 404)
+        self.assertFalse(resp.has_header("ETag"))
+
+    def test_html_pages_are_not_tagged(self):
+        # A 304 would keep the page, and its CSRF token, from an earlier login
+        resp = self.client.get(reverse("dashboard"), HTTP_IF_NONE_MATCH="*")
+        self.assertEqual(resp.status_code, 200)
+        self.assertFalse(resp.has_header("ETag"))
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_process_local_cache_disables_conditional_get(self):
+        resp = self.client.get("/api/wallets/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertFalse(resp.has_header("ETag"))
+        self.assertEqual(self.client.get("/api/wallets/", HTTP_IF_NONE_MATCH="*").status_code, 200)
+
+
+@override_settings(TRACKER_SYNC_SETTLE_SECONDS=0)
+class SyncFeedTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="sync", password="pass12345")
+        self.client.login(username="sync", password="pass12345")
+        self.wallet = Wallet.objects.get(owner=self.user)
+        self.category = Category.objects.create(owner=self.user, name="Food")
+
+    def sync(self, cursor=None, **params):
+        if cursor:
+            params["cursor"] = cursor
+        resp = self.client.get(reverse("sync"), params)
+        self.assertEqual(resp.status_code, 200, resp.content)
+        return resp.json()
+
+    def txn(self, **kwargs):
+        return Transaction.objects.create(
+            owner=self.user, wallet=self.wallet, category=self.category, t_type="EXPENSE",
+            amount=kwargs.pop("amount", "5.00"), date=date.today(), **kwargs,
+        )
+
+    def test_incremental_changes_and_tombstones(self):
+        kept, dropped = self.txn(), self.txn(amount="7.00")
+        first = self.sync()
+        self.assertEqual({r["id"] for r in first["transactions"]["changed"]}, {kept.pk, dropped.pk})
+        self.assertEqual([r["id"] for r in first["wallets"]["changed"]], [self.wallet.pk])
+        self.assertFalse(first["has_more"])
+
+        # Nothing new: every stream comes back empty
+        again = self.sync(first["cursor"])
+        for name in ("wallets", "categories", "budgets", "transactions"):
+            self.assertEqual(again[name], {"changed": [], "deleted": []}, name)
+
+        other = Category.objects.create(owner=self.user, name="Rent")
+        budget = Budget.objects.create(owner=self.user, category=other, month=date.today().replace(day=1), limit_amount="50.00")
+        dropped.is_deleted = True
+        dropped.save()
+        User.objects.create_user(username="sync2", password="pass12345")
+
+        delta = self.sync(again["cursor"])
+        self.assertEqual(delta["transactions"], {"changed": [], "deleted": [dropped.pk]})
+        self.assertEqual([r["id"] for r in delta["categories"]["changed"]], [other.pk])
+        self.assertEqual([r["id"] for r in delta["budgets"]["changed"]], [budget.pk])
+        # The soft delete moved the wallet's running balance
+        self.assertEqual([r["balance"] for r in delta["wallets"]["changed"]], ["-5.00"])
+
+        # Hard deletes come from the deletion log; the cascade is included and
+        # the transactions that pointed at the category are sent again
+        category_id, other_id, budget_id = self.category.pk, other.pk, budget.pk
+        self.category.delete()
+        after = self.sync(delta["cursor"])
+        self.assertEqual(after["categories"]["deleted"], [category_id])
+        self.assertEqual([r["id"] for r in after["transactions"]["changed"]], [kept.pk])
+        self.assertIsNone(after["transactions"]["changed"][0]["category"])
+
+        other.delete()
+        after = self.sync(after["cursor"])
+        self.assertEqual(after["budgets"]["deleted"], [budget_id])
+        self.assertEqual(after["categories"]["deleted"], [other_id])
+
+    def test_pages_until_has_more_is_false(self):
+        txns = [self.txn() for _ in range(5)]
+        seen, cursor = [], None
+        for _ in range(5):
+            page = self.sync(cursor, limit=2)
+            seen += [r["id"] for r in page["transactions"]["changed"]]
+            cursor = page["cursor"]
+            if not page["has_more"]:
+                break
+        self.assertFalse(page["has_more"])
+        self.assertEqual(seen, [t.pk for t in txns])
+
+    def test_settle_window_and_invalid_cursor(self):
+        self.txn()
+        with override_settings(TRACKER_SYNC_SETTLE_SECONDS=60):
+            held = self.sync()
+        self.assertEqual(held["transactions"]["changed"], [])
+        self.assertEqual(len(self.sync(held["cursor"])["transactions"]["changed"]), 1)
+
+        resp = self.client.get(reverse("sync"), {"cursor": "not-a-cursor"})
+        self.assertEqual(resp.status_code, 400)
+        self.assertIn("cursor", resp.json())
@@ -0,0 +1,42 @@
+"""
+Test runner (settings.TEST_RUNNER) for whichever way Django's test command
+is started: manage.py test, django-admin test, python -m django test.
+
+It makes query budgets strict and points the analytics cache, the
+per-process metrics files and the saved profiles at a temporary directory
+that is removed when the run ends, so no run sees another's cached data. Runners that
+bypass TEST_RUNNER (pytest) can set TRACKER_QUERY_BUDGET_STRICT=1 and
+TRACKER_METRICS_DIR in the environment instead.
+"""
+import tempfile
+from pathlib import Path
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from . import metrics
+
+
+class TrackerTestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._tmp = tempfile.TemporaryDirectory(prefix="tracker-test-")
+        self._settings = override_settings(
+            TRACKER_QUERY_BUDGET_STRICT=True,
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                    "LOCATION": str(Path(self._tmp.name) / "cache"),
+                }
+            },
+            TRACKER_METRICS_DIR=str(Path(self._tmp.name) / "metrics"),
+            TRACKER_PROFILE_DIR=str(Path(self._tmp.name) / "profiles"),
+        )
+        self._settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        # Nothing left for the exit-time flush to write outside the directory
+        metrics.process_metrics().flush()
+        self._settings.disable()
+        self._tmp.cleanup()
+        super().teardown_test_environment(**kwargs)
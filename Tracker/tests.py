@@ -1,9 +1,44 @@
+import asyncio
+import gzip
+import json
+import os
+import tempfile
+import threading
 from datetime import date
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
-from .models import Category, Transaction, Wallet
+from .benchmarks import pinned_today
+from .budgets import evaluate_budgets
+from .caching import bump_version, cache_stats, data_version, get_cache, reset_cache_stats
+from .dashboard import DashboardShell, DashboardSnapshot
+from .forecasting import forecast, forecast_for_user
+from . import live, metrics
+from .instrumentation import QueryBudgetExceeded, RequestStats
+from .profiling import list_profiles, make_token
+from .models import (
+    Budget, Category, LiveNotification, MonthlyRollup, OverspendAlert, RecurringTransaction, Transaction, Wallet,
+)
+from .pagination import KeysetPaginator
+from .query_plans import advise, explain
+from .recurring import materialize_due
+from .rollups import verify_rollups
+from .search import FTS_TABLE, SQLiteFTS5Backend, get_backend as get_search_backend
+from .seeding import SEED_END, seed_user
+from .views import DashboardView
+from .services import category_breakdown_for_user, monthly_totals_for_user
 
 
 User = get_user_model()
@@ -58,3 +93,956 @@ class TrackerCoreTests(TestCase):
 
         # should not appear in active manager results
         self.assertEqual(Transaction.objects.for_user(self.user).count(), 0)
+
+
+class MonthlyRollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="erick", password="pass12345")
+        self.client.login(username="erick", password="pass12345")
+        self.wallet = Wallet.objects.get(owner=self.user)
+        self.food = Category.objects.create(owner=self.user, name="Food")
+
+    def _txn(self, amount, day=date(2026, 2, 10), t_type="EXPENSE", category=None):
+        return Transaction.objects.create(
+            owner=self.user, wallet=self.wallet, t_type=t_type, amount=amount,
+            category=category or self.food, date=day,
+        )
+
+    def _bucket(self, month=date(2026, 2, 1), t_type="EXPENSE", category=None):
+        row = MonthlyRollup.objects.filter(
+            owner=self.user, month=month, t_type=t_type, category=category or self.food
+        ).first()
+        return (row.total, row.txn_count) if row else (0, 0)
+
+    def test_create_edit_and_soft_delete_keep_rollup_in_sync(self):
+        t = self._txn("100.00")
+        self._txn("50.00")
+        self.assertEqual(self._bucket(), (Decimal("150.00"), 2))
+
+        t.amount = Decimal("30.00")
+        t.date = date(2026, 3, 5)
+        t.save()
+        self.assertEqual(self._bucket(), (Decimal("50.00"), 1))
+        self.assertEqual(self._bucket(month=date(2026, 3, 1)), (Decimal("30.00"), 1))
+
+        self.client.post(reverse("transaction_delete", args=[t.pk]))
+        self.assertEqual(self._bucket(month=date(2026, 3, 1)), (Decimal("0.00"), 0))
+        self.assertEqual(verify_rollups(self.user), [])
+
+    def test_api_write_updates_rollup(self):
+        resp = self.client.post("/api/transactions/", {
+            "wallet": self.wallet.id, "t_type": "INCOME", "amount": "900.00",
+            "category": self.food.id, "date": "2026-02-01",
+        }, content_type="application/json")
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(self._bucket(t_type="INCOME"), (Decimal("900.00"), 1))
+
+        self.client.delete(f"/api/transactions/{resp.json()['id']}/")
+        self.assertEqual(self._bucket(t_type="INCOME"), (Decimal("0.00"), 0))
+
+    def test_deleting_category_moves_totals_to_uncategorized(self):
+        self._txn("40.00")
+        self.food.delete()
+
+        row = MonthlyRollup.objects.get(owner=self.user, category__isnull=True)
+        self.assertEqual((row.total, row.txn_count), (Decimal("40.00"), 1))
+        self.assertEqual(verify_rollups(self.user), [])
+
+    def test_services_match_raw_transactions_for_partial_month(self):
+        self._txn("10.00", day=date(2026, 2, 3))
+        self._txn("25.00", day=date(2026, 2, 20))  # after the window end
+        self._txn("500.00", day=date(2026, 2, 4), t_type="INCOME")
+
+        income, expense = monthly_totals_for_user(self.user, date(2026, 2, 1), date(2026, 2, 15))
+        self.assertEqual((income, expense), (Decimal("500.00"), Decimal("10.00")))
+
+        breakdown = category_breakdown_for_user(self.user, date(2026, 2, 1), date(2026, 2, 28))
+        self.assertEqual(breakdown, [{"category__name": "Food", "total": Decimal("35.00")}])
+
+    def test_rebuild_command_repairs_drift(self):
+        self._txn("10.00")
+        MonthlyRollup.objects.update(total=Decimal("1.00"))
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_rollups", "--verify", stdout=StringIO())
+
+        call_command("rebuild_rollups", stdout=StringIO())
+        self.assertEqual(verify_rollups(), [])
+
+
+class DashboardSnapshotTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="erick", password="pass12345")
+        self.client.login(username="erick", password="pass12345")
+        self.wallet = Wallet.objects.get(owner=self.user)
+        self.food = Category.objects.create(owner=self.user, name="Food")
+        self.rent = Category.objects.create(owner=self.user, name="Rent")
+        Budget.objects.create(owner=self.user, category=self.food, month=date(2026, 2, 1), limit_amount="100.00")
+
+        for amount, t_type, category, day in [
+            ("80.00", "EXPENSE", self.food, date(2026, 2, 3)),
+            ("45.00", "EXPENSE", self.food, date(2026, 2, 5)),
+            ("700.00", "EXPENSE", self.rent, date(2026, 2, 1)),
+            ("2000.00", "INCOME", None, date(2026, 2, 1)),
+            ("300.00", "EXPENSE", self.rent, date(2025, 12, 1)),
+            ("999.00", "EXPENSE", self.food, date(2026, 2, 25)),  # future-dated
+        ]:
+            Transaction.objects.create(
+                owner=self.user, wallet=self.wallet, t_type=t_type, amount=amount,
+                category=category, date=day,
+            )
+
+    def test_snapshot_panels(self):
+        snap = DashboardSnapshot.build(self.user, date(2026, 2, 10))
+
+        self.assertEqual((snap.income, snap.expense, snap.net),
+                         (Decimal("2000.00"), Decimal("825.00"), Decimal("1175.00")))
+        self.assertEqual([(b.category, b.total) for b in snap.breakdown],
+                         [("Rent", Decimal("700.00")), ("Food", Decimal("125.00"))])
+
+        alert = snap.budget_alerts[0]
+        self.assertEqual((alert.spent, alert.over, alert.is_exceeded),
+                         (Decimal("125.00"), Decimal("25.00"), True))
+
+        self.assertEqual([(h.month, h.t_type) for h in snap.history], [
+            (date(2025, 12, 1), "EXPENSE"), (date(2026, 2, 1), "EXPENSE"), (date(2026, 2, 1), "INCOME"),
+        ])
+        self.assertEqual(len(snap.recent_transactions), 4)
+
+    def test_snapshot_query_count_is_fixed(self):
+        # rollup read + edge-month correction + budgets + recent transactions
+        with self.assertNumQueries(4):
+            DashboardSnapshot.build(self.user, date(2026, 2, 10))
+
+    def test_dashboard_renders_shell_and_defers_panels(self):
+        with mock.patch.object(DashboardSnapshot, "build") as build:
+            resp = self.client.get(reverse("dashboard"))
+        build.assert_not_called()
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, f'data-url="{reverse("dashboard_snapshot")}"')
+
+        today = timezone.localdate()
+        shell = resp.context["shell"]
+        self.assertEqual((shell.income, shell.expense),
+                         (DashboardSnapshot.build(self.user, today).income, DashboardSnapshot.build(self.user, today).expense))
+        self.assertEqual(shell.recent_transactions, DashboardSnapshot.build(self.user, today).recent_transactions)
+
+    def test_shell_totals(self):
+        shell = DashboardShell.build(self.user, date(2026, 2, 10))
+        snap = DashboardSnapshot.build(self.user, date(2026, 2, 10))
+        self.assertEqual((shell.income, shell.expense, shell.net), (snap.income, snap.expense, snap.net))
+        self.assertEqual(shell.recent_transactions, snap.recent_transactions)
+        self.assertEqual(async_to_sync(DashboardShell.abuild)(self.user, date(2026, 2, 10)), shell)
+
+    def test_async_build_matches_build(self):
+        today = date(2026, 2, 10)
+        self.assertEqual(async_to_sync(DashboardSnapshot.abuild)(self.user, today),
+                         DashboardSnapshot.build(self.user, today))
+
+    def test_async_dashboard_view(self):
+        resp = self.client.get(reverse("dashboard_async"))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context["shell"], self.client.get(reverse("dashboard")).context["shell"])
+
+        # HTML pages carry the CSRF token, so they are never answered with 304
+        self.assertFalse(resp.has_header("ETag"))
+
+        self.client.logout()
+        self.assertRedirects(self.client.get(reverse("dashboard_async")),
+                             f"{reverse('login')}?next={reverse('dashboard_async')}", fetch_redirect_response=False)
+
+
+class ConcurrentPanelTests(TransactionTestCase):
+    def test_panels_run_on_worker_connections(self):
+        user = User.objects.create_user(username="async", password="pass12345")
+        Transaction.objects.create(owner=user, wallet=Wallet.objects.get(owner=user), t_type="EXPENSE",
+                                   amount="12.00", date=date(2026, 2, 3))
+
+        threads = set()
+        fetch_recent = DashboardSnapshot.fetch_recent.__func__
+
+        def spy(cls, *args):
+            threads.add(threading.get_ident())
+            return fetch_recent(cls, *args)
+
+        with mock.patch.object(DashboardSnapshot, "fetch_recent", classmethod(spy)), \
+                mock.patch("Tracker.services.close_old_connections") as close_old_connections:
+            snapshot = async_to_sync(DashboardSnapshot.abuild)(user, date(2026, 2, 10))
+
+        self.assertEqual(snapshot, DashboardSnapshot.build(user, date(2026, 2, 10)))
+        self.assertNotIn(threading.get_ident(), threads)
+        # Each worker call closes its connection before and after, as a request does
+        self.assertEqual(close_old_connections.call_count, 2 * 3)
+
+
+class LiveDashboardTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="live", password="pass12345")
+        self.wallet = Wallet.objects.get(owner=self.user)
+        self.category = Category.objects.create(owner=self.user, name="Food")
+        Budget.objects.create(owner=self.user, category=self.category, month=timezone.localdate().replace(day=1),
+                              limit_amount="10.00")
+
+    @staticmethod
+    def events(chunks):
+        parsed = []
+        for chunk in chunks:
+            if chunk.startswith(b"event: "):
+                name, data = chunk.decode().split("\n")[:2]
+                parsed.append((name[len("event: "):], json.loads(data[len("data: "):])))
+        return parsed
+
+    @override_settings(TRACKER_SYNC_SETTLE_SECONDS=0)
+    def test_writes_are_pushed_to_open_dashboards(self):
+        async def scenario():
+            client = AsyncClient()
+            await sync_to_async(client.force_login)(self.user)
+            resp = await client.get(reverse("dashboard_events"))
+            self.assertEqual(resp["Content-Type"], "text/event-stream")
+            chunks = resp.streaming_content.__aiter__()
+            read = lambda: asyncio.wait_for(anext(chunks), 5)
+
+            self.assertEqual(await read(), b"retry: 5000\n\n")
+            opened = self.events([await read()])
+            self.assertEqual(opened[0][0], "totals")
+            self.assertEqual(opened[0][1]["expense"], "0.00")
+
+            txn = await sync_to_async(Transaction.objects.create)(
+                owner=self.user, wallet=self.wallet, category=self.category, t_type="EXPENSE",
+                amount="25.00", date=timezone.localdate(),
+            )
+            pushed = dict(self.events([await read() for _ in range(4)]))
+            await chunks.aclose()
+            return txn, pushed
+
+        txn, pushed = async_to_sync(scenario)()
+        self.assertEqual(pushed["totals"]["expense"], "25.00")
+        self.assertEqual(pushed["totals"]["recent_transactions"][0]["id"], txn.pk)
+        self.assertEqual(pushed["budget"]["category_id"], self.category.pk)
+        self.assertTrue(pushed["budget"]["is_exceeded"])
+        self.assertEqual([row["id"] for row in pushed["transactions"]["changed"]], [txn.pk])
+        self.assertEqual(pushed["wallets"][0]["balance"], "-25.00")
+        self.assertEqual(live.hub.subscriber_count(), 0)
+
+    def test_other_workers_are_reached_through_the_table(self):
+        async def scenario():
+            hub = live.Hub()
+            subscription = hub.subscribe(self.user.pk)
+            await sync_to_async(hub.poll_once)()
+
+            await sync_to_async(LiveNotification.objects.create)(owner=self.user, origin=live.ORIGIN)
+            await sync_to_async(hub.poll_once)()
+            own = await subscription.wait(0.1)
+
+            await sync_to_async(LiveNotification.objects.create)(owner=self.user, origin="another-worker")
+            await sync_to_async(hub.poll_once)()
+            other = await subscription.wait(1)
+            return own, other
+
+        own, other = async_to_sync(scenario)()
+        self.assertIsNone(own)
+        self.assertIsNotNone(other)
+
+    @override_settings(TRACKER_LIVE_BACKEND="db")
+    def test_one_notification_per_commit(self):
+        with transaction.atomic():
+            for amount in ("1.00", "2.00", "3.00"):
+                Transaction.objects.create(owner=self.user, wallet=self.wallet, t_type="EXPENSE",
+                                           amount=amount, date=timezone.localdate())
+        self.assertEqual(LiveNotification.objects.filter(owner=self.user).count(), 1)
+
+        # A rolled-back transaction's pending publish does not swallow the next one
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Transaction.objects.create(owner=self.user, wallet=self.wallet, t_type="EXPENSE",
+                                       amount="4.00", date=timezone.localdate())
+            raise RuntimeError
+        with transaction.atomic():
+            Transaction.objects.create(owner=self.user, wallet=self.wallet, t_type="EXPENSE",
+                                       amount="5.00", date=timezone.localdate())
+        self.assertEqual(LiveNotification.objects.filter(owner=self.user).count(), 2)
+
+    def test_needs_login_and_asgi(self):
+        self.assertEqual(self.client.get(reverse("dashboard_events"), HTTP_HOST="localhost").status_code, 403)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse("dashboard_events"), HTTP_HOST="localhost").status_code, 204)
+
+
+class BudgetEvaluationTests(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(username=f"budget{i}", password="pass12345") for i in range(2)]
+        self.budgets = []
+        for user in self.users:
+            wallet = Wallet.objects.get(owner=user)
+            # Both users have a "Food" category; spend must not leak between them
+            food = Category.objects.create(owner=user, name="Food")
+            rent = Category.objects.create(owner=user, name="Rent")
+            for month in (date(2026, 1, 1), date(2026, 2, 1)):
+                self.budgets.append(Budget.objects.create(owner=user, category=food, month=month, limit_amount="100.00"))
+                self.budgets.append(Budget.objects.create(owner=user, category=rent, month=month, limit_amount="500.00"))
+            Transaction.objects.create(owner=user, wallet=wallet, category=food, t_type="EXPENSE",
+                                       amount="150.00", date=date(2026, 2, 3))
+            Transaction.objects.create(owner=user, wallet=wallet, category=rent, t_type="EXPENSE",
+                                       amount="450.00", date=date(2026, 2, 1))
+            Transaction.objects.create(owner=user, wallet=wallet, category=food, t_type="INCOME",
+                                       amount="900.00", date=date(2026, 2, 1))
+        self.food_feb = Budget.objects.get(owner=self.users[0], category__name="Food", month=date(2026, 2, 1))
+
+    def test_one_grouped_query_per_chunk(self):
+        chunks = evaluate_budgets(date(2026, 1, 1), date(2026, 2, 1), chunk_size=3)
+        statuses = []
+        for _ in range(3):
+            with self.assertNumQueries(1):
+                statuses += next(chunks)
+        with self.assertNumQueries(1):
+            self.assertEqual(list(chunks), [])
+
+        self.assertEqual([s.budget_id for s in statuses], sorted(b.pk for b in self.budgets))
+        spent = {(s.owner_id, s.category, s.month): s.spent for s in statuses}
+        for user in self.users:
+            self.assertEqual(spent[user.pk, "Food", date(2026, 2, 1)], Decimal("150.00"))
+            self.assertEqual(spent[user.pk, "Rent", date(2026, 2, 1)], Decimal("450.00"))
+            self.assertEqual(spent[user.pk, "Food", date(2026, 1, 1)], Decimal("0"))
+
+        feb = [s for chunk in evaluate_budgets(date(2026, 2, 1), owner=self.users[0]) for s in chunk]
+        self.assertEqual({s.category: s.is_exceeded for s in feb}, {"Food": True, "Rent": False})
+        self.assertEqual(next(s for s in feb if s.category == "Food").over, Decimal("50.00"))
+
+    def test_command_writes_and_refreshes_alerts(self):
+        out = StringIO()
+        call_command("evaluate_budgets", "--month", "2026-02", stdout=out)
+        self.assertIn("Evaluated 4 budget(s) for 2026-02", out.getvalue())
+        self.assertEqual(OverspendAlert.objects.count(), 2)
+        alert = OverspendAlert.objects.get(budget=self.food_feb)
+        self.assertEqual((alert.spent, alert.limit_amount), (Decimal("150.00"), Decimal("100.00")))
+
+        # Lower threshold: rent (90%) alerts too; reruns update in place
+        call_command("evaluate_budgets", "--month", "2026-02", "--threshold", "80", stdout=StringIO())
+        self.assertEqual(OverspendAlert.objects.count(), 4)
+        self.assertEqual(OverspendAlert.objects.get(budget=self.food_feb).created_at, alert.created_at)
+
+        # A raised limit clears the alert on the next run
+        self.food_feb.limit_amount = "200.00"
+        self.food_feb.save()
+        call_command("evaluate_budgets", "--month", "2026-02", "--user", "budget0", stdout=StringIO())
+        self.assertFalse(OverspendAlert.objects.filter(owner=self.users[0]).exists())
+        self.assertEqual(OverspendAlert.objects.filter(owner=self.users[1]).count(), 2)
+
+        out = StringIO()
+        call_command("evaluate_budgets", "--month", "2026-01", "--through", "2026-02", "--dry-run", stdout=out)
+        self.assertIn("Evaluated 8 budget(s) for 2026-01..2026-02", out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command("evaluate_budgets", "--month", "2026-13", stdout=StringIO())
+
+
+class ForecastTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="forecast", password="pass12345")
+        self.wallet = Wallet.objects.get(owner=self.user)
+        self.food = Category.objects.create(owner=self.user, name="Food")
+        self.rent = Category.objects.create(owner=self.user, name="Rent")
+
+    def spend(self, category, amount, day):
+        Transaction.objects.create(owner=self.user, wallet=self.wallet, category=category, t_type="EXPENSE",
+                                   amount=amount, date=day)
+
+    def test_linear_projection_without_history(self):
+        self.spend(self.food, "100.00", date(2026, 4, 5))
+        self.spend(self.food, "999.00", date(2026, 4, 25))  # future-dated, not spent yet
+        Budget.objects.create(owner=self.user, category=self.food, month=date(2026, 4, 1), limit_amount="200.00")
+        Budget.objects.create(owner=self.user, category=self.rent, month=date(2026, 4, 1), limit_amount="50.00")
+
+        forecasts = {f.category: f for f in forecast_for_user(self.user, date(2026, 4, 10))}
+        food = forecasts["Food"]
+        self.assertEqual((food.spent, food.projected), (Decimal("100.00"), Decimal("300.00")))
+        # 100 + 200 * (day - 10) / 20 passes 200 on day 21
+        self.assertEqual(food.exceeds_on, date(2026, 4, 21))
+        self.assertEqual((forecasts["Rent"].projected, forecasts["Rent"].exceeds_on), (Decimal("0.00"), None))
+
+    def test_history_and_overrun_already_happened(self):
+        # Rent is paid on the 1st: the history says the month's rent is already spent
+        for month in (1, 2, 3):
+            self.spend(self.rent, "500.00", date(2026, month, 1))
+            for day in range(1, 29):
+                self.spend(self.food, "10.00", date(2026, month, day))
+        self.spend(self.rent, "500.00", date(2026, 4, 1))
+        for day in range(1, 11):
+            self.spend(self.food, "10.00", date(2026, 4, day))
+        Budget.objects.create(owner=self.user, category=self.rent, month=date(2026, 4, 1), limit_amount="400.00")
+
+        forecasts = {f.category: f for f in forecast(date(2026, 4, 10), owner=self.user)}
+        self.assertEqual(forecasts["Rent"].projected, Decimal("500.00"))
+        self.assertEqual(forecasts["Rent"].exceeds_on, date(2026, 4, 1))
+        self.assertAlmostEqual(float(forecasts["Food"].projected), 280, delta=15)
+
+    def test_spent_matches_the_dashboard_totals(self):
+        for amount in ("0.10", "0.20", "0.10", "1234567.33", "0.01"):
+            self.spend(self.food, amount, date(2026, 4, 3))
+        today = date(2026, 4, 10)
+        forecasts = forecast(today, owner=self.user)
+        self.assertEqual(sum(f.spent for f in forecasts), monthly_totals_for_user(self.user, date(2026, 4, 1), today)[1])
+        self.assertEqual(forecasts[0].spent, Decimal("1234567.74"))
+
+    def test_batch_matches_per_user_and_is_two_queries(self):
+        other = User.objects.create_user(username="forecast2", password="pass12345")
+        self.spend(self.food, "40.00", date(2026, 3, 2))
+        self.spend(self.food, "20.00", date(2026, 4, 2))
+        Transaction.objects.create(owner=other, wallet=Wallet.objects.get(owner=other), t_type="EXPENSE",
+                                   amount="5.00", date=date(2026, 4, 3))
+
+        with self.assertNumQueries(2):
+            everyone = forecast(date(2026, 4, 10))
+        self.assertEqual({f.owner_id for f in everyone}, {self.user.pk, other.pk})
+        self.assertEqual([f for f in everyone if f.owner_id == self.user.pk],
+                         forecast(date(2026, 4, 10), owner=self.user))
+
+        out = StringIO()
+        call_command("forecast_spending", stdout=out)
+        self.assertIn("Forecast", out.getvalue())
+        self.client.force_login(self.user)
+        resp = self.client.get(reverse("spending_forecast"), HTTP_HOST="localhost")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["as_of"], str(timezone.localdate()))
+
+
+class RecurringTransactionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="recurring", password="pass12345")
+        self.wallet = Wallet.objects.get(owner=self.user)
+        self.rent = Category.objects.create(owner=self.user, name="Rent")
+
+    def rule(self, **kwargs):
+        values = {"owner": self.user, "wallet": self.wallet, "category": self.rent, "amount": "500.00",
+                  "frequency": RecurringTransaction.MONTHLY, "start_date": date(2026, 1, 31)}
+        values.update(kwargs)
+        return RecurringTransaction.objects.create(**values)
+
+    def test_monthly_catch_up_clamps_to_month_end_and_keeps_totals(self):
+        rule = self.rule()
+        report = materialize_due(date(2026, 4, 15))
+
+        self.assertEqual((report.rules, report.created), (1, 3))
+        self.assertEqual(
+            list(Transaction.objects.filter(recurring=rule).order_by("date").values_list("date", flat=True)),
+            [date(2026, 1, 31), date(2026, 2, 28), date(2026, 3, 31)],
+        )
+        rule.refresh_from_db()
+        self.assertEqual(rule.next_date, date(2026, 4, 30))
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("-1500.00"))
+        self.assertEqual(verify_rollups(self.user), [])
+
+    def test_reruns_never_duplicate_occurrences(self):
+        rule = self.rule(frequency=RecurringTransaction.WEEKLY, interval=2, start_date=date(2026, 3, 2))
+        materialize_due(date(2026, 3, 31))
+        self.assertEqual(materialize_due(date(2026, 3, 31)).created, 0)
+
+        # A next_date moved back, and an occurrence the user deleted
+        deleted = Transaction.objects.get(recurring=rule, date=date(2026, 3, 16))
+        deleted.is_deleted = True
+        deleted.save()
+        RecurringTransaction.objects.filter(pk=rule.pk).update(next_date=rule.start_date)
+        report = materialize_due(date(2026, 3, 31))
+        self.assertEqual((report.created, report.skipped), (0, 3))
+        self.assertEqual(Transaction.objects.filter(recurring=rule).count(), 3)
+        self.assertEqual(verify_rollups(self.user), [])
+
+    def test_chunks_take_the_sqlite_write_lock_before_reading(self):
+        self.rule(frequency=RecurringTransaction.WEEKLY, start_date=date(2026, 3, 2))
+        with CaptureQueriesContext(connection) as ctx:
+            materialize_due(date(2026, 3, 31))
+        sqls = [q["sql"] for q in ctx.captured_queries]
+        lock = next(i for i, sql in enumerate(sqls) if sql.startswith("UPDATE") and sql.endswith("WHERE 0"))
+        read = next(i for i, sql in enumerate(sqls) if sql.startswith("SELECT") and "recurringtransaction" in sql)
+        self.assertLess(lock, read)
+
+    def test_ended_rules_are_deactivated(self):
+        rule = self.rule(frequency=RecurringTransaction.DAILY, start_date=date(2026, 5, 1), end_date=date(2026, 5, 10))
+        report = materialize_due(date(2026, 6, 1))
+        rule.refresh_from_db()
+        self.assertEqual((report.created, report.finished, rule.is_active), (10, 1, False))
+        self.assertEqual(materialize_due(date(2026, 7, 1)).rules, 0)
+
+    def test_query_count_does_not_grow_with_the_occurrences(self):
+        def run(owner, end_date):
+            RecurringTransaction.objects.create(
+                owner=owner, wallet=Wallet.objects.get(owner=owner), amount="1.00",
+                frequency=RecurringTransaction.DAILY, start_date=date(2026, 1, 1), end_date=end_date,
+            )
+            with CaptureQueriesContext(connection) as ctx:
+                materialize_due(date(2026, 1, 31), owner=owner)
+            return len(ctx.captured_queries)
+
+        # The rollups and balances are written per bucket: both runs fill one
+        short = run(self.user, date(2026, 1, 2))
+        other = User.objects.create_user(username="recurring3", password="pass12345")
+        self.assertEqual(run(other, None), short)
+        self.assertEqual(Transaction.objects.filter(recurring__isnull=False).count(), 2 + 31)
+        self.assertEqual(verify_rollups(), [])
+
+    def test_command(self):
+        other = User.objects.create_user(username="recurring2", password="pass12345")
+        self.rule()
+        RecurringTransaction.objects.create(owner=other, wallet=Wallet.objects.get(owner=other), amount="9.99",
+                                            frequency=RecurringTransaction.YEARLY, start_date=date(2024, 2, 29))
+
+        out = StringIO()
+        call_command("materialize_recurring", "--date", "2026-03-01", "--dry-run", stdout=out)
+        self.assertIn("Materialized 5 occurrence(s) of 2 rule(s)", out.getvalue())
+        self.assertFalse(Transaction.objects.filter(recurring__isnull=False).exists())
+
+        call_command("materialize_recurring", "--date", "2026-03-01", "--user", "recurring2", stdout=StringIO())
+        self.assertEqual(
+            list(Transaction.objects.filter(owner=other).order_by("date").values_list("date", flat=True)),
+            [date(2024, 2, 29), date(2025, 2, 28), date(2026, 2, 28)],
+        )
+        with self.assertRaises(CommandError):
+            call_command("materialize_recurring", "--date", "2026-13-01", stdout=StringIO())
+
+
+class AnalyticsCacheTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="erick", password="pass12345")
+        self.wallet = Wallet.objects.get(owner=self.user)
+        reset_cache_stats()
+
+    def _expense(self, amount):
+        return Transaction.objects.create(
+            owner=self.user, wallet=self.wallet, t_type="EXPENSE", amount=amount, date=date(2026, 2, 2),
+        )
+
+    def test_repeat_reads_hit_the_cache(self):
+        self._expense("10.00")
+        first = monthly_totals_for_user(self.user, date(2026, 2, 1), date(2026, 2, 28))
+
+        with self.assertNumQueries(0):
+            second = monthly_totals_for_user(self.user, date(2026, 2, 1), date(2026, 2, 28))
+
+        self.assertEqual(first, second)
+        self.assertEqual(cache_stats()["hits"], 1)
+        self.assertEqual(cache_stats()["misses"], 1)
+
+    def test_writes_bump_the_user_version(self):
+        t = self._expense("10.00")
+        self.assertEqual(monthly_totals_for_user(self.user, date(2026, 2, 1), date(2026, 2, 28))[1], Decimal("10.00"))
+
+        t.is_deleted = True
+        t.save(update_fields=["is_deleted"])
+        self.assertEqual(monthly_totals_for_user(self.user, date(2026, 2, 1), date(2026, 2, 28))[1], 0)
+
+        version = data_version(self.user)
+        Category.objects.create(owner=self.user, name="Food")
+        self.assertNotEqual(data_version(self.user), version)
+
+    def test_concurrent_bumps_never_reuse_a_version(self):
+        # The file cache's incr() is not atomic: bumps must not read the old version
+        seen = [data_version(self.user)]
+        barrier = threading.Barrier(8)
+
+        def bump():
+            barrier.wait()
+            bump_version(self.user)
+            seen.append(data_version(self.user))
+
+        threads = [threading.Thread(target=bump) for _ in range(8)]
+        with mock.patch.object(type(get_cache()), "incr", side_effect=AssertionError("incr used")):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(seen), 9)
+        self.assertNotIn(seen[0], seen[1:])
+
+
+class WalletBalanceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="erick", password="pass12345")
+        self.client.login(username="erick", password="pass12345")
+        self.wallet = Wallet.objects.get(owner=self.user)
+        self.bank = Wallet.objects.create(owner=self.user, name="Bank")
+
+    def _balance(self, wallet):
+        wallet.refresh_from_db()
+        return wallet.income, wallet.expense, wallet.balance
+
+    def test_moving_and_soft_deleting_transactions_updates_balances(self):
+        t = Transaction.objects.create(
+            owner=self.user, wallet=self.wallet, t_type="INCOME", amount="300.00", date=date(2026, 2, 1),
+        )
+        self.assertEqual(self._balance(self.wallet), (Decimal("300.00"), 0, Decimal("300.00")))
+
+        t.wallet = self.bank
+        t.t_type = "EXPENSE"
+        t.save()
+        self.assertEqual(self._balance(self.wallet), (0, 0, 0))
+        self.assertEqual(self._balance(self.bank), (0, Decimal("300.00"), Decimal("-300.00")))
+
+        self.client.post(reverse("transaction_delete", args=[t.pk]))
+        self.assertEqual(self._balance(self.bank), (0, 0, 0))
+
+    def test_reconcile_command_repairs_drift(self):
+        Transaction.objects.create(
+            owner=self.user, wallet=self.wallet, t_type="EXPENSE", amount="20.00", date=date(2026, 2, 1),
+        )
+        Wallet.objects.filter(pk=self.wallet.pk).update(balance=Decimal("999.00"))
+
+        out = StringIO()
+        call_command("reconcile_wallets", "--batch-size", "1", stdout=out)
+        self.assertIn("Repaired 1 wallet(s)", out.getvalue())
+        self.assertEqual(self._balance(self.wallet), (0, Decimal("20.00"), Decimal("-20.00")))
+
+
+class TransactionExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="erick", password="pass12345")
+        self.client.login(username="erick", password="pass12345")
+        self.wallet = Wallet.objects.get(owner=self.user)
+        food = Category.objects.create(owner=self.user, name="Food")
+        Transaction.objects.create(owner=self.user, wallet=self.wallet, t_type="EXPENSE", amount="12.50",
+                                   category=food, date=date(2026, 2, 3), note="Lunch")
+        Transaction.objects.create(owner=self.user, wallet=self.wallet, t_type="INCOME", amount="900.00",
+                                   date=date(2026, 2, 1), note="Salary")
+
+    def test_export_streams_filtered_rows(self):
+        resp = self.client.get(reverse("transaction_export"), {"type": "EXPENSE"})
+        self.assertTrue(resp.streaming)
+
+        lines = b"".join(resp.streaming_content).decode().splitlines()
+        self.assertEqual(lines, [
+            "Date,Wallet,Type,Amount,Category,Note",
+            "2026-02-03,Main Wallet,EXPENSE,12.50,Food,Lunch",
+        ])
+
+    def test_export_gzip(self):
+        resp = self.client.get(reverse("transaction_export"), {"compress": "gzip"})
+        self.assertEqual(resp["Content-Type"], "application/gzip")
+
+        body = gzip.decompress(b"".join(resp.streaming_content)).decode()
+        self.assertEqual(len(body.splitlines()), 3)
+        self.assertIn("Salary", body)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="erick", password="pass12345")
+        self.client.login(username="erick", password="pass12345")
+        self.wallet = Wallet.objects.get(owner=self.user)
+        Transaction.objects.bulk_create([
+            Transaction(owner=self.user, wallet=self.wallet, amount="1.00", date=date(2026, 1, 1 + i % 3), note=f"t{i}")
+            for i in range(25)
+        ])
+        self.expected = list(Transaction.objects.for_user(self.user).values_list("pk", flat=True))
+
+    def test_walks_forward_and_back_without_gaps(self):
+        seen, url, pages = [], reverse("transaction_list"), []
+        while url:
+            resp = self.client.get(url)
+            page = resp.context["page_obj"]
+            pages.append(resp)
+            seen += [t.pk for t in page]
+            url = resp.context["next_url"]
+
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(len(pages), 3)
+
+        back = self.client.get(pages[2].context["previous_url"])
+        self.assertEqual([t.pk for t in back.context["page_obj"]], self.expected[10:20])
+
+    def test_deep_page_query_has_no_offset_or_count(self):
+        paginator = KeysetPaginator(Transaction.objects.for_user(self.user), 10)
+        second = paginator.page(paginator.page().next_cursor)
+
+        with CaptureQueriesContext(connection) as ctx:
+            third = paginator.page(second.next_cursor)
+        self.assertEqual([t.pk for t in third], self.expected[20:])
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertNotIn("OFFSET", ctx.captured_queries[0]["sql"])
+
+    def test_invalid_cursor_is_404(self):
+        resp = self.client.get(reverse("transaction_list"), {"cursor": "garbage"})
+        self.assertEqual(resp.status_code, 404)
+
+
+class NoteSearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="erick", password="pass12345")
+        self.client.login(username="erick", password="pass12345")
+        self.wallet = Wallet.objects.get(owner=self.user)
+        self.lunch = self._txn("Lunch with team", "EXPENSE")
+        self.salary = self._txn("Salary February", "INCOME")
+        self.rent = self._txn("Rent", "EXPENSE")
+
+    def _txn(self, note, t_type):
+        return Transaction.objects.create(
+            owner=self.user, wallet=self.wallet, t_type=t_type, amount="5.00", date=date(2026, 2, 1), note=note,
+        )
+
+    def _search(self, query, **filters):
+        return set(Transaction.objects.for_user(self.user).filter_by(search=query, **filters))
+
+    def test_prefix_search_uses_the_fts_index(self):
+        self.assertIsInstance(get_search_backend(), SQLiteFTS5Backend)
+        self.assertEqual(self._search("lun"), {self.lunch})
+        self.assertEqual(self._search("team lunch"), {self.lunch})
+        self.assertEqual(self._search("sal", t_type="EXPENSE"), set())
+
+    def test_index_follows_edits_and_bulk_writes(self):
+        self.rent.note = "Rent and lunch money"
+        self.rent.save()
+        Transaction.objects.filter(pk=self.lunch.pk).update(note="Dinner")
+        self.assertEqual(self._search("lunch"), {self.rent})
+
+        self.client.post(reverse("transaction_delete", args=[self.rent.pk]))
+        self.assertEqual(self._search("lunch"), set())
+
+    def test_index_is_scoped_to_the_owner_and_active_rows(self):
+        other = User.objects.create_user(username="other", password="pass12345")
+        theirs = Transaction.objects.create(
+            owner=other, wallet=Wallet.objects.get(owner=other), t_type="EXPENSE", amount="5.00",
+            date=date(2026, 2, 1), note="Lunch alone",
+        )
+        qs = Transaction.objects.for_user(self.user).search("lunch")
+        self.assertIn("owner_id =", str(qs.query))
+        self.assertEqual(set(qs), {self.lunch})
+        self.assertEqual(set(Transaction.objects.active().search("lunch")), {self.lunch, theirs})
+
+        def indexed():
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT rowid, owner_id FROM {FTS_TABLE}")
+                return dict(cursor.fetchall())
+
+        self.client.post(reverse("transaction_delete", args=[self.lunch.pk]))
+        self.assertNotIn(self.lunch.pk, indexed())
+        Transaction.objects.filter(pk=self.lunch.pk).update(is_deleted=False)
+        self.assertEqual(indexed()[self.lunch.pk], self.user.pk)
+
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(indexed()[theirs.pk], other.pk)
+
+    def test_ranked_search(self):
+        best = self._txn("coffee coffee coffee", "EXPENSE")
+        self._txn("coffee and cake with a very long note about many other things", "EXPENSE")
+        ranked = Transaction.objects.for_user(self.user).search("coffee", ranked=True).order_by("search_rank")
+        self.assertEqual(ranked[0], best)
+
+
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.count = seed_user("planner", years=1, txns_per_day=1, end=date(2026, 3, 31))
+
+    def test_seeded_data_is_consistent(self):
+        self.assertGreater(self.count, 0)
+        self.assertEqual(Transaction.objects.filter(owner=self.user).count(), self.count)
+        self.assertEqual(verify_rollups(self.user), [])
+
+    def test_active_list_uses_partial_keyset_index(self):
+        qs = Transaction.objects.for_user(self.user).order_by("-date", "-created_at", "-id")[:11]
+        plan = " ".join(explain(str(qs.query)))
+        self.assertIn("txn_active_keyset_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_list_and_api_shapes_have_no_flagged_plans(self):
+        report = {shape["shape"]: shape for shape in advise(self.user)}
+        for name in ("views.TransactionListView", "views.TransactionListView (category)",
+                     "api.TransactionViewSet.list", "api.TransactionViewSet.list (ordering=-amount)"):
+            self.assertTrue(report[name]["queries"], name)
+            self.assertEqual([q["issues"] for q in report[name]["queries"] if q["issues"]], [], name)
+
+    def test_other_databases_are_rejected(self):
+        with mock.patch.object(connection, "vendor", "postgresql"), self.assertRaises(ValueError):
+            advise(self.user)
+
+
+class BenchmarkCommandTests(TestCase):
+    def test_seed_and_bench_report(self):
+        call_command("seed_bench", "--users", "2", "--years", "1", "--per-day", "1", "--prefix", "b", stdout=StringIO())
+        self.assertEqual(User.objects.filter(username__in=["b1", "b2"]).count(), 2)
+        # Anchored on a fixed day, not on the day the command runs
+        self.assertLessEqual(Transaction.objects.filter(owner__username="b1").latest("date").date, SEED_END)
+        call_command("seed_bench", "--users", "1", "--years", "1", "--prefix", "c", "--end", "2025-01-31",
+                     stdout=StringIO())
+        self.assertLessEqual(Transaction.objects.filter(owner__username="c1").latest("date").date, date(2025, 1, 31))
+        with self.assertRaises(CommandError):
+            call_command("seed_bench", "--users", "1", "--prefix", "b", stdout=StringIO())
+
+        out = StringIO()
+        call_command("bench", "b1", "--repeat", "2", "--warmup", "0",
+                     "--only", "dashboard", "--only", "transaction_export_csv", stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(set(report["results"]), {"dashboard", "transaction_export_csv"})
+        dashboard = report["results"]["dashboard"][0]
+        self.assertEqual(dashboard["status"], [200])
+        self.assertLessEqual(dashboard["p50_ms"], dashboard["p95_ms"])
+        self.assertGreater(dashboard["queries"], 0)
+        self.assertGreater(dashboard["peak_memory_kib"], 0)
+
+        # The requests run on the seed's last day, so the month is not empty
+        self.assertEqual(report["meta"]["today"], SEED_END.isoformat())
+        user = User.objects.get(username="b1")
+        self.client.force_login(user)
+        with pinned_today(SEED_END):
+            shell = self.client.get(reverse("dashboard"), HTTP_HOST="localhost").context["shell"]
+        self.assertGreater(shell.expense, 0)
+        self.assertTrue(shell.recent_transactions)
+
+
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="timed", password="pass12345")
+        self.client.force_login(self.user)
+
+    def test_server_timing_header_and_stats(self):
+        resp = self.client.get(reverse("dashboard"))
+        stats = resp.wsgi_request.query_stats
+        self.assertEqual(stats.view_name, "DashboardView")
+        self.assertEqual(stats.budget, DashboardView.query_budget)
+        self.assertGreater(stats.query_count, 0)
+        self.assertRegex(resp["Server-Timing"], rf'^app;dur=[\d.]+, db;dur=[\d.]+;desc="{stats.query_count} queries"$')
+
+    def test_viewset_budget_is_looked_up_by_action(self):
+        resp = self.client.get("/api/transactions/")
+        self.assertEqual(resp.wsgi_request.query_stats.view_name, "TransactionViewSet.list")
+        self.assertEqual(resp.wsgi_request.query_stats.budget, 4)
+
+    def test_over_budget_fails_when_strict_and_warns_otherwise(self):
+        with mock.patch.object(DashboardView, "query_budget", 1):
+            with override_settings(TRACKER_QUERY_BUDGET_STRICT=True), self.assertRaises(QueryBudgetExceeded):
+                self.client.get(reverse("dashboard"))
+            with override_settings(TRACKER_QUERY_BUDGET_STRICT=False), \
+                    self.assertLogs("Tracker.instrumentation", "WARNING") as logs:
+                resp = self.client.get(reverse("dashboard"))
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn("DashboardView ran", logs.output[0])
+
+    def test_repeated_statements_are_reported(self):
+        stats = RequestStats()
+        with connection.execute_wrapper(stats):
+            for wallet in Wallet.objects.filter(owner=self.user):
+                list(Transaction.objects.filter(wallet=wallet))
+            Wallet.objects.create(owner=self.user, name="Second")
+            for wallet in Wallet.objects.filter(owner=self.user):
+                list(Transaction.objects.filter(wallet=wallet))
+        self.assertIn(3, stats.duplicates().values())
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        settings_override = override_settings(TRACKER_PROFILE_DIR=self.tmp.name, TRACKER_PROFILE_KEEP=2)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.staff = User.objects.create_user(username="ops", password="pass12345", is_staff=True)
+        self.user = User.objects.create_user(username="plain", password="pass12345")
+        self.client.force_login(self.user)
+
+    def test_requests_are_only_profiled_with_a_valid_staff_token(self):
+        self.assertNotIn("X-Tracker-Profile-Id", self.client.get(reverse("dashboard")))
+        self.assertNotIn("X-Tracker-Profile-Id", self.client.get(reverse("dashboard"), {"_profile": "forged"}))
+        self.assertNotIn("X-Tracker-Profile-Id", self.client.get(reverse("dashboard"), {"_profile": make_token(self.user)}))
+
+        resp = self.client.get(reverse("dashboard"), {"_profile": make_token(self.staff)})
+        self.assertIn("X-Tracker-Profile-Id", resp)
+        resp = self.client.get("/api/transactions/", HTTP_X_TRACKER_PROFILE=make_token(self.staff))
+        self.assertIn("X-Tracker-Profile-Id", resp)
+
+        profiles = list_profiles()
+        self.assertEqual([p["view"] for p in profiles], ["TransactionViewSet.list", "DashboardView"])
+        self.assertEqual(profiles[1]["path"], "/")
+        self.assertTrue(profiles[1]["sql"])
+
+    def test_ring_buffer_and_staff_pages(self):
+        token = make_token(self.staff)
+        ids = [self.client.get(reverse("transaction_list"), {"_profile": token})["X-Tracker-Profile-Id"]
+               for _ in range(3)]
+        self.assertEqual([p["id"] for p in list_profiles()], ids[:0:-1])
+
+        self.assertEqual(self.client.get(reverse("profile_list")).status_code, 403)
+
+        self.client.force_login(self.staff)
+        self.assertContains(self.client.get(reverse("profile_list")), ids[2])
+        detail = self.client.get(reverse("profile_detail", args=[ids[2]]))
+        self.assertEqual(detail.context["profile"]["view"], "TransactionListView")
+        self.assertTrue(detail.context["functions"])
+        download = self.client.get(reverse("profile_download", args=[ids[2]]))
+        self.assertTrue(b"".join(download.streaming_content))
+        self.assertEqual(self.client.get(reverse("profile_detail", args=[ids[0]])).status_code, 404)
+        self.assertEqual(self.client.get(reverse("profile_detail", args=["..secret"])).status_code, 404)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        settings_override = override_settings(
+            TRACKER_METRICS_DIR=self.tmp.name, TRACKER_METRICS_FLUSH_INTERVAL=0, DEBUG=False,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # Fresh per-process registry, so earlier tests' requests don't count
+        registry = mock.patch.object(metrics, "_process", None)
+        registry.start()
+        self.addCleanup(registry.stop)
+
+        self.user = User.objects.create_user(username="scraped", password="pass12345", is_staff=True)
+        self.client.force_login(self.user)
+        wallet = Wallet.objects.get(owner=self.user)
+        for day in (1, 2, 3):
+            Transaction.objects.create(
+                owner=self.user, wallet=wallet, t_type="EXPENSE", amount="1.00", date=date(2026, 3, day),
+            )
+
+    def test_request_export_and_cache_metrics(self):
+        self.client.get(reverse("dashboard"))
+        self.client.get(reverse("dashboard"))
+        b"".join(self.client.get(reverse("transaction_export")).streaming_content)
+
+        body = self.client.get(reverse("metrics")).content.decode()
+        self.assertIn('tracker_http_requests_total{method="GET",status="200",view="dashboard"} 2', body)
+        self.assertIn('tracker_http_request_duration_seconds_bucket{view="dashboard",le="+Inf"} 2', body)
+        self.assertIn('tracker_http_request_duration_seconds_count{view="transaction_export"} 1', body)
+        self.assertIn('tracker_db_queries_per_request_count{view="dashboard"} 2', body)
+        self.assertIn('tracker_db_time_seconds_count{view="dashboard"} 2', body)
+        self.assertIn('tracker_export_rows_total{format="csv"} 3', body)
+        self.assertIn('tracker_cache_hit_ratio{namespace="dashboard_shell"} 0.5', body)
+
+    def test_files_from_other_workers_are_summed(self):
+        self.client.get(reverse("dashboard"))
+        other = metrics.ProcessMetrics()
+        other.file_name = "99999-1.json"
+        other.inc("tracker_http_requests_total", 5, view="dashboard", method="GET", status="200")
+        other.observe("tracker_http_request_duration_seconds", 0.02, metrics.LATENCY_BUCKETS, view="dashboard")
+        other.flush()
+
+        body = self.client.get(reverse("metrics")).content.decode()
+        self.assertIn('tracker_http_requests_total{method="GET",status="200",view="dashboard"} 6', body)
+        self.assertIn('tracker_http_request_duration_seconds_bucket{view="dashboard",le="0.025"} ', body)
+        self.assertIn('tracker_http_request_duration_seconds_count{view="dashboard"} 2', body)
+
+    def test_exited_workers_are_folded_into_the_archive(self):
+        self.client.get(reverse("dashboard"))
+        for name in ("99999-1.json", "99999-2.json", f"{os.getppid()}-1.json"):
+            other = metrics.ProcessMetrics()
+            other.file_name = name
+            other.inc("tracker_http_requests_total", 5, view="dashboard", method="GET", status="200")
+            other.flush()
+
+        for _ in range(2):
+            body = self.client.get(reverse("metrics")).content.decode()
+            self.assertIn('tracker_http_requests_total{method="GET",status="200",view="dashboard"} 16', body)
+        # The running parent's file stays; the exited worker's are gone
+        self.assertEqual(
+            sorted(path.name for path in Path(self.tmp.name).glob("*.json")),
+            sorted([metrics.ARCHIVE, metrics.process_metrics().file_name, f"{os.getppid()}-1.json"]),
+        )
+
+    def test_access_control(self):
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+        with override_settings(TRACKER_METRICS_TOKEN="s3cret"):
+            self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+            self.assertEqual(self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer s3cre").status_code, 403)
+            resp = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer s3cret")
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp["Content-Type"].startswith("text/plain; version=0.0.4"))
@@ -3,7 +3,9 @@ from . import views
 
 urlpatterns = [
     path("", views.DashboardView.as_view(), name="dashboard"),
-    
+    path("dashboard/async/", views.AsyncDashboardView.as_view(), name="dashboard_async"),
+    path("dashboard/events/", views.DashboardEventsView.as_view(), name="dashboard_events"),
+
 
     path("transactions/", views.TransactionListView.as_view(), name="transaction_list"),
     path("transactions/new/", views.TransactionCreateView.as_view(), name="transaction_create"),
@@ -21,4 +23,10 @@ urlpatterns = [
     path("budgets/new/", views.BudgetCreateView.as_view(), name="budget_create"),
     path("budgets/<int:pk>/edit/", views.BudgetUpdateView.as_view(), name="budget_update"),
     path("budgets/<int:pk>/delete/", views.BudgetDeleteView.as_view(), name="budget_delete"),
+
+    path("metrics", views.MetricsView.as_view(), name="metrics"),
+
+    path("profiles/", views.ProfileListView.as_view(), name="profile_list"),
+    path("profiles/<str:profile_id>/", views.ProfileDetailView.as_view(), name="profile_detail"),
+    path("profiles/<str:profile_id>/download/", views.ProfileDownloadView.as_view(), name="profile_download"),
 ]
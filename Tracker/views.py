@@ -1,27 +1,56 @@
 import csv
+import hmac
+import zlib
 from datetime import date
 
-from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Sum, Q
-from django.http import HttpResponse
+from asgiref.sync import sync_to_async
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Sum
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import redirect
 from django.urls import reverse_lazy
 from django.utils import timezone
 from django.views.generic import (
-    TemplateView, ListView, DetailView, CreateView, UpdateView, DeleteView
+    View, TemplateView, ListView, DetailView, CreateView, UpdateView, DeleteView
 )
 
+from .dashboard import DashboardFeed, DashboardShell
 from .forms import TransactionForm, CategoryForm, BudgetForm
 from .models import Transaction, Category, Budget, Wallet
-from .services import (
-    get_month_window,
-    monthly_totals_for_user,
-    category_breakdown_for_user,
-    budget_alerts_for_user,
-    monthly_history_for_user,
-)
+from .pagination import InvalidCursor, KeysetPaginator, page_url
+from . import live, metrics, profiling
+
+
+
+def transaction_filters(params):
+    """
+    Reads the transaction list filters from a QueryDict (web form names).
+    """
+    return {
+        "t_type": params.get("type"),
+        "category": params.get("category"),
+        "wallet": params.get("wallet"),
+        "date_from": params.get("date_from"),
+        "date_to": params.get("date_to"),
+        "search": params.get("search"),
+    }
 
 
+class AsyncLoginRequiredMixin(LoginRequiredMixin):
+    """
+    LoginRequiredMixin for views with async handlers. The user is loaded
+    with request.auser(); reading request.user on the event loop would run
+    the session query there.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+        return await super(LoginRequiredMixin, self).dispatch(request, *args, **kwargs)
+
 
 class OwnerQuerysetMixin:
     def get_queryset(self):
@@ -32,55 +61,65 @@ class OwnerQuerysetMixin:
 # DASHBOARD (Phase 1 + 2 + 5 analytics)
 # ----------------------------
 
+def dashboard_context(shell):
+    # The other panels are filled in by the page from dashboard_snapshot
+    return {
+        "shell": shell,
+        "month_expense_total": shell.expense,
+        "month_income_total": shell.income,
+        "net_balance": shell.net,
+        "recent_transactions": shell.recent_transactions,
+    }
+
+
 class DashboardView(LoginRequiredMixin, TemplateView):
     template_name = "dashboard.html"
+    query_budget = 6
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        shell = DashboardShell.for_user(self.request.user, timezone.localdate())
+        context.update(dashboard_context(shell))
+        return context
 
-        today = timezone.localdate()
-
-        # 1️⃣ Get month window from service
-        month_start, month_end = get_month_window(today)
-
-        # 2️⃣ Monthly totals
-        month_income_total, month_expense_total = monthly_totals_for_user(
-            self.request.user, month_start, month_end
-        )
-
-        # 3️⃣ Category breakdown
-        category_breakdown = category_breakdown_for_user(
-            self.request.user, month_start, month_end
-        )
-
-        # 4️⃣ ✅ Budget alerts (THIS is where your line goes)
-        budget_alerts = budget_alerts_for_user(
-            self.request.user, month_start, month_end
-        )
-
-        # 5️⃣ Monthly history (last 6 months)
-        last_6_months_start = (month_start - timezone.timedelta(days=180)).replace(day=1)
-        monthly_history = monthly_history_for_user(
-            self.request.user, last_6_months_start, month_end
-        )
-
-        # 6️⃣ Recent transactions
-        recent_transactions = (
-            Transaction.objects.for_user(self.request.user)
-            .select_related("category", "wallet")
-            .filter(date__gte=month_start, date__lte=month_end)[:8]
-        )
-
-        # 7️⃣ Add everything to context
-        context["month_expense_total"] = month_expense_total
-        context["month_income_total"] = month_income_total
-        context["net_balance"] = month_income_total - month_expense_total
-        context["category_breakdown"] = category_breakdown
-        context["budget_alerts"] = budget_alerts
-        context["monthly_history"] = monthly_history
-        context["recent_transactions"] = recent_transactions
 
-        return context
+class AsyncDashboardView(AsyncLoginRequiredMixin, TemplateView):
+    """
+    DashboardView for ASGI deployments. On a cold cache the shell queries
+    run concurrently (DashboardShell.abuild). Works under WSGI too, without
+    the gain.
+    """
+    template_name = "dashboard.html"
+    query_budget = 6
+
+    async def get(self, request, *args, **kwargs):
+        shell = await DashboardShell.afor_user(request.user, timezone.localdate())
+        context = self.get_context_data(**kwargs)
+        context.update(dashboard_context(shell))
+        return self.render_to_response(context)
+
+
+class DashboardEventsView(View):
+    """
+    Live dashboard updates as server-sent events (see Tracker/live.py).
+    """
+    # The stream's own reads happen after the response has started
+    query_budget = 2
+
+    async def get(self, request, *args, **kwargs):
+        user = request.user
+        if not await sync_to_async(lambda: user.is_authenticated)():
+            return HttpResponse(status=403)
+        if not isinstance(request, ASGIRequest):
+            # A WSGI worker would have to buffer the endless stream; 204 tells
+            # the EventSource not to reconnect, so the page stays static
+            return HttpResponse(status=204)
+
+        feed = DashboardFeed(user)
+        response = StreamingHttpResponse(live.stream(user.pk, feed.apoll), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
 
 
 # ----------------------------
@@ -92,36 +131,23 @@ class TransactionListView(LoginRequiredMixin, ListView):
     template_name = "transaction_list.html"
     context_object_name = "transactions"
     paginate_by = 10
+    query_budget = 6
+
+    def paginate_queryset(self, queryset, page_size):
+        # Keyset pagination: ?cursor= instead of ?page=, no COUNT(*) unless ?count=1
+        paginator = KeysetPaginator(queryset, page_size)
+        try:
+            page = paginator.page(
+                self.request.GET.get("cursor"),
+                with_count=self.request.GET.get("count") == "1",
+            )
+        except InvalidCursor:
+            raise Http404("Invalid cursor.")
+        return paginator, page, page.object_list, page.has_other_pages()
 
     def get_queryset(self):
         qs = Transaction.objects.for_user(self.request.user).select_related("category", "wallet")
-
-        t_type = self.request.GET.get("type")
-        category = self.request.GET.get("category")
-        wallet = self.request.GET.get("wallet")
-        date_from = self.request.GET.get("date_from")
-        date_to = self.request.GET.get("date_to")
-        search = self.request.GET.get("search")
-
-        if t_type:
-            qs = qs.filter(t_type=t_type)
-
-        if category:
-            qs = qs.filter(category__id=category)
-
-        if wallet:
-            qs = qs.filter(wallet__id=wallet)
-
-        if date_from:
-            qs = qs.filter(date__gte=date_from)
-
-        if date_to:
-            qs = qs.filter(date__lte=date_to)
-
-        if search:
-            qs = qs.filter(Q(note__icontains=search))
-
-        return qs
+        return qs.filter_by(**transaction_filters(self.request.GET))
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -136,6 +162,9 @@ class TransactionListView(LoginRequiredMixin, ListView):
             "date_to": self.request.GET.get("date_to", ""),
             "search": self.request.GET.get("search", ""),
         }
+        page = context["page_obj"]
+        context["next_url"] = page_url(self.request, page.next_cursor)
+        context["previous_url"] = page_url(self.request, page.previous_cursor)
         return context
 
 
@@ -143,6 +172,7 @@ class TransactionDetailView(LoginRequiredMixin, DetailView):
     model = Transaction
     template_name = "transaction_detail.html"
     context_object_name = "t"
+    query_budget = 3
 
     def get_queryset(self):
         return Transaction.objects.for_user(self.request.user).select_related("category", "wallet")
@@ -153,6 +183,7 @@ class TransactionCreateView(LoginRequiredMixin, CreateView):
     form_class = TransactionForm
     template_name = "transaction_form.html"
     success_url = reverse_lazy("transaction_list")
+    query_budget = {"get": 4, "post": 20}
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
@@ -169,6 +200,7 @@ class TransactionUpdateView(LoginRequiredMixin, UpdateView):
     form_class = TransactionForm
     template_name = "transaction_form.html"
     success_url = reverse_lazy("transaction_list")
+    query_budget = {"get": 5, "post": 24}
 
     def get_queryset(self):
         return Transaction.objects.for_user(self.request.user)
@@ -183,6 +215,7 @@ class TransactionDeleteView(LoginRequiredMixin, DeleteView):
     model = Transaction
     template_name = "transaction_confirm_delete.html"
     success_url = reverse_lazy("transaction_list")
+    query_budget = {"get": 5, "post": 14}
 
     def get_queryset(self):
         return Transaction.objects.for_user(self.request.user)
@@ -195,22 +228,66 @@ class TransactionDeleteView(LoginRequiredMixin, DeleteView):
         return redirect(self.success_url)
 
 
-class TransactionExportCSVView(LoginRequiredMixin, ListView):
-    model = Transaction
-
-    def get(self, request, *args, **kwargs):
-        qs = Transaction.objects.for_user(request.user).select_related("category", "wallet")
+class Echo:
+    """
+    File-like object whose write() just returns the value, so csv.writer
+    can format rows for a streaming response.
+    """
+    def write(self, value):
+        return value
 
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = 'attachment; filename="transactions.csv"'
-        writer = csv.writer(response)
-        writer.writerow(["Date", "Wallet", "Type", "Amount", "Category", "Note"])
 
-        for t in qs:
-            writer.writerow([t.date, t.wallet.name, t.t_type, t.amount, t.category.name if t.category else "", t.note])
+class TransactionExportCSVView(LoginRequiredMixin, View):
+    """
+    Streams the (filtered) transaction list as CSV, optionally gzipped
+    with ?compress=gzip. Rows are read as tuples in chunks, so memory stays
+    flat no matter how many transactions are exported.
+    """
+    header = ["Date", "Wallet", "Type", "Amount", "Category", "Note"]
+    columns = ["date", "wallet__name", "t_type", "amount", "category__name", "note"]
+    chunk_size = 2000
+    query_budget = 2
 
+    def get(self, request, *args, **kwargs):
+        rows = (
+            Transaction.objects.for_user(request.user)
+            .filter_by(**transaction_filters(request.GET))
+            .values_list(*self.columns)
+            .iterator(chunk_size=self.chunk_size)
+        )
+        content = self.csv_chunks(rows)
+
+        if request.GET.get("compress") == "gzip":
+            response = StreamingHttpResponse(self.gzip_chunks(content), content_type="application/gzip")
+            response["Content-Disposition"] = 'attachment; filename="transactions.csv.gz"'
+        else:
+            response = StreamingHttpResponse(content, content_type="text/csv")
+            response["Content-Disposition"] = 'attachment; filename="transactions.csv"'
         return response
 
+    def csv_chunks(self, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow(self.header)
+
+        buffer = []
+        for date_, wallet, t_type, amount, category, note in rows:
+            buffer.append(writer.writerow([date_, wallet, t_type, amount, category or "", note]))
+            if len(buffer) >= self.chunk_size:
+                metrics.inc("tracker_export_rows_total", len(buffer), format="csv")
+                yield "".join(buffer)
+                buffer = []
+        if buffer:
+            metrics.inc("tracker_export_rows_total", len(buffer), format="csv")
+            yield "".join(buffer)
+
+    def gzip_chunks(self, chunks):
+        compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            data = compressor.compress(chunk.encode())
+            if data:
+                yield data
+        yield compressor.flush()
+
 
 # ----------------------------
 # CATEGORIES CRUD
@@ -220,6 +297,7 @@ class CategoryListView(LoginRequiredMixin, ListView):
     model = Category
     template_name = "category_list.html"
     context_object_name = "categories"
+    query_budget = 3
 
     def get_queryset(self):
         return Category.objects.filter(owner=self.request.user)
@@ -230,6 +308,7 @@ class CategoryCreateView(LoginRequiredMixin, CreateView):
     form_class = CategoryForm
     template_name = "category_form.html"
     success_url = reverse_lazy("category_list")
+    query_budget = {"get": 2, "post": 3}
 
     def form_valid(self, form):
         form.instance.owner = self.request.user
@@ -241,6 +320,7 @@ class CategoryUpdateView(LoginRequiredMixin, UpdateView):
     form_class = CategoryForm
     template_name = "category_form.html"
     success_url = reverse_lazy("category_list")
+    query_budget = {"get": 3, "post": 4}
 
     def get_queryset(self):
         return Category.objects.filter(owner=self.request.user)
@@ -250,6 +330,8 @@ class CategoryDeleteView(LoginRequiredMixin, DeleteView):
     model = Category
     template_name = "category_confirm_delete.html"
     success_url = reverse_lazy("category_list")
+    # No POST budget: deleting moves one rollup bucket per month of history
+    query_budget = {"get": 3}
 
     def get_queryset(self):
         return Category.objects.filter(owner=self.request.user)
@@ -263,6 +345,7 @@ class BudgetListView(LoginRequiredMixin, ListView):
     model = Budget
     template_name = "budget_list.html"
     context_object_name = "budgets"
+    query_budget = 3
 
     def get_queryset(self):
         return Budget.objects.filter(owner=self.request.user).select_related("category")
@@ -273,6 +356,7 @@ class BudgetCreateView(LoginRequiredMixin, CreateView):
     form_class = BudgetForm
     template_name = "budget_form.html"
     success_url = reverse_lazy("budget_list")
+    query_budget = {"get": 3, "post": 6}
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
@@ -289,6 +373,7 @@ class BudgetUpdateView(LoginRequiredMixin, UpdateView):
     form_class = BudgetForm
     template_name = "budget_form.html"
     success_url = reverse_lazy("budget_list")
+    query_budget = {"get": 4, "post": 7}
 
     def get_queryset(self):
         return Budget.objects.filter(owner=self.request.user)
@@ -303,6 +388,76 @@ class BudgetDeleteView(LoginRequiredMixin, DeleteView):
     model = Budget
     template_name = "budget_confirm_delete.html"
     success_url = reverse_lazy("budget_list")
+    query_budget = {"get": 4, "post": 6}
 
     def get_queryset(self):
         return Budget.objects.filter(owner=self.request.user)
+
+
+# ----------------------------
+# Request profiles (staff only)
+# ----------------------------
+class StaffRequiredMixin(LoginRequiredMixin, UserPassesTestMixin):
+    def test_func(self):
+        return self.request.user.is_staff
+
+
+class ProfileListView(StaffRequiredMixin, TemplateView):
+    template_name = "profile_list.html"
+    query_budget = 2
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["profiles"] = profiling.list_profiles()
+        context["token"] = profiling.make_token(self.request.user)
+        context["param"] = profiling.PROFILE_PARAM
+        return context
+
+
+class ProfileDetailView(StaffRequiredMixin, TemplateView):
+    template_name = "profile_detail.html"
+    query_budget = 2
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        try:
+            meta, prof_path = profiling.load_profile(self.kwargs["profile_id"])
+            context["functions"] = profiling.top_functions(prof_path)
+        except FileNotFoundError:
+            raise Http404("Profile not found (it may have been rotated out).")
+        context["profile"] = meta
+        return context
+
+
+class ProfileDownloadView(StaffRequiredMixin, View):
+    query_budget = 2
+
+    def get(self, request, profile_id):
+        try:
+            _, prof_path = profiling.load_profile(profile_id)
+            return FileResponse(open(prof_path, "rb"), as_attachment=True, filename=f"{profile_id}.prof")
+        except FileNotFoundError:
+            raise Http404("Profile not found (it may have been rotated out).")
+
+
+# ----------------------------
+# Metrics
+# ----------------------------
+class MetricsView(View):
+    """
+    Prometheus scrape endpoint. Requires `Authorization: Bearer <token>` when
+    TRACKER_METRICS_TOKEN is set; otherwise it is open to staff (or anyone
+    with DEBUG on).
+    """
+    query_budget = 2
+
+    def get(self, request):
+        token = getattr(settings, "TRACKER_METRICS_TOKEN", "")
+        if token:
+            supplied = request.headers.get("Authorization", "")
+            allowed = hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode())
+        else:
+            allowed = settings.DEBUG or request.user.is_staff
+        if not allowed:
+            return HttpResponse(status=403)
+        return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")